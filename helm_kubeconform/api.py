@@ -0,0 +1,222 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Asynchronous Python API for validating Helm charts using Kubeconform.
+
+Targets are validated in worker threads by the same code as the command line,
+so that the result cache, cluster capabilities, split render and Kubeconform
+sharding behave alike.
+
+Example:
+    Validating a chart with two sets of options::
+
+        import asyncio
+
+        from helm_kubeconform.api import Target
+        from helm_kubeconform.api import validate_many
+
+        results = asyncio.run(
+            validate_many(
+                [
+                    Target("chart", values=("values.yaml",)),
+                    Target("chart", kubeconform_args=("-strict",)),
+                ],
+                concurrency=4,
+            )
+        )
+        failed = [result.target for result in results if not result.success]
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from io import StringIO
+import os
+import typing
+
+from helm_kubeconform.output import OutputMultiplexer
+from helm_kubeconform.plugin import RunOptions
+from helm_kubeconform.plugin import add_capabilities_args
+from helm_kubeconform.plugin import validate_target
+from helm_kubeconform.resources import TargetUsage
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable
+
+    from typing_extensions import Self
+
+    from helm_kubeconform.cache import ResultCache
+    from helm_kubeconform.capabilities import Capabilities
+
+
+@dataclass(frozen=True)
+class Target:
+    """A Helm chart to validate, with the options to validate it with.
+
+    Attributes:
+        chart (str): Chart to validate, as accepted by `helm template`.
+        values (tuple[str, ...]): Values files to render the chart with.
+        helm_template_args (tuple[str, ...]): Extra `helm template` flags.
+        kubeconform_args (tuple[str, ...]): Kubeconform flags, using their
+            native names (e.g. `-strict`).
+    """
+
+    chart: str
+    values: tuple[str, ...] = ()
+    helm_template_args: tuple[str, ...] = ()
+    kubeconform_args: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class ValidationResult:
+    """Result of the validation of a target.
+
+    Attributes:
+        target (Target): The validated target.
+        returncode (int): Exit code of the failed command, or 0 on success.
+        output (str): Error output of `helm template`, and Kubeconform output.
+        render_time (float): Time in seconds spent rendering the chart.
+        validation_time (float): Time in seconds spent validating the
+            rendered chart.
+        cached (bool): Whether the result was retrieved from the cache.
+    """
+
+    target: Target
+    returncode: int
+    output: str = ""
+    render_time: float = 0.0
+    validation_time: float = 0.0
+    cached: bool = False
+
+    @property
+    def success(self: Self) -> bool:
+        """bool: Whether the target was successfully validated."""
+        return self.returncode == 0
+
+
+# Validate a target, capturing its output
+def _validate(
+    target: Target, options: RunOptions, capabilities: Capabilities | None
+) -> ValidationResult:
+    helm_template_args = [*target.helm_template_args]
+    for values_file in target.values:
+        helm_template_args.extend(["--values", values_file])
+    kubeconform_args = [*target.kubeconform_args]
+    if capabilities:
+        add_capabilities_args(
+            capabilities, helm_template_args, kubeconform_args
+        )
+
+    stream = StringIO()
+    usage = TargetUsage()
+    with OutputMultiplexer(stream) as multiplexer:
+        returncode = validate_target(
+            target.chart,
+            helm_template_args,
+            kubeconform_args,
+            options=options,
+            usage=usage,
+            output=multiplexer.job(),
+        )
+
+    return ValidationResult(
+        target,
+        returncode,
+        output=stream.getvalue(),
+        render_time=usage.render_time,
+        validation_time=usage.validation_time,
+        cached=usage.reused,
+    )
+
+
+async def validate(
+    target: Target,
+    *,
+    cache: ResultCache | None = None,
+    capabilities: Capabilities | None = None,
+    split_render: int = 1,
+    kubeconform_shards: int = 1,
+) -> ValidationResult:
+    """Validate a target.
+
+    Args:
+        target (Target): The target to validate.
+        cache (ResultCache | None, optional): Cache to reuse rendered charts
+            and successful validation results from.
+        capabilities (Capabilities | None, optional): Cluster capabilities to
+            render the chart with.
+        split_render (int, optional): Number of groups of templates a local
+            chart is rendered as in parallel.
+        kubeconform_shards (int, optional): Number of Kubeconform processes
+            large manifests are validated by in parallel.
+
+    Returns:
+        ValidationResult: The validation result.
+
+    Raises:
+        OSError: If the `helm` or `kubeconform` command cannot be run.
+    """
+    (result,) = await validate_many(
+        [target],
+        concurrency=1,
+        cache=cache,
+        capabilities=capabilities,
+        split_render=split_render,
+        kubeconform_shards=kubeconform_shards,
+    )
+
+    return result
+
+
+async def validate_many(  # noqa: PLR0913
+    targets: Iterable[Target],
+    *,
+    concurrency: int | None = None,
+    cache: ResultCache | None = None,
+    capabilities: Capabilities | None = None,
+    split_render: int = 1,
+    kubeconform_shards: int = 1,
+) -> list[ValidationResult]:
+    """Validate several targets concurrently.
+
+    Args:
+        targets (Iterable[Target]): The targets to validate.
+        concurrency (int | None, optional): Maximum number of targets validated
+            at the same time. Defaults to the number of CPUs.
+        cache (ResultCache | None, optional): Cache to reuse rendered charts
+            and successful validation results from.
+        capabilities (Capabilities | None, optional): Cluster capabilities to
+            render the charts with.
+        split_render (int, optional): Number of groups of templates local
+            charts are rendered as in parallel.
+        kubeconform_shards (int, optional): Number of Kubeconform processes
+            large manifests are validated by in parallel.
+
+    Returns:
+        list[ValidationResult]: The validation results, in the order of the
+        targets.
+
+    Raises:
+        OSError: If the `helm` or `kubeconform` command cannot be run. The
+            validations already started are not waited for.
+    """
+    # Files are only hashed once per call
+    options = RunOptions(
+        cache=cache,
+        split_render=split_render,
+        kubeconform_shards=kubeconform_shards,
+    )
+    semaphore = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+
+    # Validations run in threads, so that the event loop is never blocked,
+    # even when the call fails or is cancelled
+    async def _validate_with_semaphore(target: Target) -> ValidationResult:
+        async with semaphore:
+            return await asyncio.to_thread(
+                _validate, target, options, capabilities
+            )
+
+    return list(
+        await asyncio.gather(*(_validate_with_semaphore(t) for t in targets))
+    )
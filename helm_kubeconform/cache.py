@@ -0,0 +1,267 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Content-addressed result cache backends for the helm-kubeconform plugin."""
+
+from __future__ import annotations
+
+from abc import ABC
+from abc import abstractmethod
+import functools
+import hashlib
+import logging
+import os
+from pathlib import Path
+import tempfile
+import typing
+from urllib.error import HTTPError
+from urllib.error import URLError
+from urllib.parse import urlparse
+from urllib.request import Request
+from urllib.request import url2pathname
+from urllib.request import urlopen
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from typing_extensions import Self
+
+    from helm_kubeconform.fingerprints import FingerprintIndex
+
+logger = logging.getLogger(__name__)
+
+# Timeout in seconds for requests to an HTTP cache
+_HTTP_TIMEOUT = 10.0
+
+
+class ResultCache(ABC):
+    """Base class for result cache backends.
+
+    A cache maps content-addressed keys, as returned by `digest()`, to raw
+    bytes. Backends must never make a validation fail: lookup and storage
+    errors are logged and ignored.
+    """
+
+    @abstractmethod
+    def get(self: Self, key: str) -> bytes | None:
+        """Retrieve a cache entry.
+
+        Args:
+            key (str): Entry key.
+
+        Returns:
+            bytes | None: The entry content, or `None` if not found.
+        """
+
+    @abstractmethod
+    def put(self: Self, key: str, data: bytes) -> None:
+        """Store a cache entry.
+
+        Args:
+            key (str): Entry key.
+            data (bytes): Entry content.
+        """
+
+
+class DirectoryCache(ResultCache):
+    """Cache backend storing entries in a local or shared directory.
+
+    Entries are written atomically, so the directory may be shared by several
+    processes or hosts, e.g. on a network filesystem.
+    """
+
+    def __init__(self: Self, directory: Path) -> None:
+        """Initialize the cache.
+
+        Args:
+            directory (Path): Cache directory, created on first write.
+        """
+        self.directory = directory
+
+    def _path(self: Self, key: str) -> Path:
+        # Fan out entries to keep directories small
+        return self.directory / key[:2] / key
+
+    def get(self: Self, key: str) -> bytes | None:  # noqa: D102
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as ex:
+            logger.warning("Unable to read cache entry %s: %s", key, ex)
+            return None
+
+    def put(self: Self, key: str, data: bytes) -> None:  # noqa: D102
+        try:
+            write_atomically(self._path(key), data)
+        except OSError as ex:
+            logger.warning("Unable to write cache entry %s: %s", key, ex)
+
+
+class HTTPCache(ResultCache):
+    """Cache backend storing entries in an HTTP store.
+
+    Entries are retrieved using `GET <url>/<key>` and stored using
+    `PUT <url>/<key>` requests.
+    """
+
+    def __init__(self: Self, url: str, timeout: float = _HTTP_TIMEOUT) -> None:
+        """Initialize the cache.
+
+        Args:
+            url (str): Base URL of the store.
+            timeout (float, optional): Timeout in seconds for each request.
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def get(self: Self, key: str) -> bytes | None:  # noqa: D102
+        try:
+            with urlopen(  # noqa: S310
+                f"{self.url}/{key}", timeout=self.timeout
+            ) as response:
+                return typing.cast("bytes", response.read())
+        except HTTPError as ex:
+            if ex.code != 404:  # noqa: PLR2004
+                logger.warning("Unable to read cache entry %s: %s", key, ex)
+        except (URLError, OSError) as ex:
+            logger.warning("Unable to read cache entry %s: %s", key, ex)
+
+        return None
+
+    def put(self: Self, key: str, data: bytes) -> None:  # noqa: D102
+        request = Request(  # noqa: S310
+            f"{self.url}/{key}",
+            data=data,
+            method="PUT",
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        try:
+            with urlopen(request, timeout=self.timeout):  # noqa: S310
+                pass
+        except (URLError, OSError) as ex:
+            logger.warning("Unable to write cache entry %s: %s", key, ex)
+
+
+def open_cache(location: str) -> ResultCache:
+    """Return the cache backend for a location.
+
+    Args:
+        location (str): A `http://` or `https://` URL for an HTTP store, or a
+            `file://` URL or a path for a local or shared directory.
+
+    Returns:
+        ResultCache: The cache backend.
+    """
+    parsed_location = urlparse(location)
+    if parsed_location.scheme in {"http", "https"}:
+        return HTTPCache(location)
+    if parsed_location.scheme == "file":
+        return DirectoryCache(Path(url2pathname(parsed_location.path)))
+
+    return DirectoryCache(Path(location))
+
+
+def digest(*parts: str | bytes) -> str:
+    """Compute a content-addressed cache key.
+
+    Args:
+        *parts (str | bytes): Parts the key is computed from.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the parts.
+    """
+    hash_object = hashlib.sha256()
+    for part in parts:
+        data = part.encode() if isinstance(part, str) else part
+        # Prefix each part with its length to avoid ambiguous concatenations
+        hash_object.update(len(data).to_bytes(8, "big"))
+        hash_object.update(data)
+
+    return hash_object.hexdigest()
+
+
+def write_atomically(path: Path, data: bytes) -> None:
+    """Write a file atomically, creating its parent directories.
+
+    The content is written to a temporary file in the same directory, which
+    then replaces the file, so that concurrent readers never see a partially
+    written file. The temporary file is removed if the write fails.
+
+    Args:
+        path (Path): File to write.
+        data (bytes): File content.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", delete=False
+    ) as tmp_file:
+        tmp_path = Path(tmp_file.name)
+        try:
+            tmp_file.write(data)
+            tmp_file.close()
+            tmp_path.replace(path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+
+def file_digest(path: Path) -> str:
+    """Compute the digest of a file content.
+
+    Args:
+        path (Path): Path to a file.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the content.
+    """
+    hash_object = hashlib.sha256()
+    with path.open("rb") as file:
+        for chunk in iter(functools.partial(file.read, 1 << 16), b""):
+            hash_object.update(chunk)
+
+    return hash_object.hexdigest()
+
+
+def path_digest(
+    path: Path,
+    index: FingerprintIndex | None = None,
+    memo: dict[Path, str] | None = None,
+) -> str:
+    """Compute the digest of a file or a directory tree content.
+
+    Args:
+        path (Path): Path to a file or a directory.
+        index (FingerprintIndex | None, optional): Index of file digests,
+            only hashing files changed since they were last hashed.
+        memo (dict[Path, str] | None, optional): Digests already computed
+            during the current run, by path, updated with the computed digest.
+            The same chart is usually hashed once for each values file it is
+            validated against, but it may be modified between runs.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the content.
+    """
+    if memo is not None:
+        if path not in memo:
+            memo[path] = path_digest(path, index)
+        return memo[path]
+
+    hash_file = index.file_digest if index else file_digest
+    if not path.is_dir():
+        return hash_file(path)
+
+    parts: list[str] = []
+    for directory, directories, files in os.walk(path):
+        directories.sort()
+        for file in sorted(files):
+            file_path = Path(directory, file)
+            # Skip broken links and special files
+            if not file_path.is_file():
+                continue
+            parts.extend(
+                (file_path.relative_to(path).as_posix(), hash_file(file_path))
+            )
+
+    return digest(*parts)
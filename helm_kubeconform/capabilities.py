@@ -0,0 +1,170 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Snapshots of the capabilities of a Kubernetes cluster.
+
+Charts branching on `.Capabilities.APIVersions` or `.Capabilities.KubeVersion`
+render differently depending on the cluster they are deployed to. Rather than
+querying the cluster on every render (`helm template --validate`), its API
+versions and Kubernetes version are captured once into a snapshot file, and
+passed to `helm template` using the `--api-versions` and `--kube-version`
+flags.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import logging
+from pathlib import Path
+import re
+import subprocess
+import tempfile
+import typing
+
+from helm_kubeconform.cache import write_atomically
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Sequence
+
+    from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+# Template printing the capabilities of the cluster as a YAML comment, so that
+# `helm template --validate` has no resource to check against the cluster
+_CAPTURE_TEMPLATE = (
+    '# {{ dict "apiVersions" .Capabilities.APIVersions "kubeVersion" '
+    ".Capabilities.KubeVersion.Version | toJson }}\n"
+)
+_CAPTURE_OUTPUT_REGEX = re.compile(r"^# (\{.*\})\s*$", re.MULTILINE)
+# Kubeconform schemas are only published for release versions
+_KUBE_VERSION_REGEX = re.compile(r"^v?(\d+\.\d+\.\d+)")
+
+
+class CapabilitiesError(Exception):
+    """Raised when capabilities cannot be captured, read or written."""
+
+
+@dataclass
+class Capabilities:
+    """Capabilities of a Kubernetes cluster.
+
+    Attributes:
+        api_versions (list[str]): API versions, and resources as
+            `<group>/<version>/<kind>`, served by the cluster.
+        kube_version (str): Kubernetes version of the cluster.
+    """
+
+    api_versions: list[str]
+    kube_version: str
+
+    @property
+    def release_version(self: Self) -> str:
+        """str: The Kubernetes release version, without vendor suffix."""
+        match = _KUBE_VERSION_REGEX.match(self.kube_version)
+        return match[1] if match else self.kube_version.lstrip("v")
+
+    @classmethod
+    def load(cls: type[Self], path: Path) -> Self:
+        """Load capabilities from a snapshot file.
+
+        Args:
+            path (Path): Snapshot file.
+
+        Returns:
+            Capabilities: The capabilities.
+
+        Raises:
+            CapabilitiesError: If the snapshot cannot be read.
+        """
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return cls(
+                [str(v) for v in data["apiVersions"]], str(data["kubeVersion"])
+            )
+        except (OSError, ValueError, KeyError, TypeError) as ex:
+            raise CapabilitiesError(str(ex)) from ex
+
+    def save(self: Self, path: Path) -> None:
+        """Write capabilities to a snapshot file.
+
+        Args:
+            path (Path): Snapshot file.
+
+        Raises:
+            CapabilitiesError: If the snapshot cannot be written.
+        """
+        data = {
+            "apiVersions": sorted(self.api_versions),
+            "kubeVersion": self.kube_version,
+        }
+
+        try:
+            write_atomically(path, json.dumps(data, indent=1).encode())
+        except OSError as ex:
+            raise CapabilitiesError(str(ex)) from ex
+
+
+def capture(helm_bin: str, helm_args: Sequence[str] = ()) -> Capabilities:
+    """Capture the capabilities of the cluster Helm is connected to.
+
+    Args:
+        helm_bin (str): Helm executable.
+        helm_args (Sequence[str], optional): Extra `helm template` arguments,
+            such as `--kube-context` or `--kubeconfig`.
+
+    Returns:
+        Capabilities: The capabilities of the cluster.
+
+    Raises:
+        CapabilitiesError: If Helm cannot be run, the cluster cannot be
+            reached, or the capabilities cannot be parsed.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        chart_dir = Path(tmp_dir, "capabilities")
+        (chart_dir / "templates").mkdir(parents=True)
+        (chart_dir / "Chart.yaml").write_text(
+            "apiVersion: v2\nname: capabilities\nversion: 0.1.0\n",
+            encoding="utf-8",
+        )
+        (chart_dir / "templates" / "capabilities.yaml").write_text(
+            _CAPTURE_TEMPLATE, encoding="utf-8"
+        )
+
+        helm_template_command = [
+            helm_bin,
+            "template",
+            "capabilities",
+            str(chart_dir),
+            "--validate",
+            *helm_args,
+        ]
+        logger.debug("Running %s", " ".join(helm_template_command))
+        try:
+            helm_template_process = subprocess.run(
+                helm_template_command,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        except OSError as ex:
+            raise CapabilitiesError(str(ex)) from ex
+
+    if helm_template_process.returncode:
+        raise CapabilitiesError(helm_template_process.stderr.strip())
+
+    if not (
+        match := _CAPTURE_OUTPUT_REGEX.search(helm_template_process.stdout)
+    ):
+        msg = "no capabilities found in helm template output"
+        raise CapabilitiesError(msg)
+
+    try:
+        data = json.loads(match[1])
+        return Capabilities(
+            [str(v) for v in data["apiVersions"]], str(data["kubeVersion"])
+        )
+    except (ValueError, KeyError, TypeError) as ex:
+        msg = f"invalid capabilities in helm template output: {ex}"
+        raise CapabilitiesError(msg) from ex
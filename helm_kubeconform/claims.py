@@ -0,0 +1,251 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Work claims shared between concurrent helm-kubeconform processes.
+
+Several processes (e.g. pre-commit hooks run in parallel) may have to validate
+the same chart. Each piece of work is identified by a key, and guarded by a
+lock file: the first process claiming a key does the work and publishes its
+result, while the others wait for the lock to be released and reuse the
+published result. Results are only reused by processes which waited for the
+claim: a process claiming a key without waiting discards the previous result
+and does the work again.
+
+Lock and result files not used for an hour are removed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import typing
+
+from helm_kubeconform.cache import write_atomically
+
+if sys.platform == "win32":  # pragma: no cover
+    import msvcrt
+else:
+    import fcntl
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+    from pathlib import Path
+    from typing import IO
+
+    from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+# Lock and result files not used for this number of seconds are removed
+_ENTRY_MAX_AGE = 3600
+
+
+if sys.platform == "win32":  # pragma: no cover
+
+    def _lock(file: IO[bytes]) -> None:
+        while True:
+            # Blocking mode only retries for 10 seconds
+            with contextlib.suppress(OSError):
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+
+    def _try_lock(file: IO[bytes]) -> bool:
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(file: IO[bytes]) -> None:
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+
+    def _lock(file: IO[bytes]) -> None:
+        fcntl.flock(file, fcntl.LOCK_EX)
+
+    def _try_lock(file: IO[bytes]) -> bool:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock(file: IO[bytes]) -> None:
+        fcntl.flock(file, fcntl.LOCK_UN)
+
+
+class Claim:
+    """A claim on a piece of work.
+
+    Attributes:
+        result (int | None): Result published by another process for the same
+            piece of work, or `None` if the work has to be done.
+    """
+
+    def __init__(
+        self: Self, result_file: Path | None, result: int | None = None
+    ) -> None:
+        """Initialize a claim.
+
+        Args:
+            result_file (Path | None): File the result is published to. The
+                result is not published if `None`.
+            result (int | None, optional): Result already published.
+        """
+        self.result = result
+        self._result_file = result_file
+
+    def publish(self: Self, result: int) -> None:
+        """Publish the result of the work, for other processes to reuse it.
+
+        Args:
+            result (int): Result.
+        """
+        self.result = result
+        if not self._result_file:
+            return
+
+        try:
+            write_atomically(
+                self._result_file,
+                json.dumps({"result": result, "time": time.time()}).encode(),
+            )
+        except OSError as ex:
+            logger.warning(
+                "Unable to publish result to %s: %s", self._result_file, ex
+            )
+
+
+class ClaimRegistry:
+    """Registry of work claims, stored in a directory."""
+
+    def __init__(self: Self, directory: Path) -> None:
+        """Initialize the registry.
+
+        Args:
+            directory (Path): Directory where lock and result files are
+                stored. Several processes must use the same directory to share
+                their work.
+        """
+        self.directory = directory
+        self._pruned = False
+        self._prune_lock = threading.Lock()
+
+    # Return the result published for a key, if any
+    def _read_result(self: Self, result_file: Path) -> int | None:
+        try:
+            data = json.loads(result_file.read_text(encoding="utf-8"))
+            return int(data["result"])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as ex:
+            logger.warning(
+                "Unable to read result from %s: %s", result_file, ex
+            )
+
+        return None
+
+    def prune(self: Self, max_age: float = _ENTRY_MAX_AGE) -> None:
+        """Remove the lock and result files not used for a while.
+
+        Files of claims held by other processes are kept.
+
+        Args:
+            max_age (float, optional): Age in seconds from which unused files
+                are removed.
+        """
+        for lock_file in self.directory.glob("*.lock"):
+            result_file = lock_file.with_suffix(".json")
+            try:
+                with lock_file.open("ab") as file:
+                    if not _try_lock(file):
+                        continue
+                    try:
+                        last_use = max(
+                            os.fstat(file.fileno()).st_mtime,
+                            result_file.stat().st_mtime
+                            if result_file.exists()
+                            else 0,
+                        )
+                        if time.time() - last_use > max_age:
+                            result_file.unlink(missing_ok=True)
+                            lock_file.unlink()
+                    finally:
+                        _unlock(file)
+            except OSError as ex:
+                logger.debug("Unable to remove claim %s: %s", lock_file, ex)
+
+    # Prune the directory on the first claim only
+    def _prune_once(self: Self) -> None:
+        with self._prune_lock:
+            if self._pruned:
+                return
+            self._pruned = True
+        self.prune()
+
+    # Open and lock the lock file of a key, and return it along with whether
+    # another process held the claim meanwhile. A lock file removed by a
+    # concurrent pruning while being locked is created again
+    @staticmethod
+    def _open_locked(lock_file: Path) -> tuple[IO[bytes], bool]:
+        while True:
+            file = lock_file.open("ab")
+            waited = not _try_lock(file)
+            if waited:
+                _lock(file)
+            try:
+                if os.path.samestat(os.fstat(file.fileno()), lock_file.stat()):
+                    return file, waited
+            except FileNotFoundError:
+                pass
+            _unlock(file)
+            file.close()
+
+    @contextlib.contextmanager
+    def claim(self: Self, key: str) -> Iterator[Claim]:
+        """Claim a piece of work.
+
+        Wait until no other process holds the claim on the same key. Claims
+        are not exclusive if the lock file cannot be created: the work is then
+        done by every process.
+
+        Args:
+            key (str): Key identifying the piece of work.
+
+        Yields:
+            Claim: The claim, holding the result published by the process
+            waited for if any.
+        """
+        lock_file = self.directory / f"{key}.lock"
+        result_file = self.directory / f"{key}.json"
+        start_time = time.perf_counter()
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._prune_once()
+            file, waited = self._open_locked(lock_file)
+        except OSError as ex:
+            logger.warning("Unable to create lock file %s: %s", lock_file, ex)
+            yield Claim(None)
+            return
+
+        with file:
+            logger.debug(
+                "Claimed %s after %.3fs", key, time.perf_counter() - start_time
+            )
+            try:
+                result = None
+                if waited:
+                    result = self._read_result(result_file)
+                else:
+                    # Results of previous runs are never reused
+                    with contextlib.suppress(OSError):
+                        result_file.unlink(missing_ok=True)
+                yield Claim(result_file, result)
+            finally:
+                _unlock(file)
@@ -0,0 +1,263 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Helm chart and file discovery for the helm-kubeconform plugin."""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+import re
+import typing
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from io import BufferedIOBase
+
+    from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+# Ignore files honored while discovering charts
+_IGNORE_FILES = (".gitignore", ".helmignore")
+# Directories never walked through
+_SKIPPED_DIRECTORIES = {".git", ".hg", ".svn"}
+# Directory where a chart vendors its subcharts
+_SUBCHARTS_DIRECTORY = "charts"
+# Maximum size of the chunks read from lists of paths
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+# Translate a gitignore glob into a regular expression matching paths relative
+# to the directory of the ignore file
+def _glob_to_regex(pattern: str) -> str:
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and (end := pattern.find("]", i + 1)) > i:
+            char_class = pattern[i + 1 : end]
+            if char_class.startswith("!"):
+                char_class = f"^{char_class[1:]}"
+            regex += f"[{char_class}]"
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+
+    return regex
+
+
+class _IgnoreRule:
+    def __init__(self: Self, pattern: str) -> None:
+        self.negated = pattern.startswith("!")
+        pattern = pattern.removeprefix("!")
+        self.directory_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # Patterns containing a slash are relative to the ignore file
+        # directory, others match at any depth
+        anchored = "/" in pattern
+        regex = _glob_to_regex(pattern.lstrip("/"))
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+        self.regex = re.compile(regex, re.DOTALL)
+
+    def matches(self: Self, path: str, is_directory: bool) -> bool:
+        if self.directory_only and not is_directory:
+            return False
+        return bool(self.regex.fullmatch(path))
+
+
+class IgnoreRules:
+    """Ignore rules read from `.gitignore` and `.helmignore` files.
+
+    Rules are scoped to the directory of the file they are read from, and rules
+    from nested directories take precedence over rules from their parents.
+    """
+
+    def __init__(
+        self: Self,
+        directory: Path,
+        lines: Iterable[str],
+        parent: IgnoreRules | None = None,
+    ) -> None:
+        """Initialize the rules.
+
+        Args:
+            directory (Path): Directory the rules are scoped to.
+            lines (Iterable[str]): Lines of the ignore files.
+            parent (IgnoreRules | None, optional): Rules of the parent
+                directories.
+        """
+        self.directory = directory
+        self.parent = parent
+        self.rules = [
+            _IgnoreRule(line)
+            for raw_line in lines
+            if (line := raw_line.rstrip("\n").rstrip())
+            and not line.startswith("#")
+        ]
+
+    @classmethod
+    def from_directory(
+        cls: type[Self],
+        directory: Path,
+        parent: IgnoreRules | None = None,
+        names: Iterable[str] | None = None,
+    ) -> IgnoreRules | None:
+        """Read the ignore files of a directory.
+
+        Args:
+            directory (Path): Directory to read ignore files from.
+            parent (IgnoreRules | None, optional): Rules of the parent
+                directories.
+            names (Iterable[str] | None, optional): Names of the files in the
+                directory, if already known, to avoid useless lookups.
+
+        Returns:
+            IgnoreRules | None: The rules of the directory, or the parent rules
+            if the directory has no ignore files.
+        """
+        lines: list[str] = []
+        for ignore_file in _IGNORE_FILES:
+            if names is not None and ignore_file not in names:
+                continue
+            try:
+                lines.extend(
+                    Path(directory, ignore_file)
+                    .read_text(encoding="utf-8", errors="replace")
+                    .splitlines()
+                )
+            except FileNotFoundError:
+                continue
+            except OSError as ex:
+                logger.warning("Unable to read %s: %s", ignore_file, ex)
+
+        return cls(directory, lines, parent) if lines else parent
+
+    def ignored(self: Self, path: Path, is_directory: bool) -> bool:
+        """Check whether a path is ignored.
+
+        Args:
+            path (Path): Path to check, below the rules directory.
+            is_directory (bool): Whether the path is a directory.
+
+        Returns:
+            bool: `True` if the path is ignored.
+        """
+        result = (
+            self.parent.ignored(path, is_directory) if self.parent else False
+        )
+        relative_path = path.relative_to(self.directory).as_posix()
+        for rule in self.rules:
+            if rule.matches(relative_path, is_directory):
+                result = not rule.negated
+
+        return result
+
+
+def find_charts(root: Path) -> list[Path]:
+    """Find all Helm charts below a directory.
+
+    The directory tree is walked once, honoring `.gitignore` and `.helmignore`
+    files, and skipping subcharts vendored in the `charts/` directory of the
+    charts found.
+
+    Args:
+        root (Path): Directory to search charts from.
+
+    Returns:
+        list[Path]: The sorted chart directories.
+    """
+    charts = []
+    stack: list[tuple[Path, IgnoreRules | None]] = [(root, None)]
+
+    while stack:
+        directory, parent_rules = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError as ex:
+            logger.warning("Unable to read directory %s: %s", directory, ex)
+            continue
+
+        names = {e.name for e in entries}
+        rules = IgnoreRules.from_directory(directory, parent_rules, names)
+
+        is_chart = any(e.name == "Chart.yaml" and e.is_file() for e in entries)
+        if is_chart:
+            charts.append(directory)
+
+        for entry in entries:
+            if (
+                not entry.is_dir(follow_symlinks=False)
+                or entry.name in _SKIPPED_DIRECTORIES
+                or (is_chart and entry.name == _SUBCHARTS_DIRECTORY)
+            ):
+                continue
+            path = Path(entry.path)
+            if rules and rules.ignored(path, is_directory=True):
+                continue
+            stack.append((path, rules))
+
+    return sorted(charts)
+
+
+def read_paths(file: BufferedIOBase) -> Iterator[Path]:
+    """Read a list of paths, yielding each path as soon as it is read.
+
+    Paths are separated by NUL characters if the first separator read is a
+    NUL character, or by newlines otherwise. Empty entries are ignored.
+
+    Args:
+        file (BufferedIOBase): File to read paths from, e.g. stdin.
+
+    Yields:
+        Path: The paths read.
+    """
+    separator = None
+    pending = b""
+
+    while chunk := file.read1(_READ_CHUNK_SIZE):
+        pending += chunk
+        # Chunks may end in the middle of the first entry: the separator is
+        # only known once a NUL character or a newline is read
+        if separator is None and not (separator := _find_separator(pending)):
+            continue
+        *entries, pending = pending.split(separator)
+        yield from _decode_paths(entries, separator)
+
+    yield from _decode_paths([pending], separator)
+
+
+# Return the separator of a list of paths, the first NUL character or newline
+# read, or `None` if none was read yet
+def _find_separator(data: bytes) -> bytes | None:
+    match = re.search(rb"[\0\n]", data)
+    return match[0] if match else None
+
+
+# Decode entries of a list of paths, skipping empty ones
+def _decode_paths(
+    entries: Iterable[bytes], separator: bytes | None
+) -> Iterator[Path]:
+    for entry in entries:
+        path = entry.rstrip(b"\r") if separator == b"\n" else entry
+        if path:
+            yield Path(os.fsdecode(path))
@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Equivalence classes of values files of a Helm chart.
+
+The templates of a chart are statically analyzed to find the values which may
+change the structure of the rendered manifests: values used by control
+structures (`if`, `with`, `range`), assigned to variables, or passed to
+functions rendering structured data or other templates (`toYaml`, `include`,
+`tpl`...). All other values are only substituted as scalars.
+
+Values files are equivalent if they agree on the values changing the
+structure of the manifests, and on the types of all scalar values: their
+rendered manifests only differ by scalar values of the same types, so that
+validating one of them is enough to validate the structure of the others.
+This is a heuristic: e.g. a string value substituted in a template as a YAML
+block would go unnoticed.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import typing
+from typing import Any
+
+from helm_kubeconform.schema import ValuesError
+from helm_kubeconform.schema import merge_values
+from helm_kubeconform.split import has_subcharts
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+    from collections.abc import Sequence
+
+logger = logging.getLogger(__name__)
+
+_ACTION_REGEX = re.compile(r"\{\{-?(.*?)-?\}\}", re.DOTALL)
+# Actions whose values may change the structure of the rendered manifests
+_STRUCTURAL_ACTION_REGEX = re.compile(
+    r"""
+    ^\s*(?:if|else\s+if|else\s+with|with|range)\b
+    | :?=
+    | \b(?:fail|fromJson|fromJsonArray|fromYaml|fromYamlArray|include|kindIs
+        |required|template|toJson|toPrettyJson|toRawJson|toToml|toYaml|tpl
+        |typeIs|typeOf)\b
+    """,
+    re.VERBOSE,
+)
+# `.Values` references, `$.Values` and `$root.Values` included
+_VALUES_PATH_REGEX = re.compile(r"\.Values((?:\.\w+)*)")
+
+
+def find_structural_paths(chart_dir: Path) -> set[tuple[str, ...]] | None:
+    """Find the values paths which may change the structure of manifests.
+
+    Args:
+        chart_dir (Path): Chart directory.
+
+    Returns:
+        set[tuple[str, ...]] | None: The values paths, or `None` if the chart
+        cannot be analyzed (missing templates, subcharts...). The empty path
+        stands for all values.
+    """
+    templates_dir = chart_dir / "templates"
+    if not templates_dir.is_dir() or has_subcharts(chart_dir):
+        return None
+
+    paths: set[tuple[str, ...]] = set()
+    for directory, _, files in os.walk(templates_dir):
+        for file in files:
+            content = Path(directory, file).read_text(
+                encoding="utf-8", errors="replace"
+            )
+            for action in _ACTION_REGEX.finditer(content):
+                if action[1].lstrip().startswith("/*"):
+                    continue
+                if _STRUCTURAL_ACTION_REGEX.search(action[1]):
+                    paths.update(
+                        tuple(filter(None, m[1].split(".")))
+                        for m in _VALUES_PATH_REGEX.finditer(action[1])
+                    )
+
+    return paths
+
+
+# Yield the path and type name of each scalar of a values tree. List items are
+# identified by their index
+def _iter_scalar_types(
+    values: Any,  # noqa: ANN401
+    path: tuple[str, ...] = (),
+) -> Iterator[tuple[tuple[str, ...], str]]:
+    if isinstance(values, dict):
+        if not values:
+            yield path, "dict"
+        for key, value in values.items():
+            yield from _iter_scalar_types(value, (*path, str(key)))
+    elif isinstance(values, list):
+        if not values:
+            yield path, "list"
+        for index, value in enumerate(values):
+            yield from _iter_scalar_types(value, (*path, str(index)))
+    else:
+        yield path, type(values).__name__
+
+
+# Return the value at a path of a values tree, or `None` if missing
+def _get_value(values: Any, path: tuple[str, ...]) -> Any:  # noqa: ANN401
+    for key in path:
+        if not isinstance(values, dict) or key not in values:
+            return None
+        values = values[key]
+
+    return values
+
+
+def get_equivalence_key(
+    values: Any,  # noqa: ANN401
+    structural_paths: set[tuple[str, ...]],
+) -> str:
+    """Compute a key identifying the equivalence class of merged values.
+
+    Args:
+        values (Any): Merged values.
+        structural_paths (set[tuple[str, ...]]): Values paths which may
+            change the structure of manifests.
+
+    Returns:
+        str: The key, equal for equivalent values.
+    """
+    return json.dumps(
+        [
+            sorted(_iter_scalar_types(values)),
+            [
+                [path, _get_value(values, path)]
+                for path in sorted(structural_paths)
+            ],
+        ],
+        sort_keys=True,
+        default=str,
+    )
+
+
+def group_values_files(
+    chart_dir: Path,
+    values_files: Sequence[Path],
+    extra_values_files: Sequence[Path] = (),
+) -> list[list[Path]]:
+    """Group values files of a chart into equivalence classes.
+
+    Args:
+        chart_dir (Path): Chart directory.
+        values_files (Sequence[Path]): Values files to group.
+        extra_values_files (Sequence[Path], optional): Values files merged
+            before each of the values files to group.
+
+    Returns:
+        list[list[Path]]: The equivalence classes, in the order of their
+        first values file. Values files are each put in their own class if
+        the chart cannot be analyzed, as well as values files which cannot be
+        loaded.
+    """
+    structural_paths = find_structural_paths(chart_dir)
+    if structural_paths is None:
+        logger.debug("Unable to analyze chart %s templates", chart_dir)
+        return [[f] for f in values_files]
+
+    classes: dict[str, list[Path]] = defaultdict(list)
+    for values_file in values_files:
+        try:
+            values = merge_values(chart_dir, *extra_values_files, values_file)
+            key = get_equivalence_key(values, structural_paths)
+        except ValuesError:
+            # Left to the full validation to report the error
+            key = str(values_file)
+        classes[key].append(values_file)
+
+    return list(classes.values())
@@ -0,0 +1,244 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Persistent index of file fingerprints for the helm-kubeconform plugin.
+
+Hashing the content of every chart on every run reads every file of a
+repository. The digests of files are instead recorded in an SQLite database,
+along with their fingerprint: their size, modification time in nanoseconds and
+inode. A file whose fingerprint did not change since it was last hashed is not
+read again, so that finding the charts changed since the last run costs a
+`stat()` call and an indexed lookup per file.
+
+The digests of validation targets are also recorded as snapshots, telling
+whether a chart or values file changed since it was last validated.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+import typing
+
+from helm_kubeconform.cache import file_digest
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+# Bump when the database schema changes incompatibly
+_INDEX_VERSION = 1
+# Entries not used for this number of seconds are forgotten
+_INDEX_MAX_AGE = 30 * 24 * 3600
+# Use times of entries are only refreshed once in this number of seconds, so
+# that unchanged files cause no write
+_LAST_USE_RESOLUTION = 24 * 3600
+# Files modified this number of nanoseconds or less before being hashed may
+# be modified again without any change of their modification time, depending
+# on the timestamp resolution of the filesystem: their digest is not recorded
+_RACY_INTERVAL = 2 * 10**9
+# Seconds to wait for other processes writing to the database
+_TIMEOUT = 10.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    last_use INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    key TEXT PRIMARY KEY,
+    digest BLOB NOT NULL,
+    last_use INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class FingerprintIndex:
+    """Index of file digests, reused while file fingerprints are unchanged.
+
+    Updates are kept in memory until saved. An index which cannot be read or
+    written is logged and ignored: files are then hashed every time.
+    """
+
+    def __init__(self: Self, path: Path | None = None) -> None:
+        """Open an index.
+
+        Args:
+            path (Path | None, optional): Database file, created if missing.
+                The index is only kept in memory if not set.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._files: dict[str, tuple[int, int, int, bytes]] = {}
+        self._snapshots: dict[str, bytes] = {}
+        # Files whose use time must be refreshed
+        self._used_files: set[str] = set()
+
+        if path:
+            try:
+                self._connection = self._connect(path)
+            except (OSError, sqlite3.Error) as ex:
+                logger.warning(
+                    "Unable to open fingerprint index %s: %s", path, ex
+                )
+
+    # Connect to the database, creating or resetting its schema if needed
+    @staticmethod
+    def _connect(path: Path) -> sqlite3.Connection:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            path, timeout=_TIMEOUT, check_same_thread=False
+        )
+        try:
+            (version,) = connection.execute("PRAGMA user_version").fetchone()
+            if version != _INDEX_VERSION:
+                connection.executescript(
+                    "DROP TABLE IF EXISTS files;"
+                    "DROP TABLE IF EXISTS snapshots;"
+                    f"{_SCHEMA}PRAGMA user_version = {_INDEX_VERSION};"
+                )
+        except sqlite3.Error:
+            connection.close()
+            raise
+
+        return connection
+
+    # Run a query against the database, if any, and return its first row
+    def _fetch(
+        self: Self, query: str, *parameters: object
+    ) -> tuple[typing.Any, ...] | None:
+        if not self._connection:
+            return None
+
+        try:
+            return typing.cast(
+                "tuple[typing.Any, ...] | None",
+                self._connection.execute(query, parameters).fetchone(),
+            )
+        except sqlite3.Error as ex:
+            logger.warning(
+                "Unable to read fingerprint index %s: %s", self.path, ex
+            )
+            return None
+
+    def file_digest(self: Self, path: Path) -> str:
+        """Return the digest of a file, only hashing it if changed.
+
+        Args:
+            path (Path): Path to a file.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest of the file content.
+        """
+        stat = path.stat()
+        fingerprint = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        key = str(path.resolve())
+
+        with self._lock:
+            if (entry := self._files.get(key)) and entry[:3] == fingerprint:
+                return entry[3].hex()
+            row = self._fetch(
+                "SELECT size, mtime_ns, inode, digest, last_use FROM files "
+                "WHERE path = ?",
+                key,
+            )
+            if row and tuple(row[:3]) == fingerprint:
+                if row[4] < time.time() - _LAST_USE_RESOLUTION:
+                    self._used_files.add(key)
+                return bytes(row[3]).hex()
+
+        digest = file_digest(path)
+        if stat.st_mtime_ns < time.time_ns() - _RACY_INTERVAL:
+            with self._lock:
+                self._files[key] = (*fingerprint, bytes.fromhex(digest))
+
+        return digest
+
+    def changed(self: Self, key: str, digest: str) -> bool:
+        """Tell whether a target changed since its last recorded snapshot.
+
+        Args:
+            key (str): Target key.
+            digest (str): Current digest of the target.
+
+        Returns:
+            bool: `True` if the digest differs from the recorded one, or if
+            none is recorded.
+        """
+        with self._lock:
+            recorded = self._snapshots.get(key)
+            if recorded is None and (
+                row := self._fetch(
+                    "SELECT digest FROM snapshots WHERE key = ?", key
+                )
+            ):
+                recorded = bytes(row[0])
+
+        return recorded != bytes.fromhex(digest)
+
+    def record(self: Self, key: str, digest: str) -> None:
+        """Record the snapshot of a target.
+
+        Args:
+            key (str): Target key.
+            digest (str): Digest of the target.
+        """
+        with self._lock:
+            self._snapshots[key] = bytes.fromhex(digest)
+
+    def save(self: Self) -> None:
+        """Write updates to the database, and forget unused entries."""
+        if not self._connection:
+            return
+
+        now = int(time.time())
+        with self._lock:
+            try:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO files "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        ((k, *v, now) for k, v in self._files.items()),
+                    )
+                    self._connection.executemany(
+                        "UPDATE files SET last_use = ? WHERE path = ?",
+                        ((now, k) for k in self._used_files),
+                    )
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                        ((k, v, now) for k, v in self._snapshots.items()),
+                    )
+                    self._connection.execute(
+                        "DELETE FROM files WHERE last_use < ?",
+                        (now - _INDEX_MAX_AGE,),
+                    )
+                    self._connection.execute(
+                        "DELETE FROM snapshots WHERE last_use < ?",
+                        (now - _INDEX_MAX_AGE,),
+                    )
+            except sqlite3.Error as ex:
+                logger.warning(
+                    "Unable to write fingerprint index %s: %s", self.path, ex
+                )
+                return
+
+            self._files.clear()
+            self._used_files.clear()
+            self._snapshots.clear()
+
+    def close(self: Self) -> None:
+        """Save updates, and close the database."""
+        self.save()
+        if self._connection:
+            self._connection.close()
+            self._connection = None
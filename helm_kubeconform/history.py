@@ -0,0 +1,329 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Persistent run history of the helm-kubeconform plugin."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import fields
+import json
+import logging
+import statistics
+import time
+import typing
+from typing import Any
+
+from helm_kubeconform.cache import write_atomically
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+# Bump when the history file format changes incompatibly
+_HISTORY_VERSION = 1
+# Targets not validated for this number of seconds are forgotten
+_HISTORY_MAX_AGE = 30 * 24 * 3600
+# Weight of the last measure in averaged durations
+_SMOOTHING_FACTOR = 0.5
+# Cost of targets when no history is available at all
+_DEFAULT_COST = 1.0
+
+
+@dataclass
+class TargetHistory:
+    """History of a validation target.
+
+    Attributes:
+        duration (float | None): Average validation duration in seconds.
+        failed (bool): Whether the last validation failed.
+        last_run (float): Time of the last validation, in seconds since the
+            epoch.
+        output_size (int | None): Size in bytes of the last rendered output,
+            if known.
+        max_rss (int | None): Maximum resident set size in bytes of the
+            subprocesses of the last validation, if known.
+    """
+
+    duration: float | None = None
+    failed: bool = False
+    last_run: float = 0.0
+    output_size: int | None = None
+    max_rss: int | None = None
+
+    @classmethod
+    def from_dict(cls: type[Self], data: dict[str, Any]) -> Self:
+        """Build a target history from its serialized form.
+
+        Args:
+            data (dict[str, Any]): Serialized target history. Unknown keys
+                are ignored.
+
+        Returns:
+            TargetHistory: The target history.
+        """
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+# Average a new duration into a history entry
+def _update(entry: TargetHistory, duration: float) -> None:
+    entry.duration = (
+        duration
+        if entry.duration is None
+        else _SMOOTHING_FACTOR * duration
+        + (1 - _SMOOTHING_FACTOR) * entry.duration
+    )
+    entry.last_run = time.time()
+
+
+class History:
+    """Run history, persisted in a JSON file.
+
+    Several processes may share the same history file: entries updated by a
+    process are merged into the file content when saving.
+
+    Besides validation targets, the history keeps track of the rendering of
+    individual chart templates, used to balance split renders.
+    """
+
+    def __init__(self: Self, path: Path | None = None) -> None:
+        """Initialize an empty history.
+
+        Args:
+            path (Path | None, optional): File the history is saved to. The
+                history is not persisted if `None`.
+        """
+        self.path = path
+        self.targets: dict[str, TargetHistory] = {}
+        self.templates: dict[str, TargetHistory] = {}
+        self._updated: set[str] = set()
+        self._updated_templates: set[str] = set()
+
+    @classmethod
+    def load(cls: type[Self], path: Path | None) -> Self:
+        """Load the history from a file.
+
+        Args:
+            path (Path | None): History file. A missing or invalid file results
+                in an empty history.
+
+        Returns:
+            History: The history.
+        """
+        history = cls(path)
+        if path:
+            history.targets, history.templates = cls._read(path)
+
+        return history
+
+    # Return the target and template entries of a history file
+    @staticmethod
+    def _read(
+        path: Path,
+    ) -> tuple[dict[str, TargetHistory], dict[str, TargetHistory]]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}, {}
+        except (OSError, ValueError) as ex:
+            logger.warning("Unable to read history file %s: %s", path, ex)
+            return {}, {}
+
+        if not isinstance(data, dict) or data.get("version") != (
+            _HISTORY_VERSION
+        ):
+            return {}, {}
+
+        targets, templates = (
+            {
+                key: TargetHistory.from_dict(value)
+                for key, value in data.get(section, {}).items()
+            }
+            for section in ("targets", "templates")
+        )
+
+        return targets, templates
+
+    def get(self: Self, key: str) -> TargetHistory | None:
+        """Return the history of a target.
+
+        Args:
+            key (str): Target key.
+
+        Returns:
+            TargetHistory | None: The target history, or `None` if the target
+            was never validated.
+        """
+        return self.targets.get(key)
+
+    def record(
+        self: Self,
+        key: str,
+        duration: float,
+        failed: bool,
+        output_size: int | None = None,
+        max_rss: int | None = None,
+    ) -> TargetHistory:
+        """Record the validation of a target.
+
+        Args:
+            key (str): Target key.
+            duration (float): Validation duration in seconds.
+            failed (bool): Whether the validation failed.
+            output_size (int | None, optional): Size in bytes of the rendered
+                output, kept from previous validations if `None`.
+            max_rss (int | None, optional): Maximum resident set size in
+                bytes of the subprocesses, kept from previous validations if
+                `None`.
+
+        Returns:
+            TargetHistory: The updated target history.
+        """
+        target = self.targets.setdefault(key, TargetHistory())
+        _update(target, duration)
+        target.failed = failed
+        if output_size is not None:
+            target.output_size = output_size
+        if max_rss is not None:
+            target.max_rss = max_rss
+        self._updated.add(key)
+
+        return target
+
+    def get_template(self: Self, key: str) -> TargetHistory | None:
+        """Return the rendering history of a chart template.
+
+        Args:
+            key (str): Template key.
+
+        Returns:
+            TargetHistory | None: The template history, or `None` if the
+            template was never rendered on its own.
+        """
+        return self.templates.get(key)
+
+    def record_template(
+        self: Self, key: str, duration: float, output_size: int
+    ) -> TargetHistory:
+        """Record the rendering of a chart template.
+
+        Args:
+            key (str): Template key.
+            duration (float): Estimated rendering duration in seconds.
+            output_size (int): Size in bytes of the rendered template.
+
+        Returns:
+            TargetHistory: The updated template history.
+        """
+        template = self.templates.setdefault(key, TargetHistory())
+        _update(template, duration)
+        template.output_size = output_size
+        self._updated_templates.add(key)
+
+        return template
+
+    def costs(self: Self, keys: Iterable[str]) -> dict[str, float]:
+        """Estimate the validation cost of targets.
+
+        Args:
+            keys (Iterable[str]): Target keys.
+
+        Returns:
+            dict[str, float]: The average duration of each target. Targets
+            without history are given the median duration of all known
+            targets.
+        """
+        durations = [
+            t.duration for t in self.targets.values() if t.duration is not None
+        ]
+        default = statistics.median(durations) if durations else _DEFAULT_COST
+
+        costs = {}
+        for key in keys:
+            target = self.targets.get(key)
+            costs[key] = (
+                target.duration
+                if target and target.duration is not None
+                else default
+            )
+
+        return costs
+
+    def estimate_memory(self: Self, key: str) -> float:
+        """Estimate the peak memory usage of the validation of a target.
+
+        Args:
+            key (str): Target key.
+
+        Returns:
+            float: The maximum RSS in bytes of the last validation of the
+            target if known. Otherwise, the maximum RSS of the known target
+            with the closest output size, scaled up to the output size of the
+            target if larger, or the median maximum RSS of all known targets
+            if the output size of the target is unknown (0 without any known
+            target).
+        """
+        target = self.targets.get(key)
+        if target and target.max_rss is not None:
+            return float(target.max_rss)
+
+        known = [
+            t
+            for t in self.targets.values()
+            if t.max_rss is not None and t.output_size
+        ]
+        if not known:
+            return 0.0
+
+        if not target or not target.output_size:
+            return float(statistics.median(t.max_rss or 0 for t in known))
+
+        output_size = target.output_size
+        closest = min(
+            known, key=lambda t: abs((t.output_size or 0) - output_size)
+        )
+        return (closest.max_rss or 0) * max(
+            1.0, output_size / (closest.output_size or 1)
+        )
+
+    def save(self: Self) -> None:
+        """Save the history, if any target or template was updated."""
+        if not self.path or not (self._updated or self._updated_templates):
+            return
+
+        # Merge entries updated by other processes in the meantime
+        targets, templates = self._read(self.path)
+        targets.update({k: self.targets[k] for k in self._updated})
+        templates.update(
+            {k: self.templates[k] for k in self._updated_templates}
+        )
+        expiration = time.time() - _HISTORY_MAX_AGE
+        data: dict[str, Any] = {"version": _HISTORY_VERSION}
+        for section, entries in (
+            ("targets", targets),
+            ("templates", templates),
+        ):
+            data[section] = {
+                k: asdict(v)
+                for k, v in sorted(entries.items())
+                if v.last_run >= expiration
+            }
+
+        try:
+            write_atomically(self.path, json.dumps(data, indent=1).encode())
+        except OSError as ex:
+            logger.warning(
+                "Unable to write history file %s: %s", self.path, ex
+            )
+            return
+
+        self.targets = targets
+        self.templates = templates
+        self._updated.clear()
+        self._updated_templates.clear()
@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Reading of pre-rendered Kubernetes manifests.
+
+Manifests rendered beforehand (e.g. by `helm template --output-dir`) can be
+validated without rendering charts again. They are read as a stream of YAML
+documents, so that they can be passed to Kubeconform as they are read.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+import tarfile
+import typing
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+
+# Source name for manifests read from stdin
+STDIN = "-"
+
+# Extensions of manifest files in directories and tarballs
+_MANIFEST_SUFFIXES = {".json", ".yaml", ".yml"}
+# Size of the chunks read from stdin
+_CHUNK_SIZE = 64 * 1024
+
+
+class ManifestsError(Exception):
+    """Raised when manifests cannot be read."""
+
+
+# Wrap the content of a manifest file as standalone YAML documents
+def _as_documents(content: bytes) -> bytes:
+    if content and not content.endswith(b"\n"):
+        content += b"\n"
+    return b"---\n" + content
+
+
+# Yield the content of the manifest files of a directory tree, in path order
+def _read_directory(directory: Path) -> Iterator[bytes]:
+    for parent, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
+            path = Path(parent, file)
+            if path.suffix in _MANIFEST_SUFFIXES:
+                yield _as_documents(path.read_bytes())
+
+
+# Yield the content of the manifest files of a tarball, in archive order
+def _read_tarball(path: Path) -> Iterator[bytes]:
+    # Stream mode, so that members are not all loaded at once
+    with tarfile.open(path, mode="r|*") as tar:
+        for member in tar:
+            if not member.isfile() or (
+                Path(member.name).suffix not in _MANIFEST_SUFFIXES
+            ):
+                continue
+            if file := tar.extractfile(member):
+                yield _as_documents(file.read())
+
+
+def read_manifests(source: str) -> Iterator[bytes]:
+    """Read pre-rendered manifests.
+
+    Args:
+        source (str): `-` for manifests read from stdin, a directory
+            containing manifest files (e.g. created by `helm template
+            --output-dir`), or a tarball of such a directory.
+
+    Yields:
+        bytes: Successive chunks of the YAML manifests stream.
+
+    Raises:
+        ManifestsError: If manifests cannot be read.
+    """
+    try:
+        if source == STDIN:
+            while chunk := sys.stdin.buffer.read(_CHUNK_SIZE):
+                yield chunk
+            return
+
+        path = Path(source)
+        if path.is_dir():
+            yield from _read_directory(path)
+        else:
+            yield from _read_tarball(path)
+    except (OSError, tarfile.TarError) as ex:
+        raise ManifestsError(str(ex)) from ex
@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Validation matrix of the charts and values files affected by changes.
+
+Changed files are split into chart files and values files. A changed chart is
+validated with its default values, and against each values file stored in its
+directory (e.g. `ci/*-values.yaml`), since a change of its templates may break
+any of them. A changed values file is validated against its chart: the chart
+it is stored in, or else the charts named after the file (`my-app.yaml`,
+`values-my-app.yaml`) or after one of its parent directories, for values files
+matching the usual naming patterns.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+import re
+import typing
+
+from helm_kubeconform.discovery import find_charts
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+    from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Chart directories whose files are never values files
+_NON_VALUES_DIRECTORIES = {"charts", "crds", "templates"}
+# Chart files which are never values files, although named like them
+_NON_VALUES_FILES = {"values.yaml", "values.yml", "values.schema.json"}
+_VALUES_SUFFIXES = {".json", ".yaml", ".yml"}
+# `values` affix of values file names, e.g. `values-prod.yaml`,
+# `prod-values.yaml` or `prod.values.yaml`
+_VALUES_AFFIX_REGEX = re.compile(r"^values[-_.]|[-_.]values$|^values$")
+_CHART_NAME_REGEX = re.compile(r"^name:\s*['\"]?([^'\"\s#]+)", re.MULTILINE)
+
+# A chart and an optional values file to validate it against
+MatrixEntry = tuple[Path, "Path | None"]
+
+
+# Return whether a file of a chart is a values file for this chart
+def _is_chart_values_file(chart_dir: Path, path: Path) -> bool:
+    relative_path = path.relative_to(chart_dir)
+    return (
+        path.suffix in _VALUES_SUFFIXES
+        and len(relative_path.parts) > 0
+        and relative_path.parts[0] not in _NON_VALUES_DIRECTORIES
+        and relative_path.as_posix() not in _NON_VALUES_FILES
+        and "values" in path.name
+    )
+
+
+def find_chart_values_files(chart_dir: Path) -> list[Path]:
+    """Find the values files stored in a chart directory.
+
+    Args:
+        chart_dir (Path): Chart directory.
+
+    Returns:
+        list[Path]: The sorted values files, besides the default values file
+        of the chart, e.g. `ci/prod-values.yaml` or `values-prod.yaml`.
+    """
+    values_files: list[Path] = []
+    for directory, dirs, files in os.walk(chart_dir):
+        if Path(directory) == chart_dir:
+            dirs[:] = [d for d in dirs if d not in _NON_VALUES_DIRECTORIES]
+        values_files.extend(
+            path
+            for path in (Path(directory, f) for f in files)
+            if _is_chart_values_file(chart_dir, path)
+        )
+
+    return sorted(values_files)
+
+
+# Return the names a chart can be referred to by: its directory name, and the
+# name declared in its Chart.yaml file
+def _get_chart_names(chart_dir: Path) -> set[str]:
+    names = {chart_dir.resolve().name}
+    try:
+        content = (chart_dir / "Chart.yaml").read_text(encoding="utf-8")
+    except OSError:
+        return names
+    if match := _CHART_NAME_REGEX.search(content):
+        names.add(match[1])
+
+    return names
+
+
+class _ChartIndex:
+    # Charts of a repository indexed by name, only searched when needed
+    def __init__(self: _ChartIndex, root: Path) -> None:
+        self.root = root
+        self._charts: dict[str, list[Path]] | None = None
+
+    def get(self: _ChartIndex, name: str) -> list[Path]:
+        if self._charts is None:
+            self._charts = {}
+            for chart_dir in find_charts(self.root):
+                for chart_name in _get_chart_names(chart_dir):
+                    self._charts.setdefault(chart_name, []).append(chart_dir)
+
+        return self._charts.get(name, [])
+
+
+# Return the charts a values file stored outside of any chart belongs to
+def _get_values_file_charts(path: Path, charts: _ChartIndex) -> list[Path]:
+    if path.suffix not in _VALUES_SUFFIXES:
+        return []
+
+    name = _VALUES_AFFIX_REGEX.sub("", path.stem)
+    if name and (chart_dirs := charts.get(name)):
+        return chart_dirs
+    # Directories are only considered for files named like values files, so
+    # that other YAML files of a chart-named directory are not mistaken for
+    # values files
+    if name != path.stem:
+        root = charts.root.resolve()
+        for parent in path.resolve().parents:
+            if parent == root or root not in parent.parents:
+                break
+            if chart_dirs := charts.get(parent.name):
+                return chart_dirs
+
+    return []
+
+
+def build_matrix(
+    files: Iterable[Path],
+    chart_directory: Callable[[Path], Path | None],
+    root: Path,
+) -> list[MatrixEntry]:
+    """Build the validation matrix of changed files.
+
+    Args:
+        files (Iterable[Path]): Changed files.
+        chart_directory (Callable[[Path], Path | None]): Function returning
+            the directory of the chart a file belongs to, if any.
+        root (Path): Root directory of the repository, searched for charts
+            named after the values files stored outside of any chart.
+
+    Returns:
+        list[MatrixEntry]: The charts and values files to validate them
+        against (`None` for default values), without duplicates, in the
+        order of the changed files.
+    """
+    matrix: dict[MatrixEntry, None] = {}
+    charts = _ChartIndex(root)
+
+    for path in files:
+        if chart_dir := chart_directory(path):
+            if _is_chart_values_file(chart_dir, path):
+                matrix[chart_dir, path] = None
+                continue
+            matrix[chart_dir, None] = None
+            for values_file in find_chart_values_files(chart_dir):
+                matrix[chart_dir, values_file] = None
+        elif chart_dirs := _get_values_file_charts(path, charts):
+            for chart_dir in chart_dirs:
+                matrix[chart_dir, path] = None
+        else:
+            logger.debug("Ignoring %s, not related to any chart", path)
+
+    return list(matrix)
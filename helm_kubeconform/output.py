@@ -0,0 +1,200 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Ordered output of concurrent validations.
+
+Each validation running in parallel writes its Kubeconform output to its own
+job output, so that outputs are never interleaved. Jobs are ordered by
+creation: the output of the first unfinished job is written to the stream as
+it comes, while the outputs of the following jobs are buffered, in memory then
+in a temporary file past a size threshold. Once a job completes, the buffered
+outputs of the following jobs are written in order, up to the next unfinished
+job, which then becomes the one written as it comes.
+"""
+
+from __future__ import annotations
+
+import codecs
+from collections import deque
+import tempfile
+import threading
+import typing
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from types import TracebackType
+    from typing import TextIO
+
+    from typing_extensions import Self
+
+# Size from which buffered outputs are spooled to a temporary file
+SPOOL_THRESHOLD = 1 << 20
+
+_COPY_BUFFER_SIZE = 1 << 16
+
+
+class JobOutput:
+    """Output of a job, written to the stream of its multiplexer in order.
+
+    Attributes:
+        done (bool): Whether the job completed.
+    """
+
+    def __init__(
+        self: Self, multiplexer: OutputMultiplexer, threshold: int
+    ) -> None:
+        """Create the output of a job.
+
+        Args:
+            multiplexer (OutputMultiplexer): Multiplexer of the job.
+            threshold (int): Size from which buffered output is spooled to a
+                temporary file.
+        """
+        self.done = False
+        self._multiplexer = multiplexer
+        # Closed once drained
+        self._spool = tempfile.SpooledTemporaryFile(  # noqa: SIM115
+            max_size=threshold
+        )
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    def write(self: Self, data: bytes) -> None:
+        """Write output of the job.
+
+        Args:
+            data (bytes): Output.
+        """
+        self._multiplexer.write(self, data)
+
+    def close(self: Self) -> None:
+        """Mark the job as completed."""
+        self._multiplexer.complete(self)
+
+    def buffer(self: Self, data: bytes) -> None:
+        """Buffer output until the job is the first unfinished one.
+
+        Args:
+            data (bytes): Output.
+        """
+        self._spool.write(data)
+
+    def decode(self: Self, data: bytes, final: bool = False) -> str:
+        """Decode output, split at any byte.
+
+        Args:
+            data (bytes): Output.
+            final (bool, optional): Whether this is the last output of the
+                job.
+
+        Returns:
+            str: The decoded output.
+        """
+        return self._decoder.decode(data, final)
+
+    def drain(self: Self, stream: TextIO) -> None:
+        """Write the buffered output to a stream, and release it.
+
+        Args:
+            stream (TextIO): Stream.
+        """
+        if self._spool.closed:
+            return
+
+        self._spool.seek(0)
+        while data := self._spool.read(_COPY_BUFFER_SIZE):
+            stream.write(self.decode(data))
+        self._spool.close()
+
+
+class OutputMultiplexer:
+    """Multiplexer writing the outputs of concurrent jobs in job order."""
+
+    def __init__(
+        self: Self, stream: TextIO, threshold: int = SPOOL_THRESHOLD
+    ) -> None:
+        """Create a multiplexer.
+
+        Args:
+            stream (TextIO): Stream the outputs are written to.
+            threshold (int, optional): Size from which the output of a job is
+                spooled to a temporary file while buffered.
+        """
+        self.stream = stream
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # Unfinished jobs, and completed jobs following them, in order
+        self._jobs: deque[JobOutput] = deque()
+
+    def __enter__(self: Self) -> Self:
+        """Enter the runtime context of the multiplexer.
+
+        Returns:
+            OutputMultiplexer: The multiplexer.
+        """
+        return self
+
+    def __exit__(
+        self: Self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Write the outputs of all jobs, completed or not.
+
+        Args:
+            exc_type (type[BaseException] | None): Exception type, if any.
+            exc_value (BaseException | None): Exception, if any.
+            traceback (TracebackType | None): Exception traceback, if any.
+        """
+        self.close()
+
+    def job(self: Self) -> JobOutput:
+        """Create the output of a new job, following all existing jobs.
+
+        Returns:
+            JobOutput: The output of the job.
+        """
+        job = JobOutput(self, self.threshold)
+        with self._lock:
+            self._jobs.append(job)
+
+        return job
+
+    def write(self: Self, job: JobOutput, data: bytes) -> None:
+        """Write output of a job, or buffer it until previous jobs complete.
+
+        Args:
+            job (JobOutput): Job.
+            data (bytes): Output.
+        """
+        with self._lock:
+            if self._jobs and self._jobs[0] is job:
+                self.stream.write(job.decode(data))
+                self.stream.flush()
+            else:
+                job.buffer(data)
+
+    def complete(self: Self, job: JobOutput) -> None:
+        """Mark a job as completed, and write the outputs that can be.
+
+        Args:
+            job (JobOutput): Job.
+        """
+        with self._lock:
+            job.done = True
+            while self._jobs and self._jobs[0].done:
+                completed_job = self._jobs.popleft()
+                completed_job.drain(self.stream)
+                self.stream.write(completed_job.decode(b"", final=True))
+                # The next job is now written as it comes
+                if self._jobs:
+                    self._jobs[0].drain(self.stream)
+            self.stream.flush()
+
+    def close(self: Self) -> None:
+        """Write the outputs of all jobs, completed or not."""
+        with self._lock:
+            while self._jobs:
+                job = self._jobs.popleft()
+                job.drain(self.stream)
+                self.stream.write(job.decode(b"", final=True))
+            self.stream.flush()
@@ -9,28 +9,118 @@ from __future__ import annotations
 
 from argparse import Action
 from argparse import ArgumentParser
+from argparse import ArgumentTypeError
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+from dataclasses import dataclass
+from dataclasses import field
+import functools
+import itertools
 import logging
 import os
 from pathlib import Path
 import platform
 import re
+import shutil
 import subprocess
 from subprocess import CalledProcessError
 import sys
+import tempfile
+import threading
+import time
 import typing
 from typing import Any
+from typing import NamedTuple
 
 if typing.TYPE_CHECKING:  # pragma: no cover
     from argparse import Namespace
+    from collections.abc import Callable
+    from collections.abc import Generator
+    from collections.abc import Iterable
+    from collections.abc import Iterator
     from collections.abc import Sequence
+    from io import BufferedIOBase
+    from io import BufferedReader
+    from typing import IO
 
     from typing_extensions import Self
 
+    from helm_kubeconform.cache import ResultCache
+    from helm_kubeconform.output import JobOutput
+    from helm_kubeconform.resources import ResourceUsage
+
+# Make the helm_kubeconform package importable when this file is run as a
+# script by Helm
+if not __package__:  # pragma: no cover
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from helm_kubeconform.cache import digest
+from helm_kubeconform.cache import open_cache
+from helm_kubeconform.cache import path_digest
+from helm_kubeconform.capabilities import Capabilities
+from helm_kubeconform.capabilities import CapabilitiesError
+from helm_kubeconform.capabilities import capture
+from helm_kubeconform.claims import ClaimRegistry
+from helm_kubeconform.discovery import find_charts
+from helm_kubeconform.discovery import read_paths
+from helm_kubeconform.equivalence import group_values_files
+from helm_kubeconform.fingerprints import FingerprintIndex
+from helm_kubeconform.history import History
+from helm_kubeconform.manifests import STDIN
+from helm_kubeconform.manifests import ManifestsError
+from helm_kubeconform.manifests import read_manifests
+from helm_kubeconform.matrix import build_matrix
+from helm_kubeconform.output import OutputMultiplexer
+from helm_kubeconform.resources import MeasuredPopen
+from helm_kubeconform.resources import ResourceReport
+from helm_kubeconform.resources import TargetUsage
+from helm_kubeconform.resources import get_memory_limit
+from helm_kubeconform.resources import run_measured
+from helm_kubeconform.scheduling import partition
+from helm_kubeconform.scheduling import prioritize
+from helm_kubeconform.scheduling import run_concurrently
+from helm_kubeconform.schema import HAS_DEPENDENCIES as HAS_SCHEMA_DEPENDENCIES
+from helm_kubeconform.schema import ValuesError
+from helm_kubeconform.schema import check_values
+from helm_kubeconform.sharding import SHARDABLE_OUTPUT_FORMATS
+from helm_kubeconform.sharding import merge_outputs
+from helm_kubeconform.sharding import shard_manifests
+from helm_kubeconform.split import create_partial_chart
+from helm_kubeconform.split import find_templates
+from helm_kubeconform.split import get_output_sizes
+
 # Environment variables injected by Helm when running a plugin
 HELM_PLUGIN_DIR = os.getenv("HELM_PLUGIN_DIR", str(Path(__file__).parent))
 HELM_BIN = os.getenv("HELM_BIN", "helm")
 HELM_PLUGIN_NAME = os.getenv("HELM_PLUGIN_NAME", "kubeconform")
 HELM_DEBUG = os.getenv("HELM_DEBUG")
+HELM_CACHE_HOME = os.getenv(
+    "HELM_CACHE_HOME",
+    str(
+        Path(
+            os.getenv("XDG_CACHE_HOME", Path("~/.cache").expanduser()), "helm"
+        )
+    ),
+)
+
+# Directory where the plugin keeps its state between runs
+PLUGIN_CACHE_DIR = Path(HELM_CACHE_HOME, HELM_PLUGIN_NAME)
+
+# Default location of the shared render and validation result cache
+HELM_KUBECONFORM_RESULT_CACHE = os.getenv("HELM_KUBECONFORM_RESULT_CACHE")
+# Default directory of the work claims shared between concurrent processes
+HELM_KUBECONFORM_CLAIM_DIR = os.getenv("HELM_KUBECONFORM_CLAIM_DIR")
+# Default cluster capabilities snapshot passed to `helm template`
+HELM_KUBECONFORM_CAPABILITIES = os.getenv("HELM_KUBECONFORM_CAPABILITIES")
+# Default location of the run history file
+HELM_KUBECONFORM_HISTORY_FILE = os.getenv(
+    "HELM_KUBECONFORM_HISTORY_FILE", str(PLUGIN_CACHE_DIR / "history.json")
+)
+# Default location of the file fingerprint index
+HELM_KUBECONFORM_FINGERPRINT_INDEX = os.getenv(
+    "HELM_KUBECONFORM_FINGERPRINT_INDEX",
+    str(PLUGIN_CACHE_DIR / "fingerprints.db"),
+)
 
 KUBECONFORM_BIN = str(
     Path(HELM_PLUGIN_DIR, "kubeconform").with_suffix(
@@ -70,6 +160,29 @@ _KUBECONFORM_RENAMED_FLAGS = {
     "-insecure-skip-tls-verify": "--skip-tls-verify",
 }
 
+# `helm template` flags whose arguments are comma-separated `key=path` pairs
+_HELM_FILE_PAIRS_FLAGS = {"--set-file"}
+
+# `helm template` flags passing values files
+_HELM_VALUES_FLAGS = {"-f", "--values"}
+# `helm template` flags setting values from the command line, or disabling
+# values validation
+_HELM_VALUES_PRECHECK_SKIP_FLAGS = {
+    "--set",
+    "--set-file",
+    "--set-json",
+    "--set-literal",
+    "--set-string",
+    "--skip-schema-validation",
+}
+
+# `helm template` flags selecting the templates to render, which cannot be
+# combined with a split render
+_HELM_SPLIT_RENDER_SKIP_FLAGS = {"-s", "--show-only"}
+
+# Bump to invalidate all result cache entries
+_RESULT_CACHE_VERSION = "1"
+
 _HELM_TEMPLATE_ARGPARSE_DEST = "helm_template"
 _KUBECONFORM_ARGPARSE_DEST = "kubeconform"
 
@@ -78,42 +191,402 @@ logging.basicConfig(format=f"{HELM_PLUGIN_NAME}: [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
 
-# Validate a Helm chart using Kubeconform
-def _validate(
-    helm_template_args: Sequence[str], kubeconform_args: Sequence[str]
-) -> int:
-    helm_template_command = [HELM_BIN, "template", *helm_template_args]
-    kubeconform_command = [KUBECONFORM_BIN, *kubeconform_args]
+# Log the debug messages of all modules of the package, and of this module,
+# which is not part of the package when run as a script by Helm
+def _enable_debug_logging() -> None:
+    for name in ("helm_kubeconform", __name__):
+        logging.getLogger(name).setLevel(logging.DEBUG)
+
+
+# Return a string identifying the installed version of an executable, without
+# running it
+def _executable_fingerprint(executable: str) -> str:
+    if not (path := shutil.which(executable)):
+        return executable
+
+    stat = Path(path).stat()
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+# Compute the cache key of a `helm template` run. Local files and directories
+# passed as arguments, such as the chart or values files, are hashed by content
+def _render_cache_key(
+    helm_template_args: Sequence[str], options: RunOptions | None = None
+) -> str:
+    options = options or RunOptions()
+    parts = [_RESULT_CACHE_VERSION, _executable_fingerprint(HELM_BIN)]
+    previous_arg = None
+    for arg in helm_template_args:
+        parts.append(arg)
+        paths = [arg]
+        if previous_arg in _HELM_FILE_PAIRS_FLAGS:
+            paths = [p.partition("=")[2] for p in arg.split(",")]
+        parts.extend(
+            path_digest(p.resolve(), options.fingerprints, options.digests)
+            for p in map(Path, paths)
+            if p.exists()
+        )
+        previous_arg = arg
+
+    return digest("render", *parts)
 
+
+# Compute the cache key of a Kubeconform run against rendered manifests
+def _validation_cache_key(
+    kubeconform_args: Sequence[str], manifests: bytes
+) -> str:
+    return digest(
+        "validate",
+        _RESULT_CACHE_VERSION,
+        _executable_fingerprint(KUBECONFORM_BIN),
+        *kubeconform_args,
+        manifests,
+    )
+
+
+# Render a Helm chart, and return the rendered manifests. The error output of
+# `helm template` is written to the output of the job if any, or to stderr
+def _render(
+    helm_template_args: Sequence[str],
+    usage: ResourceUsage,
+    output: JobOutput | None = None,
+) -> bytes:
+    helm_template_command = [HELM_BIN, "template", *helm_template_args]
     logger.debug("Running %s", " ".join(helm_template_command))
-    try:
+    if not output:
         # Render Helm chart on stdout
-        helm_template_process = subprocess.run(
-            helm_template_command, stdout=subprocess.PIPE, check=True
+        helm_template_process = run_measured(
+            helm_template_command, usage, stdout=subprocess.PIPE, check=True
+        )
+        return helm_template_process.stdout
+
+    try:
+        helm_template_process = run_measured(
+            helm_template_command, usage, capture_output=True, check=True
         )
     except CalledProcessError as ex:
-        return ex.returncode
+        output.write(ex.stderr or b"")
+        raise
+    output.write(helm_template_process.stderr or b"")
 
-    logger.debug("Running %s", " ".join(kubeconform_command))
+    return helm_template_process.stdout
+
+
+# Validate a Helm chart using Kubeconform, reusing results from the cache if
+# any
+def _validate(  # noqa: PLR0913
+    helm_template_args: Sequence[str],
+    kubeconform_args: Sequence[str],
+    options: RunOptions | None = None,
+    render: Callable[
+        [Sequence[str], ResourceUsage, JobOutput | None], bytes
+    ] = _render,
+    usage: TargetUsage | None = None,
+    output: JobOutput | None = None,
+) -> int:
+    helm_template_command = [HELM_BIN, "template", *helm_template_args]
+    options = options or RunOptions()
+    cache = options.cache
+    usage = usage or TargetUsage()
+
+    start_time = time.perf_counter()
+    render_key = (
+        _render_cache_key(helm_template_args, options) if cache else None
+    )
+    manifests = cache.get(render_key) if cache and render_key else None
+
+    if manifests is None:
+        try:
+            manifests = render(helm_template_args, usage.render, output)
+        except CalledProcessError as ex:
+            usage.render_time = time.perf_counter() - start_time
+            return ex.returncode
+        if cache and render_key:
+            cache.put(render_key, manifests)
+    else:
+        logger.debug(
+            "Using cached output of %s", " ".join(helm_template_command)
+        )
+    usage.render_time = time.perf_counter() - start_time
+    usage.output_size = len(manifests)
+
+    start_time = time.perf_counter()
     try:
-        # - Validate rendered Helm chart using Kubeconform from stdin
-        # - Redirect Kubeconform stdout to stderr
-        subprocess.run(
+        return _validate_manifests(
+            manifests,
+            kubeconform_args,
+            cache,
+            usage,
+            options.kubeconform_shards,
+            output,
+        )
+    finally:
+        usage.validation_time = time.perf_counter() - start_time
+
+
+# Return the Kubeconform output format set by its flags
+def _get_kubeconform_output_format(kubeconform_args: Sequence[str]) -> str:
+    output_format = "text"
+    for flag, value in zip(kubeconform_args, kubeconform_args[1:]):
+        if flag == "-output":
+            output_format = value
+
+    return output_format
+
+
+# Validate shards of rendered manifests using parallel Kubeconform processes,
+# and return their first failed status, if any, and their merged output
+def _validate_shards(
+    shards: Sequence[bytes],
+    kubeconform_args: Sequence[str],
+    usage: ResourceUsage,
+) -> tuple[int, bytes]:
+    kubeconform_command = [KUBECONFORM_BIN, *kubeconform_args]
+    logger.debug(
+        "Running %s on %d shards", " ".join(kubeconform_command), len(shards)
+    )
+
+    def _validate_shard(shard: bytes) -> subprocess.CompletedProcess[bytes]:
+        return run_measured(
             kubeconform_command,
-            input=helm_template_process.stdout,
-            stdout=sys.stderr,
-            check=True,
+            usage,
+            input=shard,
+            stdout=subprocess.PIPE,
+            check=False,
         )
-    except CalledProcessError as ex:
-        return ex.returncode
 
-    return 0
+    with ThreadPoolExecutor(len(shards)) as executor:
+        processes = list(executor.map(_validate_shard, shards))
+
+    result = next((p.returncode for p in processes if p.returncode), 0)
+    output = merge_outputs(
+        [p.stdout for p in processes],
+        _get_kubeconform_output_format(kubeconform_args),
+    )
+
+    return result, output
+
+
+# Split rendered manifests into shards to validate in parallel, if their
+# number and Kubeconform output format allow it
+def _get_kubeconform_shards(
+    manifests: bytes, kubeconform_args: Sequence[str], shards: int
+) -> list[bytes]:
+    if shards < 2:  # noqa: PLR2004
+        return [manifests]
+
+    output_format = _get_kubeconform_output_format(kubeconform_args)
+    if output_format not in SHARDABLE_OUTPUT_FORMATS:
+        logger.debug(
+            "Kubeconform %s output cannot be merged, validating manifests "
+            "as a single shard",
+            output_format,
+        )
+        return [manifests]
+
+    return shard_manifests(manifests, shards)
+
+
+# Write Kubeconform output to the output of the job, if any, or to stderr
+def _write_output(output: JobOutput | None, data: bytes) -> None:
+    if output:
+        output.write(data)
+    else:
+        sys.stderr.write(data.decode(errors="replace"))
+
+
+# Run Kubeconform against rendered manifests, and return its status. Its
+# output is redirected to stderr, or streamed to the output of the job if any
+def _run_kubeconform(
+    kubeconform_command: Sequence[str],
+    manifests: bytes,
+    usage: ResourceUsage,
+    output: JobOutput | None = None,
+) -> int:
+    if not output:
+        try:
+            # - Validate rendered Helm chart using Kubeconform from stdin
+            # - Redirect Kubeconform stdout to stderr
+            run_measured(
+                kubeconform_command,
+                usage,
+                input=manifests,
+                stdout=sys.stderr,
+                check=True,
+            )
+        except CalledProcessError as ex:
+            return ex.returncode
+        return 0
+
+    with MeasuredPopen(
+        kubeconform_command,
+        usage,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    ) as kubeconform_process:
+        stdin = typing.cast("IO[bytes]", kubeconform_process.stdin)
+        stdout = typing.cast("BufferedReader", kubeconform_process.stdout)
+
+        # Manifests are written from another thread, so that Kubeconform
+        # output is read meanwhile and never fills the pipe
+        def _write_manifests() -> None:
+            try:
+                stdin.write(manifests)
+            except BrokenPipeError:
+                # Kubeconform exited early, its status is reported below
+                pass
+            finally:
+                with contextlib.suppress(BrokenPipeError):
+                    stdin.close()
+
+        writer = threading.Thread(target=_write_manifests)
+        writer.start()
+        while data := stdout.read1():
+            output.write(data)
+        writer.join()
+
+    return kubeconform_process.returncode
+
+
+# Validate rendered manifests using Kubeconform, as up to `shards` shards
+# validated in parallel, and return its status. Kubeconform output is written
+# to the output of the job if any, or to stderr
+def _validate_manifests(  # noqa: PLR0913
+    manifests: bytes,
+    kubeconform_args: Sequence[str],
+    cache: ResultCache | None = None,
+    usage: TargetUsage | None = None,
+    shards: int = 1,
+    output: JobOutput | None = None,
+) -> int:
+    kubeconform_command = [KUBECONFORM_BIN, *kubeconform_args]
+    usage = usage or TargetUsage()
+
+    validation_key = None
+    if cache:
+        validation_key = _validation_cache_key(kubeconform_args, manifests)
+        if (cached_output := cache.get(validation_key)) is not None:
+            logger.debug(
+                "Using cached output of %s", " ".join(kubeconform_command)
+            )
+            usage.reused = True
+            _write_output(output, cached_output)
+            return 0
+
+    manifests_shards = _get_kubeconform_shards(
+        manifests, kubeconform_args, shards
+    )
+    if len(manifests_shards) > 1:
+        result, validation_output = _validate_shards(
+            manifests_shards, kubeconform_args, usage.validation
+        )
+    elif not validation_key:
+        logger.debug("Running %s", " ".join(kubeconform_command))
+        return _run_kubeconform(
+            kubeconform_command, manifests, usage.validation, output
+        )
+    else:
+        logger.debug("Running %s", " ".join(kubeconform_command))
+        try:
+            # Capture Kubeconform output so that it can be replayed from the
+            # cache
+            kubeconform_process = run_measured(
+                kubeconform_command,
+                usage.validation,
+                input=manifests,
+                stdout=subprocess.PIPE,
+                check=True,
+            )
+            result, validation_output = 0, kubeconform_process.stdout
+        except CalledProcessError as ex:
+            result, validation_output = ex.returncode, ex.stdout or b""
+
+    _write_output(output, validation_output)
+    # Only successful validations are cached
+    if cache and validation_key and not result:
+        cache.put(validation_key, validation_output)
+
+    return result
+
+
+# Validate a stream of manifests using Kubeconform, passing chunks to it as
+# they are read, and return its status. Cache keys and shards depending on the
+# whole manifests, streams are read entirely first when a cache is used or
+# shards are requested
+def _validate_manifests_stream(
+    chunks: Iterable[bytes],
+    kubeconform_args: Sequence[str],
+    cache: ResultCache | None = None,
+    usage: TargetUsage | None = None,
+    shards: int = 1,
+) -> int:
+    usage = usage or TargetUsage()
+    if cache or shards > 1:
+        return _validate_manifests(
+            b"".join(chunks), kubeconform_args, cache, usage, shards
+        )
+
+    kubeconform_command = [KUBECONFORM_BIN, *kubeconform_args]
+    logger.debug("Running %s", " ".join(kubeconform_command))
+    with MeasuredPopen(
+        kubeconform_command,
+        usage.validation,
+        stdin=subprocess.PIPE,
+        stdout=sys.stderr,
+    ) as kubeconform_process:
+        stdin = typing.cast("IO[bytes]", kubeconform_process.stdin)
+        try:
+            for chunk in chunks:
+                stdin.write(chunk)
+        except BrokenPipeError:
+            # Kubeconform exited early, its status is reported below
+            pass
+        except BaseException:
+            kubeconform_process.kill()
+            raise
+        finally:
+            with contextlib.suppress(BrokenPipeError):
+                stdin.close()
+
+    return kubeconform_process.returncode
+
+
+# Validate pre-rendered manifests, read from stdin, a directory or a tarball
+def _validate_rendered_manifests(
+    source: str, kubeconform_args: Sequence[str], options: RunOptions
+) -> int:
+    usage = options.resources.add(source)
+    try:
+        result = _validate_manifests_stream(
+            read_manifests(source),
+            kubeconform_args,
+            options.cache,
+            usage,
+            options.kubeconform_shards,
+        )
+    except ManifestsError as ex:
+        logger.error("Unable to read manifests from %s: %s", source, ex)
+        return 1
+    finally:
+        _report_resources(options)
+
+    if result > 0:
+        logger.error("Manifests %s validation failed", source)
+
+    return result
 
 
 # Return the path to the Helm chart directory that a file belongs to, or `None`
 # if not found
 def _get_helm_chart_directory(path: Path) -> Path | None:
-    directory = path if path.is_dir() else path.parent
+    return _find_helm_chart_directory(path if path.is_dir() else path.parent)
+
+
+# Return the path to the Helm chart directory that a directory belongs to, or
+# `None` if not found. Lookups are memoized, so that the `Chart.yaml` file of
+# each ancestor is only checked once for all files sharing this ancestor
+@functools.cache
+def _find_helm_chart_directory(directory: Path) -> Path | None:
     # A chart directory must contain a Chart.yaml file
     chart_file = directory / "Chart.yaml"
     if chart_file.is_file():
@@ -123,7 +596,7 @@ def _get_helm_chart_directory(path: Path) -> Path | None:
         return None
 
     # Check parent directory
-    return _get_helm_chart_directory(directory.parent)
+    return _find_helm_chart_directory(directory.parent)
 
 
 # Return all Helm chart directories the specified files belong to
@@ -133,47 +606,805 @@ def _get_all_helm_chart_directories(*path: Path) -> set[Path]:
     }
 
 
-# For all chart files passed to the function:
-# - get the Helm chart directory they belong to
-# - validate each chart directory
-# - stop and return status when a chart fails to validate with the specified
-#   values
-def _validate_from_helm_chart_files(
+# A chart to validate, optionally against a values file
+class _Target(NamedTuple):
+    chart: str
+    values_file: Path | None = None
+
+    # Identifier of the target in the run history
+    @property
+    def key(self: Self) -> str:
+        if self.values_file:
+            return f"{self.chart}\n{self.values_file}"
+        return self.chart
+
+    # `helm template` arguments rendering the target
+    def helm_template_args(self: Self, args: Sequence[str]) -> list[str]:
+        if self.values_file:
+            return [*args, self.chart, "--values", str(self.values_file)]
+        return [*args, self.chart]
+
+
+# Return the values files passed using `helm template` flags, which apply to
+# all targets, or `None` if some of them are not local files
+def _get_extra_values_files(
     helm_template_args: Sequence[str],
-    kubeconform_args: Sequence[str],
-    chart_files: Sequence[Path],
+) -> list[Path] | None:
+    extra_values_files = [
+        Path(value)
+        for flag, value in zip(helm_template_args, helm_template_args[1:])
+        if flag in _HELM_VALUES_FLAGS
+    ]
+    if not all(f.is_file() for f in extra_values_files):
+        return None
+
+    return extra_values_files
+
+
+# Only keep one target per equivalence class of values files of each local
+# chart. Other targets are only checked against the chart schema, unless
+# already done: return the representative targets, and the status of these
+# checks
+def _get_representative_targets(
+    helm_template_args: Sequence[str],
+    targets: Sequence[_Target],
+    options: RunOptions,
+) -> tuple[list[_Target], int]:
+    if not HAS_SCHEMA_DEPENDENCIES:
+        logger.warning(
+            "Values equivalence requires the jsonschema and PyYAML Python "
+            "packages, skipping"
+        )
+        return list(targets), 0
+
+    extra_values_files = _get_extra_values_files(helm_template_args)
+    if extra_values_files is None:
+        logger.debug("Remote values files, skipping values equivalence")
+        return list(targets), 0
+
+    values_files: dict[str, list[Path]] = {}
+    representatives = []
+    for target in targets:
+        if target.values_file and Path(target.chart).is_dir():
+            values_files.setdefault(target.chart, []).append(
+                target.values_file
+            )
+        else:
+            representatives.append(target)
+
+    equivalents = []
+    for chart, chart_values_files in values_files.items():
+        for group in group_values_files(
+            Path(chart), chart_values_files, extra_values_files
+        ):
+            representatives.append(_Target(chart, group[0]))
+            for values_file in group[1:]:
+                logger.debug(
+                    "Helm values file %s is equivalent to %s",
+                    values_file,
+                    group[0],
+                )
+                equivalents.append(_Target(chart, values_file))
+
+    logger.debug(
+        "Validating %d of %d targets, others being equivalent",
+        len(representatives),
+        len(targets),
+    )
+    # Keep the original order
+    order = {t: i for i, t in enumerate(targets)}
+    representatives.sort(key=order.__getitem__)
+    if options.values_precheck:
+        return representatives, 0
+
+    return representatives, _check_targets_values(
+        helm_template_args, equivalents, options.history
+    )
+
+
+# Check the values of each local chart target against the chart schema,
+# without running any subprocess, and stop and return status when values do
+# not match the schema
+def _check_targets_values(
+    helm_template_args: Sequence[str],
+    targets: Iterable[_Target],
+    history: History,
 ) -> int:
-    for chart_dir in _get_all_helm_chart_directories(*chart_files):
-        result = _validate(
-            [*helm_template_args, str(chart_dir)], kubeconform_args
+    if not HAS_SCHEMA_DEPENDENCIES:
+        logger.warning(
+            "Values schema pre-check requires the jsonschema and PyYAML "
+            "Python packages, skipping"
         )
-        if result > 0:
-            logger.error("Helm chart %s validation failed", chart_dir)
-            return result
+        return 0
+
+    if _HELM_VALUES_PRECHECK_SKIP_FLAGS.intersection(helm_template_args):
+        logger.debug("Values set from the command line, skipping pre-check")
+        return 0
+
+    extra_values_files = _get_extra_values_files(helm_template_args)
+    if extra_values_files is None:
+        logger.debug("Remote values files, skipping pre-check")
+        return 0
+
+    for target in targets:
+        chart_dir = Path(target.chart)
+        if not chart_dir.is_dir():
+            continue
+
+        values_files = [*extra_values_files]
+        if target.values_file:
+            values_files.append(target.values_file)
+
+        start_time = time.perf_counter()
+        try:
+            check_values(chart_dir, *values_files)
+        except ValuesError as ex:
+            history.record(
+                target.key, time.perf_counter() - start_time, failed=True
+            )
+            logger.error(
+                "Helm %s values do not match the chart schema: %s",
+                target.values_file or target.chart,
+                ex,
+            )
+            return 1
 
     return 0
 
 
-# For each values file passed to the script:
-# - validate specified Helm chart with the values file
-# - stop and return status when chart fails to validate
-def _validate_helm_values_files(
+# Render a chart with its templates restricted to a group, returning the
+# rendered manifests (`None` on failure) and the rendering duration
+def _render_template_group(
+    helm_template_args: Sequence[str], usage: ResourceUsage
+) -> tuple[bytes | None, float]:
+    start_time = time.perf_counter()
+    # Errors are reported by the full render fallback
+    helm_template_process = run_measured(
+        [HELM_BIN, "template", *helm_template_args],
+        usage,
+        capture_output=True,
+        check=False,
+    )
+    duration = time.perf_counter() - start_time
+
+    if helm_template_process.returncode:
+        return None, duration
+    return helm_template_process.stdout, duration
+
+
+# Estimate the rendering cost of the templates of a chart: historical
+# rendering durations if all templates were already rendered split, output or
+# source sizes otherwise
+def _get_templates_costs(
+    chart_dir: Path, templates: Iterable[str], history: History
+) -> dict[str, float]:
+    entries = {t: history.get_template(f"{chart_dir}\n{t}") for t in templates}
+    durations = {
+        t: e.duration
+        for t, e in entries.items()
+        if e and e.duration is not None
+    }
+    if len(durations) == len(entries):
+        return durations
+
+    return {
+        t: float(
+            e.output_size
+            if e and e.output_size is not None
+            else (chart_dir / t).stat().st_size
+        )
+        for t, e in entries.items()
+    }
+
+
+# Return a function rendering a local chart as groups of templates balanced by
+# cost and rendered in parallel, or `None` if the chart cannot be split
+def _get_split_renderer(
+    helm_template_args: Sequence[str],
+    target: _Target,
+    workers: int,
+    history: History,
+) -> Callable[[Sequence[str], ResourceUsage, JobOutput | None], bytes] | None:
+    chart_dir = Path(target.chart)
+    if (
+        workers < 2  # noqa: PLR2004
+        or not chart_dir.is_dir()
+        or _HELM_SPLIT_RENDER_SKIP_FLAGS.intersection(helm_template_args)
+    ):
+        return None
+
+    templates = find_templates(chart_dir)
+    if not templates or len(templates) < 2:  # noqa: PLR2004
+        return None
+
+    def _render_split(
+        full_helm_template_args: Sequence[str],
+        usage: ResourceUsage,
+        output: JobOutput | None = None,
+    ) -> bytes:
+        costs = _get_templates_costs(chart_dir, templates, history)
+        groups = partition(
+            templates, costs.__getitem__, min(workers, len(templates))
+        )
+        logger.debug(
+            "Rendering chart %s as %d groups of templates",
+            chart_dir,
+            len(groups),
+        )
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            group_args = []
+            for index, group in enumerate(groups):
+                partial_chart_dir = Path(tmp_dir, str(index), chart_dir.name)
+                create_partial_chart(
+                    chart_dir, partial_chart_dir, group, primary=index == 0
+                )
+                group_args.append(
+                    target._replace(
+                        chart=str(partial_chart_dir)
+                    ).helm_template_args(helm_template_args)
+                )
+            with ThreadPoolExecutor(len(groups)) as executor:
+                results = list(
+                    executor.map(
+                        functools.partial(_render_template_group, usage=usage),
+                        group_args,
+                    )
+                )
+
+        if any(manifests is None for manifests, _ in results):
+            logger.debug(
+                "Split render of chart %s failed, rendering it whole",
+                chart_dir,
+            )
+            return _render(full_helm_template_args, usage, output)
+
+        # Apportion the duration of each group to its templates according to
+        # their output size
+        for group, (manifests, duration) in zip(groups, results):
+            sizes = get_output_sizes(manifests or b"")
+            total_size = sum(sizes.get(t, 0) for t in group)
+            for template in group:
+                size = sizes.get(template, 0)
+                history.record_template(
+                    f"{chart_dir}\n{template}",
+                    duration * size / total_size
+                    if total_size
+                    else duration / len(group),
+                    size,
+                )
+
+        return b"".join(manifests or b"" for manifests, _ in results)
+
+    return _render_split
+
+
+@dataclass
+class RunOptions:
+    """Options of a validation run, besides the flags of the commands run.
+
+    Attributes:
+        cache (ResultCache | None): Cache of rendered charts and successful
+            validation results.
+        history (History): History of the previous runs.
+        fingerprints (FingerprintIndex | None): Index of file digests.
+        digests (dict[Path, str]): Digests of the local files and directories
+            hashed during the run.
+        values_precheck (bool): Whether values files are checked against the
+            chart schema before rendering.
+        values_equivalence (bool): Whether only one values file is validated
+            per equivalence class.
+        split_render (int): Number of groups of templates local charts are
+            rendered as in parallel.
+        kubeconform_shards (int): Number of Kubeconform processes large
+            manifests are validated by in parallel.
+        jobs (int): Number of targets validated concurrently.
+        memory_budget (int | None): Memory in bytes concurrent targets are
+            scheduled within.
+        claims (ClaimRegistry | None): Work claims shared with concurrent
+            processes.
+        resources (ResourceReport): Resource usage of the subprocesses run.
+        resource_report (Path | None): File the resource usage is written to.
+    """
+
+    cache: ResultCache | None = None
+    history: History = field(default_factory=History)
+    fingerprints: FingerprintIndex | None = None
+    digests: dict[Path, str] = field(default_factory=dict)
+    values_precheck: bool = False
+    values_equivalence: bool = False
+    split_render: int = 1
+    kubeconform_shards: int = 1
+    jobs: int = 1
+    memory_budget: int | None = None
+    claims: ClaimRegistry | None = None
+    resources: ResourceReport = field(default_factory=ResourceReport)
+    resource_report: Path | None = None
+
+
+# Log the resource usage of the subprocesses run for all targets, and write it
+# to the resource report file if requested
+def _report_resources(options: RunOptions) -> None:
+    if options.resources.targets:
+        logger.debug("Total resource usage: %s", options.resources.total)
+    if options.resource_report:
+        options.resources.write(options.resource_report)
+
+
+# Validate a target, unless another process sharing the claim registry
+# validated the same chart, values and options in the meantime, in which case
+# its result is reused
+def _validate_claimed(  # noqa: PLR0913
     helm_template_args: Sequence[str],
     kubeconform_args: Sequence[str],
-    values_files: Sequence[Path],
+    options: RunOptions,
+    render: Callable[
+        [Sequence[str], ResourceUsage, JobOutput | None], bytes
+    ] = _render,
+    usage: TargetUsage | None = None,
+    output: JobOutput | None = None,
 ) -> int:
-    for value_file in values_files:
+    if not options.claims:
+        return _validate(
+            helm_template_args,
+            kubeconform_args,
+            options,
+            render,
+            usage,
+            output,
+        )
+
+    key = digest(
+        _render_cache_key(helm_template_args, options),
+        _executable_fingerprint(KUBECONFORM_BIN),
+        *kubeconform_args,
+    )
+    with options.claims.claim(key) as claim:
+        if claim.result is not None:
+            logger.debug(
+                "Reusing result of helm template %s validated by another "
+                "process",
+                " ".join(helm_template_args),
+            )
+            if usage:
+                usage.reused = True
+            return claim.result
+
         result = _validate(
-            [*helm_template_args, "--values", str(value_file)],
+            helm_template_args,
+            kubeconform_args,
+            options,
+            render,
+            usage,
+            output,
+        )
+        claim.publish(result)
+
+    return result
+
+
+# Record the outcome of a target validation in the history, and the snapshot
+# of its validated content in the fingerprint index if any, telling whether
+# the target is modified on the next run
+def _record_target(
+    target: _Target,
+    duration: float,
+    result: int,
+    usage: TargetUsage,
+    options: RunOptions,
+) -> None:
+    options.history.record(
+        target.key,
+        duration,
+        result > 0,
+        usage.output_size,
+        usage.total.max_rss,
+    )
+    if options.fingerprints and (
+        target_digest := _get_target_digest(target, options)
+    ):
+        options.fingerprints.record(target.key, target_digest)
+
+
+def validate_target(  # noqa: PLR0913
+    chart: str,
+    helm_template_args: Sequence[str],
+    kubeconform_args: Sequence[str],
+    values_file: Path | None = None,
+    options: RunOptions | None = None,
+    usage: TargetUsage | None = None,
+    output: JobOutput | None = None,
+) -> int:
+    """Validate a Helm chart using Kubeconform.
+
+    The chart is rendered and validated as by the command line, reusing the
+    result cache and the claim registry of the options if any, and the outcome
+    is recorded in the history.
+
+    Args:
+        chart (str): Chart to validate, as accepted by `helm template`.
+        helm_template_args (Sequence[str]): `helm template` flags.
+        kubeconform_args (Sequence[str]): Kubeconform flags, using their native
+            names.
+        values_file (Path | None, optional): Values file to render the chart
+            with.
+        options (RunOptions | None, optional): Options of the run.
+        usage (TargetUsage | None, optional): Resource usage of the target, to
+            be updated by measures.
+        output (JobOutput | None, optional): Output the errors of
+            `helm template` and the Kubeconform output are written to, and
+            closed once validated. Written to stderr if not set.
+
+    Returns:
+        int: The exit code of the failed command, or 0 on success.
+    """
+    options = options or RunOptions()
+    target = _Target(chart, values_file)
+    usage = usage or TargetUsage()
+    start_time = time.perf_counter()
+    try:
+        result = _validate_claimed(
+            target.helm_template_args(helm_template_args),
             kubeconform_args,
+            options,
+            _get_split_renderer(
+                helm_template_args,
+                target,
+                options.split_render,
+                options.history,
+            )
+            or _render,
+            usage,
+            output,
         )
-        if result > 0:
-            logger.error("Helm values file %s validation failed", value_file)
+    finally:
+        if output:
+            output.close()
+    _record_target(
+        target, time.perf_counter() - start_time, result, usage, options
+    )
+
+    return result
+
+
+# Validate each target passed to the function, up to `options.jobs` at once,
+# record the outcome in the history, and stop and return status when a target
+# fails to validate. The outputs of concurrent validations are written in
+# target order, without being interleaved
+def _validate_targets(
+    helm_template_args: Sequence[str],
+    kubeconform_args: Sequence[str],
+    targets: Iterable[_Target],
+    options: RunOptions | None = None,
+) -> int:
+    options = options or RunOptions()
+    history = options.history
+    try:
+        if options.values_precheck and (
+            result := _check_targets_values(
+                helm_template_args, targets, history
+            )
+        ):
             return result
 
+        if options.values_equivalence:
+            targets, result = _get_representative_targets(
+                helm_template_args, list(targets), options
+            )
+            if result:
+                return result
+
+        def _validate_target(
+            target: _Target, output: JobOutput | None = None
+        ) -> int:
+            usage = options.resources.add(target.key)
+            result = validate_target(
+                target.chart,
+                helm_template_args,
+                kubeconform_args,
+                target.values_file,
+                options,
+                usage,
+                output,
+            )
+            logger.debug(
+                "Resource usage of %s: helm template %s; Kubeconform %s",
+                target.values_file or target.chart,
+                usage.render,
+                usage.validation,
+            )
+            return result
+
+        multiplexer = OutputMultiplexer(sys.stderr)
+        results: Generator[tuple[_Target, int], None, None] = (
+            (
+                (t, r)
+                for (t, _), r in run_concurrently(
+                    # Outputs are created, hence ordered, as targets are
+                    # scheduled
+                    ((t, multiplexer.job()) for t in targets),
+                    lambda item: _validate_target(*item),
+                    options.jobs,
+                    lambda item: history.estimate_memory(item[0].key),
+                    options.memory_budget,
+                )
+            )
+            if options.jobs > 1
+            else ((t, _validate_target(t)) for t in targets)
+        )
+        # No more targets are started once a target fails to validate
+        with multiplexer, contextlib.closing(results):
+            for target, result in results:
+                if result <= 0:
+                    continue
+                if target.values_file:
+                    logger.error(
+                        "Helm values file %s validation failed",
+                        target.values_file,
+                    )
+                else:
+                    logger.error(
+                        "Helm chart %s validation failed", target.chart
+                    )
+                return result
+    finally:
+        history.save()
+        if options.fingerprints:
+            options.fingerprints.save()
+        _report_resources(options)
+
     return 0
 
 
+# For all chart files passed to the function, return the Helm chart
+# directories they belong to as targets
+def _get_targets_from_helm_chart_files(
+    chart_files: Sequence[Path],
+) -> list[_Target]:
+    return [
+        _Target(str(d))
+        for d in sorted(_get_all_helm_chart_directories(*chart_files))
+    ]
+
+
+# For all chart files passed to the function, yield the Helm chart directories
+# they belong to as targets, as soon as a new directory is found
+def _iter_targets_from_helm_chart_files(
+    chart_files: Iterable[Path],
+) -> Iterator[_Target]:
+    chart_dirs = set()
+    for chart_file in chart_files:
+        chart_dir = _get_helm_chart_directory(chart_file)
+        if chart_dir and chart_dir not in chart_dirs:
+            chart_dirs.add(chart_dir)
+            yield _Target(str(chart_dir))
+
+
+# Return the targets validating a Helm chart against each values file
+def _get_targets_from_helm_values_files(
+    chart: str, values_files: Iterable[Path]
+) -> Iterator[_Target]:
+    return (_Target(chart, v) for v in values_files)
+
+
+# Return the targets validating the charts and values files affected by
+# changed files: changed charts against their default values and the values
+# files they contain, and changed values files against their charts
+def _get_targets_from_changed_files(files: Iterable[Path]) -> list[_Target]:
+    return [
+        _Target(str(chart_dir), values_file)
+        for chart_dir, values_file in build_matrix(
+            files, _get_helm_chart_directory, Path()
+        )
+    ]
+
+
+# Return the targets to validate according to the command-line arguments.
+# Targets are lazily computed from paths read from the file opened for the
+# --files-from option
+def _get_targets(
+    args: Namespace,
+    files_from_file: BufferedIOBase | None,
+    validate_chart_files: bool,
+    validate_values_files: bool,
+    validate_all_files: bool = False,
+) -> Iterable[_Target]:
+    files_from = read_paths(files_from_file) if files_from_file else ()
+    if validate_all_files:
+        return _get_targets_from_changed_files(
+            itertools.chain(args.files, files_from)
+        )
+    if validate_chart_files:
+        if files_from_file:
+            return _iter_targets_from_helm_chart_files(
+                itertools.chain(args.chart_files, files_from)
+            )
+        return _get_targets_from_helm_chart_files(args.chart_files)
+    if validate_values_files:
+        return _get_targets_from_helm_values_files(
+            args.chart, itertools.chain(args.values, files_from)
+        )
+    if args.all:
+        if not (chart_dirs := find_charts(args.all)):
+            logger.warning("No Helm chart found in %s", args.all)
+        return [_Target(str(d)) for d in chart_dirs]
+
+    return [_Target(args.chart)]
+
+
+# Only keep the targets of a shard, after splitting targets into shards of
+# balanced historical validation cost
+def _get_shard_targets(
+    targets: Sequence[_Target], index: int, count: int, history: History
+) -> list[_Target]:
+    costs = history.costs(t.key for t in targets)
+    shards = partition(
+        sorted(targets, key=lambda t: t.key), lambda t: costs[t.key], count
+    )
+    logger.debug(
+        "Validating shard %d/%d (%d of %d targets)",
+        index,
+        count,
+        len(shards[index - 1]),
+        len(targets),
+    )
+
+    return shards[index - 1]
+
+
+# Return the most recent modification time of a file, or of the files of a
+# directory tree, or 0 if the path does not exist
+def _get_latest_modification_time(path: Path) -> float:
+    try:
+        latest_mtime = path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+    if path.is_dir():
+        for directory, _, files in os.walk(path):
+            for file in files:
+                with contextlib.suppress(OSError):
+                    latest_mtime = max(
+                        latest_mtime, Path(directory, file).stat().st_mtime
+                    )
+
+    return latest_mtime
+
+
+# Return the digest of the content of a local chart and of its values file, if
+# any, or `None` if the chart is not local
+def _get_target_digest(target: _Target, options: RunOptions) -> str | None:
+    paths = [Path(target.chart)]
+    if target.values_file:
+        paths.append(target.values_file)
+    if not all(p.exists() for p in paths):
+        return None
+
+    try:
+        return digest(
+            *(
+                path_digest(p.resolve(), options.fingerprints, options.digests)
+                for p in paths
+            )
+        )
+    except OSError:
+        return None
+
+
+# Order targets so that a broken chart is reported as soon as possible:
+# previously failing targets first, then targets modified since their last
+# validation, then all others. Local targets are compared with their snapshot
+# in the fingerprint index if any, others using modification times
+def _get_prioritized_targets(
+    targets: Sequence[_Target], options: RunOptions
+) -> list[_Target]:
+    history = options.history
+    fingerprints = options.fingerprints
+    costs = history.costs(t.key for t in targets)
+
+    def _modified(target: _Target) -> bool:
+        if not (target_history := history.get(target.key)):
+            return True
+        if fingerprints and (
+            target_digest := _get_target_digest(target, options)
+        ):
+            return fingerprints.changed(target.key, target_digest)
+        paths = [Path(target.chart)]
+        if target.values_file:
+            paths.append(target.values_file)
+        return any(
+            _get_latest_modification_time(p) > target_history.last_run
+            for p in paths
+        )
+
+    return prioritize(
+        targets,
+        lambda t: bool((h := history.get(t.key)) and h.failed),
+        _modified,
+        lambda t: costs[t.key],
+    )
+
+
+# Return the targets of the run, in validation order. Targets read using the
+# --files-from option are validated as they are read, unless all of them must
+# be known beforehand. The fingerprint index is only opened when digests are
+# needed: to order several targets, or to key cached results and claims
+def _get_ordered_targets(
+    args: Namespace, targets: Iterable[_Target], options: RunOptions
+) -> Iterable[_Target]:
+    if getattr(args, "files_from", None) and not (
+        args.shard or options.values_precheck or options.values_equivalence
+    ):
+        options.fingerprints = FingerprintIndex(args.fingerprint_index)
+        return targets
+
+    target_list = list(targets)
+    if args.shard:
+        index, count = args.shard
+        target_list = _get_shard_targets(
+            target_list, index, count, options.history
+        )
+    if len(target_list) > 1 or options.cache or options.claims:
+        options.fingerprints = FingerprintIndex(args.fingerprint_index)
+    if len(target_list) < 2:  # noqa: PLR2004
+        return target_list
+
+    return _get_prioritized_targets(target_list, options)
+
+
+# Parse a `i/N` shard specification
+def _shard(value: str) -> tuple[int, int]:
+    match = re.fullmatch(r"(\d+)/(\d+)", value)
+    if not match or not 1 <= int(match[1]) <= int(match[2]):
+        msg = f"invalid shard {value!r}, expected i/N with 1 <= i <= N"
+        raise ArgumentTypeError(msg)
+
+    return int(match[1]), int(match[2])
+
+
+# Open the list of files of the --files-from option, read from stdin if set
+# to `-`, and exit with an error if it cannot be opened. Stdin is left open
+@contextlib.contextmanager
+def _open_files_from(
+    parser: ArgumentParser, value: str | None
+) -> Iterator[BufferedIOBase | None]:
+    if not value:
+        yield None
+        return
+    if value == STDIN:
+        yield typing.cast("BufferedIOBase", sys.stdin.buffer)
+        return
+
+    try:
+        file = Path(value).open("rb")  # noqa: SIM115
+    except OSError as ex:
+        parser.error(f"argument --files-from: can't open {value!r}: {ex}")
+
+    with file:
+        yield file
+
+
+# Parse a memory size in bytes, with an optional binary unit suffix
+def _memory_size(value: str) -> int:
+    match = re.fullmatch(
+        r"(\d+)\s*([KMGT]?)i?B?", value.strip(), re.IGNORECASE
+    )
+    if not match:
+        msg = f"invalid memory size {value!r}, expected e.g. 512M or 4G"
+        raise ArgumentTypeError(msg)
+
+    return int(match[1]) << 10 * " KMGT".index(match[2].upper() or " ")
+
+
+# Parse a number of workers
+def _workers(value: str) -> int:
+    if not value.isdigit() or int(value) < 1:
+        msg = f"invalid number of workers {value!r}, expected at least 1"
+        raise ArgumentTypeError(msg)
+
+    return int(value)
+
+
 # Custom argparse action to process a flag and its arguments, and append them
 # to one or two namespace attributes
 def _command_flag(
@@ -307,7 +1538,9 @@ def _add_kubeconform_flags(parser: ArgumentParser) -> None:
 
 # Argument parser for the script
 def _argument_parser(
-    chart_files: bool = False, values_files: bool = False
+    chart_files: bool = False,
+    values_files: bool = False,
+    all_files: bool = False,
 ) -> ArgumentParser:
     parser = ArgumentParser(
         prog=f"helm {HELM_PLUGIN_NAME}",
@@ -320,22 +1553,178 @@ def _argument_parser(
     if chart_files:
         parser.add_argument(
             "chart_files",
-            nargs="+",
+            nargs="*",
             type=Path,
             help="files belonging to a chart to validate",
             metavar="chart_file",
         )
-    else:
+    elif all_files:
+        parser.add_argument(
+            "files",
+            nargs="*",
+            type=Path,
+            help="changed files. Charts they belong to are validated with "
+            "their default values and against the values files they "
+            "contain, and values files against their charts",
+            metavar="file",
+        )
+    elif values_files:
         parser.add_argument("chart", help="chart")
+        parser.add_argument(
+            "values",
+            nargs="*",
+            type=Path,
+            help="Values files. The chart will be validated against each "
+            "of them",
+        )
+    else:
+        parser.add_argument("chart", nargs="?", help="chart")
 
-        if values_files:
-            parser.add_argument(
-                "values",
-                nargs="+",
-                type=Path,
-                help="Values files. The chart will be validated against each "
-                "of them",
-            )
+    group = parser.add_argument_group("Plugin options")
+    if not chart_files and not values_files and not all_files:
+        group.add_argument(
+            "--all",
+            type=Path,
+            help="validate all charts found in this directory and its "
+            "subdirectories, honoring .gitignore and .helmignore files and "
+            "skipping vendored subcharts",
+            metavar="root",
+        )
+        group.add_argument(
+            "--manifests",
+            help="validate manifests rendered beforehand instead of a "
+            f"chart, read from stdin if set to '{STDIN}', or from the YAML "
+            "and JSON files of this directory or tarball",
+            metavar="source",
+        )
+
+    if chart_files or values_files or all_files:
+        kind = (
+            "chart" if chart_files else "values" if values_files else "changed"
+        )
+        group.add_argument(
+            "--files-from",
+            help=f"also read {kind} files from this file, or from stdin if "
+            f"set to '{STDIN}', separated "
+            "by NUL characters or newlines. Charts are validated as files "
+            "are read",
+            metavar="source",
+        )
+
+    group.add_argument(
+        "--shard",
+        type=_shard,
+        help="only validate the i-th of N shards of the charts and values "
+        "files to validate, balanced by historical validation duration",
+        metavar="i/N",
+    )
+    group.add_argument(
+        "--capabilities",
+        default=HELM_KUBECONFORM_CAPABILITIES,
+        type=Path,
+        help="pass the API versions and Kubernetes version of the cluster "
+        f"snapshot in this file, created by 'helm {HELM_PLUGIN_NAME} "
+        "capabilities capture', to helm template and Kubeconform (default "
+        "$HELM_KUBECONFORM_CAPABILITIES)",
+        metavar="path",
+    )
+    group.add_argument(
+        "--history-file",
+        default=HELM_KUBECONFORM_HISTORY_FILE,
+        type=Path,
+        help="file where validation durations and failures are recorded "
+        "(default $HELM_KUBECONFORM_HISTORY_FILE or "
+        f"{PLUGIN_CACHE_DIR / 'history.json'})",
+        metavar="path",
+    )
+    group.add_argument(
+        "--fingerprint-index",
+        default=HELM_KUBECONFORM_FINGERPRINT_INDEX,
+        type=Path,
+        help="SQLite database where the digests of chart and values files "
+        "are recorded along with their size, modification time and inode, "
+        "so that unchanged files are not hashed again, and charts changed "
+        "since their last validation are detected (default "
+        "$HELM_KUBECONFORM_FINGERPRINT_INDEX or "
+        f"{PLUGIN_CACHE_DIR / 'fingerprints.db'})",
+        metavar="path",
+    )
+    group.add_argument(
+        "--values-schema-precheck",
+        action="store_true",
+        help="check values against the values.schema.json file of local "
+        "charts before rendering them (requires the jsonschema and PyYAML "
+        "Python packages)",
+    )
+    if values_files or all_files:
+        group.add_argument(
+            "--values-equivalence",
+            action="store_true",
+            help="only validate one values file per group of values files "
+            "of a local chart agreeing on the values changing the structure "
+            "of its templates, others only being checked against its "
+            "values.schema.json file (requires the jsonschema and PyYAML "
+            "Python packages)",
+        )
+    group.add_argument(
+        "--split-render",
+        default=1,
+        type=_workers,
+        help="render each local chart as up to this many groups of "
+        "templates in parallel, balanced by historical rendering cost, "
+        "unless its templates reference each other (default 1)",
+        metavar="workers",
+    )
+    group.add_argument(
+        "--kubeconform-shards",
+        default=1,
+        type=_workers,
+        help="split the manifests of each chart into up to this many shards "
+        "of documents balanced by size, validated by parallel Kubeconform "
+        "processes, for the text and json output formats (default 1)",
+        metavar="workers",
+    )
+    group.add_argument(
+        "--jobs",
+        default=1,
+        type=_workers,
+        help="validate up to this many charts and values files in parallel "
+        "(default 1)",
+        metavar="workers",
+    )
+    group.add_argument(
+        "--memory-budget",
+        type=_memory_size,
+        help="only validate charts and values files in parallel while their "
+        "peak memory usage, estimated from their history, stays under this "
+        "size in bytes, with an optional K, M, G or T suffix (default the "
+        "memory limit of the cgroup of the process, if any)",
+        metavar="size",
+    )
+    group.add_argument(
+        "--claim-dir",
+        default=HELM_KUBECONFORM_CLAIM_DIR,
+        type=Path,
+        help="share work with concurrent processes using lock files in "
+        "this directory, so that a chart is only validated by one of them "
+        "(default $HELM_KUBECONFORM_CLAIM_DIR)",
+        metavar="path",
+    )
+    group.add_argument(
+        "--resource-report",
+        type=Path,
+        help="write the CPU times and maximum resident set size of the helm "
+        "and Kubeconform processes run for each chart to this JSON file",
+        metavar="path",
+    )
+    group.add_argument(
+        "--result-cache",
+        default=HELM_KUBECONFORM_RESULT_CACHE,
+        help="cache rendered charts and successful validation results in "
+        "this directory, or in this HTTP store using GET/PUT requests "
+        "(default $HELM_KUBECONFORM_RESULT_CACHE)",
+        metavar="location",
+    )
 
     _add_helm_template_flags(parser)
     _add_kubeconform_flags(parser)
@@ -343,11 +1732,148 @@ def _argument_parser(
     return parser
 
 
+def add_capabilities_args(
+    capabilities: Capabilities,
+    helm_template_args: list[str],
+    kubeconform_args: list[str],
+) -> None:
+    """Pass cluster capabilities to `helm template` and Kubeconform.
+
+    API versions are added to those passed explicitly, while an explicit
+    Kubernetes version takes precedence.
+
+    Args:
+        capabilities (Capabilities): Cluster capabilities.
+        helm_template_args (list[str]): `helm template` flags, updated.
+        kubeconform_args (list[str]): Kubeconform flags, using their native
+            names, updated.
+    """
+    if capabilities.api_versions:
+        helm_template_args.extend(
+            ["--api-versions", ",".join(capabilities.api_versions)]
+        )
+    if "--kube-version" not in helm_template_args:
+        helm_template_args.extend(
+            ["--kube-version", capabilities.release_version]
+        )
+        kubeconform_args.extend(
+            [
+                _HELM_KUBECONFORM_COMMON_FLAGS["--kube-version"],
+                capabilities.release_version,
+            ]
+        )
+
+
+# Pass the capabilities of a cluster snapshot to `helm template` and
+# Kubeconform, and return whether the snapshot could be read
+def _load_capabilities_args(
+    snapshot: Path, helm_template_args: list[str], kubeconform_args: list[str]
+) -> bool:
+    try:
+        capabilities = Capabilities.load(snapshot)
+    except CapabilitiesError as ex:
+        logger.error("Unable to read capabilities from %s: %s", snapshot, ex)
+        return False
+
+    add_capabilities_args(capabilities, helm_template_args, kubeconform_args)
+
+    return True
+
+
+# Entry point for the `capabilities` subcommand, managing cluster capabilities
+# snapshots
+def _capabilities_main(argv: list[str]) -> int:
+    parser = ArgumentParser(
+        prog=f"helm {HELM_PLUGIN_NAME} capabilities",
+        description="Manage snapshots of the capabilities of Kubernetes "
+        "clusters, used to render charts without querying clusters.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    capture_parser = subparsers.add_parser(
+        "capture",
+        help="capture the capabilities of a cluster",
+        description="Capture the API versions and Kubernetes version of the "
+        "cluster of the current Kubernetes context, or of a local stand-in "
+        "such as a kind cluster, into a snapshot file.",
+    )
+    capture_parser.add_argument("output", type=Path, help="snapshot file")
+    capture_parser.add_argument(
+        "--kube-context",
+        help="name of the kubeconfig context to use",
+        metavar="name",
+    )
+    capture_parser.add_argument(
+        "--kubeconfig", help="path to the kubeconfig file", metavar="path"
+    )
+
+    args = parser.parse_args(argv)
+
+    if HELM_DEBUG == "true":
+        _enable_debug_logging()
+
+    helm_args = []
+    for flag, value in (
+        ("--kube-context", args.kube_context),
+        ("--kubeconfig", args.kubeconfig),
+    ):
+        if value:
+            helm_args.extend([flag, value])
+
+    try:
+        capabilities = capture(HELM_BIN, helm_args)
+        capabilities.save(args.output)
+    except CapabilitiesError as ex:
+        logger.error("Unable to capture cluster capabilities: %s", ex)
+        return 1
+
+    logger.debug(
+        "Captured %d API versions of Kubernetes %s into %s",
+        len(capabilities.api_versions),
+        capabilities.kube_version,
+        args.output,
+    )
+
+    return 0
+
+
+# Check the consistency of the positional and plugin arguments, and exit with
+# an error if required arguments are missing
+def _check_args(
+    parser: ArgumentParser,
+    args: Namespace,
+    validate_chart_files: bool,
+    validate_values_files: bool,
+    validate_all_files: bool = False,
+) -> None:
+    if validate_chart_files and not args.chart_files and not args.files_from:
+        parser.error(
+            "either chart files or the --files-from option is required"
+        )
+    if validate_values_files and not args.values and not args.files_from:
+        parser.error(
+            "either values files or the --files-from option is required"
+        )
+    if validate_all_files and not args.files and not args.files_from:
+        parser.error("either files or the --files-from option is required")
+
+    if (
+        not validate_chart_files
+        and not validate_values_files
+        and not validate_all_files
+        and [args.chart, args.all, args.manifests].count(None) != 2  # noqa: PLR2004
+    ):
+        parser.error(
+            "either a chart, the --all option or the --manifests option is "
+            "required"
+        )
+
+
 # Entry point for the Helm plugin runner
 def main(
     argv: list[str] | None = None,
     validate_chart_files: bool = False,
     validate_values_files: bool = False,
+    validate_all_files: bool = False,
 ) -> int:
     """Entry point for the Helm plugin wrapper.
 
@@ -360,14 +1886,30 @@ def main(
         validate_values_files (bool, optional): If `True`, the entry point will
             accept a set of Helm values files as extra positional
             arguments, in addition to the chart argument.
+        validate_all_files (bool, optional): If `True`, the entry point will
+            accept a set of changed files as the only positional arguments,
+            and validate the matrix of the charts and values files they
+            affect.
 
     Returns:
         int: The status code for the wrapper.
     """
+    argv = sys.argv[1:] if argv is None else argv
+    if (
+        not validate_chart_files
+        and not validate_values_files
+        and not validate_all_files
+        and argv[:1] == ["capabilities"]
+        # A local chart named `capabilities` is still validated
+        and not Path(argv[0]).exists()
+    ):
+        return _capabilities_main(argv[1:])
+
     try:
         parser = _argument_parser(
             chart_files=validate_chart_files,
             values_files=validate_values_files,
+            all_files=validate_all_files,
         )
     except OSError as ex:
         logger.error(ex)
@@ -377,6 +1919,14 @@ def main(
 
     args = parser.parse_args(argv)
 
+    _check_args(
+        parser,
+        args,
+        validate_chart_files,
+        validate_values_files,
+        validate_all_files,
+    )
+
     helm_template_args = (
         getattr(args, _HELM_TEMPLATE_ARGPARSE_DEST, None) or []
     )
@@ -389,21 +1939,49 @@ def main(
         kubeconform_args.append("-debug")
 
     if "--debug" in helm_template_args or "-debug" in kubeconform_args:
-        logger.setLevel(logging.DEBUG)
+        _enable_debug_logging()
+
+    if args.capabilities and not _load_capabilities_args(
+        args.capabilities, helm_template_args, kubeconform_args
+    ):
+        return 1
+
+    options = RunOptions(
+        cache=open_cache(args.result_cache) if args.result_cache else None,
+        history=History.load(args.history_file),
+        values_precheck=args.values_schema_precheck,
+        values_equivalence=getattr(args, "values_equivalence", False),
+        split_render=args.split_render,
+        kubeconform_shards=args.kubeconform_shards,
+        jobs=args.jobs,
+        memory_budget=args.memory_budget
+        if args.memory_budget is not None
+        else get_memory_limit(),
+        claims=ClaimRegistry(args.claim_dir) if args.claim_dir else None,
+        resource_report=args.resource_report,
+    )
 
-    if validate_chart_files:
-        return _validate_from_helm_chart_files(
-            helm_template_args, kubeconform_args, args.chart_files
+    if getattr(args, "manifests", None):
+        return _validate_rendered_manifests(
+            args.manifests, kubeconform_args, options
         )
 
-    helm_template_args.append(args.chart)
-
-    if validate_values_files:
-        return _validate_helm_values_files(
-            helm_template_args, kubeconform_args, args.values
+    with _open_files_from(
+        parser, getattr(args, "files_from", None)
+    ) as files_from:
+        targets = _get_targets(
+            args,
+            files_from,
+            validate_chart_files,
+            validate_values_files,
+            validate_all_files,
         )
 
-    return _validate(helm_template_args, kubeconform_args)
+        targets = _get_ordered_targets(args, targets, options)
+
+        return _validate_targets(
+            helm_template_args, kubeconform_args, targets, options
+        )
 
 
 if __name__ == "__main__":
@@ -30,7 +30,9 @@ def main(argv: list[str] | None = None) -> int:
         description="Pre-commit wrapper for the helm kubeconform plugin",
         add_help=False,
     )
-    parser.add_argument("task", choices=["validate-charts", "validate-values"])
+    parser.add_argument(
+        "task", choices=["validate-all", "validate-charts", "validate-values"]
+    )
     args, plugin_args = parser.parse_known_args(argv)
 
     env = {
@@ -62,8 +64,20 @@ def main(argv: list[str] | None = None) -> int:
         except CalledProcessError as ex:
             return ex.returncode
 
+    # Hook processes run concurrently by pre-commit share their work, unless
+    # a claim directory is set explicitly
+    claim_args = (
+        []
+        if helm_kubeconform.plugin.HELM_KUBECONFORM_CLAIM_DIR
+        else [
+            "--claim-dir",
+            str(helm_kubeconform.plugin.PLUGIN_CACHE_DIR / "claims"),
+        ]
+    )
+
     return helm_kubeconform.plugin.main(
-        argv=plugin_args,
+        argv=[*claim_args, *plugin_args],
         validate_chart_files=args.task == "validate-charts",
         validate_values_files=args.task == "validate-values",
+        validate_all_files=args.task == "validate-all",
     )
@@ -0,0 +1,364 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Resource accounting of the subprocesses run by helm-kubeconform.
+
+Each subprocess is reaped using `wait4()`, which returns the exact resource
+usage of this single process, whatever the other subprocesses running
+concurrently.
+
+On platforms without `wait4()`, resource usage is measured as the difference
+of the usage of all terminated children (`getrusage(RUSAGE_CHILDREN)`) before
+and after reaping a subprocess. Subprocesses reaped concurrently are then
+counted several times, and the kernel only keeps the largest resident set size
+of all children: the maximum RSS of a subprocess is only known when it exceeds
+the maximum RSS of all previously measured subprocesses.
+
+Resource usage is not measured on platforms without the `resource` module
+(e.g. Windows).
+"""
+
+from __future__ import annotations
+
+import contextlib
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+import json
+import logging
+import os
+from pathlib import Path
+import subprocess
+from subprocess import CalledProcessError
+from subprocess import CompletedProcess
+import sys
+import threading
+import typing
+
+from helm_kubeconform.cache import write_atomically
+
+try:
+    import resource
+
+    HAS_RESOURCE = True
+except ImportError:  # pragma: no cover
+    HAS_RESOURCE = False
+
+HAS_WAIT4 = hasattr(os, "wait4")
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+    from collections.abc import Sequence
+
+    from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+# `ru_maxrss` is expressed in bytes on macOS, in kibibytes elsewhere
+_MAX_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+_CGROUP_ROOT = Path("/sys/fs/cgroup")
+_PROC_CGROUP_FILE = Path("/proc/self/cgroup")
+# cgroup v1 reports a huge page-aligned value when unlimited
+_CGROUP_V1_UNLIMITED = 1 << 62
+
+# Serialize the measures of subprocesses reaped from concurrent threads
+_MEASURE_LOCK = threading.Lock()
+
+
+@dataclass
+class ResourceUsage:
+    """Resource usage of subprocesses.
+
+    Attributes:
+        user_time (float): User CPU time in seconds.
+        system_time (float): System CPU time in seconds.
+        max_rss (int | None): Maximum resident set size in bytes of the
+            largest subprocess, or `None` if unknown.
+    """
+
+    user_time: float = 0.0
+    system_time: float = 0.0
+    max_rss: int | None = None
+
+    def add(self: Self, other: ResourceUsage) -> None:
+        """Add the resource usage of other subprocesses.
+
+        Args:
+            other (ResourceUsage): Resource usage to add.
+        """
+        self.user_time += other.user_time
+        self.system_time += other.system_time
+        if other.max_rss is not None:
+            self.max_rss = max(self.max_rss or 0, other.max_rss)
+
+    def __str__(self: Self) -> str:
+        """Return a human-readable representation of the resource usage.
+
+        Returns:
+            str: The resource usage.
+        """
+        max_rss = (
+            f"{self.max_rss / 1024 / 1024:.1f} MiB"
+            if self.max_rss is not None
+            else "unknown"
+        )
+        return (
+            f"user {self.user_time:.3f}s, system {self.system_time:.3f}s, "
+            f"max RSS {max_rss}"
+        )
+
+
+@dataclass
+class TargetUsage:
+    """Resource usage of the subprocesses run for a validation target.
+
+    Attributes:
+        render (ResourceUsage): Usage of `helm template`.
+        validation (ResourceUsage): Usage of Kubeconform.
+        output_size (int | None): Size in bytes of the rendered manifests, if
+            rendered.
+        render_time (float): Time in seconds spent rendering the chart,
+            including cache lookups.
+        validation_time (float): Time in seconds spent validating the rendered
+            manifests, including cache lookups.
+        reused (bool): Whether the validation result was reused from the
+            cache or from another process.
+    """
+
+    render: ResourceUsage = field(default_factory=ResourceUsage)
+    validation: ResourceUsage = field(default_factory=ResourceUsage)
+    output_size: int | None = None
+    render_time: float = 0.0
+    validation_time: float = 0.0
+    reused: bool = False
+
+    @property
+    def total(self: Self) -> ResourceUsage:
+        """ResourceUsage: The usage of all subprocesses."""
+        total = ResourceUsage()
+        total.add(self.render)
+        total.add(self.validation)
+        return total
+
+
+# Convert a `resource.struct_rusage` structure
+def _to_usage(usage: resource.struct_rusage) -> ResourceUsage:
+    return ResourceUsage(
+        usage.ru_utime, usage.ru_stime, usage.ru_maxrss * _MAX_RSS_UNIT
+    )
+
+
+# Return the resource usage of all terminated children
+def _children_usage() -> ResourceUsage:
+    if not HAS_RESOURCE:  # pragma: no cover
+        return ResourceUsage()
+
+    return _to_usage(resource.getrusage(resource.RUSAGE_CHILDREN))
+
+
+# Measure the resource usage of the subprocesses reaped in a block, as the
+# difference of the usage of all terminated children
+@contextlib.contextmanager
+def _measure(usage: ResourceUsage) -> Iterator[None]:
+    before = _children_usage()
+    try:
+        yield
+    finally:
+        after = _children_usage()
+        with _MEASURE_LOCK:
+            usage.add(
+                ResourceUsage(
+                    after.user_time - before.user_time,
+                    after.system_time - before.system_time,
+                    after.max_rss
+                    if after.max_rss is not None
+                    and after.max_rss > (before.max_rss or 0)
+                    else None,
+                )
+            )
+
+
+class MeasuredPopen(subprocess.Popen[bytes]):
+    """Subprocess whose resource usage is measured once it terminates.
+
+    The usage is only measured when the process is waited for without any
+    timeout, as done by `communicate()` or when leaving its context.
+    """
+
+    def __init__(
+        self: Self,
+        args: Sequence[str],
+        usage: ResourceUsage,
+        **kwargs: typing.Any,  # noqa: ANN401
+    ) -> None:
+        """Start a subprocess.
+
+        Args:
+            args (Sequence[str]): Command to run.
+            usage (ResourceUsage): Resource usage the usage of the process is
+                added to.
+            **kwargs (Any): `subprocess.Popen` arguments.
+        """
+        self.usage = usage
+        super().__init__(args, **kwargs)
+
+    def wait(self: Self, timeout: float | None = None) -> int:
+        """Wait for the process to terminate, and measure its usage.
+
+        Args:
+            timeout (float | None, optional): Timeout in seconds.
+
+        Returns:
+            int: The return code of the process.
+        """
+        if self.returncode is not None or timeout is not None:
+            return super().wait(timeout)
+
+        if not HAS_WAIT4:
+            with _measure(self.usage):
+                return super().wait()
+
+        _, status, usage = os.wait4(self.pid, 0)
+        self.returncode = os.waitstatus_to_exitcode(status)
+        with _MEASURE_LOCK:
+            self.usage.add(_to_usage(usage))
+
+        return self.returncode
+
+
+def run_measured(
+    args: Sequence[str],
+    usage: ResourceUsage,
+    *,
+    input: bytes | None = None,  # noqa: A002
+    capture_output: bool = False,
+    check: bool = False,
+    **kwargs: typing.Any,  # noqa: ANN401
+) -> CompletedProcess[bytes]:
+    """Run a subprocess like `subprocess.run()`, and measure its usage.
+
+    Args:
+        args (Sequence[str]): Command to run.
+        usage (ResourceUsage): Resource usage the usage of the process is
+            added to.
+        input (bytes | None, optional): Data written to the process stdin.
+        capture_output (bool, optional): Whether to capture stdout and stderr.
+        check (bool, optional): Whether to raise an exception if the process
+            fails.
+        **kwargs (Any): `subprocess.Popen` arguments.
+
+    Returns:
+        CompletedProcess[bytes]: The completed process.
+
+    Raises:
+        CalledProcessError: If `check` is set and the process fails.
+    """
+    if input is not None:
+        kwargs["stdin"] = subprocess.PIPE
+    if capture_output:
+        kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+
+    with MeasuredPopen(args, usage, **kwargs) as process:
+        try:
+            stdout, stderr = process.communicate(input)
+        except BaseException:
+            process.kill()
+            raise
+
+    if check and process.returncode:
+        raise CalledProcessError(process.returncode, args, stdout, stderr)
+
+    return CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+# Yield the memory limit files of the cgroup of the current process and of its
+# ancestors, for cgroup v2 and for the cgroup v1 memory controller
+def _iter_cgroup_memory_limit_files() -> Iterator[Path]:
+    try:
+        lines = _PROC_CGROUP_FILE.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return
+
+    for line in lines:
+        if line.count(":") < 2:  # noqa: PLR2004
+            continue
+        _, controllers, path = line.split(":", 2)
+        if not controllers:
+            directory, limit_file = _CGROUP_ROOT, "memory.max"
+        elif "memory" in controllers.split(","):
+            directory = _CGROUP_ROOT / "memory"
+            limit_file = "memory.limit_in_bytes"
+        else:
+            continue
+
+        cgroup = Path(path.strip() or "/")
+        for parent in (cgroup, *cgroup.parents):
+            yield directory / parent.relative_to("/") / limit_file
+
+
+def get_memory_limit() -> int | None:
+    """Return the memory limit of the cgroups of the current process.
+
+    Returns:
+        int | None: The lowest memory limit in bytes of the cgroup of the
+        current process and of its ancestors, or `None` if unlimited or
+        unknown (e.g. outside of Linux).
+    """
+    limits = []
+    for path in _iter_cgroup_memory_limit_files():
+        try:
+            value = path.read_text(encoding="utf-8").strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < _CGROUP_V1_UNLIMITED:
+            limits.append(int(value))
+
+    return min(limits, default=None)
+
+
+class ResourceReport:
+    """Resource usage of the subprocesses run for a set of targets."""
+
+    def __init__(self: Self) -> None:
+        """Initialize an empty report."""
+        self.targets: dict[str, TargetUsage] = {}
+
+    def add(self: Self, key: str) -> TargetUsage:
+        """Add a target to the report.
+
+        Args:
+            key (str): Target key.
+
+        Returns:
+            TargetUsage: The resource usage of the target, to be updated by
+            measures.
+        """
+        return self.targets.setdefault(key, TargetUsage())
+
+    @property
+    def total(self: Self) -> ResourceUsage:
+        """ResourceUsage: The usage of the subprocesses of all targets."""
+        total = ResourceUsage()
+        for target in self.targets.values():
+            total.add(target.total)
+        return total
+
+    def write(self: Self, path: Path) -> None:
+        """Write the report as a JSON file.
+
+        Args:
+            path (Path): Report file.
+        """
+        data = {
+            "targets": [
+                {"target": key, **asdict(usage)}
+                for key, usage in self.targets.items()
+            ],
+            "total": asdict(self.total),
+        }
+
+        try:
+            write_atomically(path, json.dumps(data, indent=1).encode())
+        except OSError as ex:
+            logger.warning("Unable to write resource report %s: %s", path, ex)
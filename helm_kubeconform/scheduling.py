@@ -0,0 +1,157 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Scheduling of validation targets for the helm-kubeconform plugin."""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+import heapq
+import typing
+from typing import TypeVar
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+    from collections.abc import Generator
+    from collections.abc import Iterable
+    from collections.abc import Sequence
+    from concurrent.futures import Future
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def partition(
+    items: Sequence[T], cost: Callable[[T], float], count: int
+) -> list[list[T]]:
+    """Split items into groups of balanced total cost.
+
+    Items are assigned by decreasing cost to the least loaded group (longest
+    processing time first). The result only depends on the items order and
+    costs, so that separate processes computing the same partition get the
+    same groups.
+
+    Args:
+        items (Sequence[T]): Items to split.
+        cost (Callable[[T], float]): Function returning the cost of an item.
+        count (int): Number of groups.
+
+    Returns:
+        list[list[T]]: The groups. Items of each group are kept in their
+        original order.
+    """
+    groups: list[list[int]] = [[] for _ in range(count)]
+    # Heap of (load, group index) pairs, so that ties are broken by index
+    loads = [(0.0, i) for i in range(count)]
+
+    for item_index in sorted(
+        range(len(items)), key=lambda i: (-cost(items[i]), i)
+    ):
+        load, group_index = heapq.heappop(loads)
+        groups[group_index].append(item_index)
+        heapq.heappush(loads, (load + cost(items[item_index]), group_index))
+
+    return [[items[i] for i in sorted(group)] for group in groups]
+
+
+def prioritize(
+    items: Iterable[T],
+    failed: Callable[[T], bool],
+    modified: Callable[[T], bool],
+    cost: Callable[[T], float],
+) -> list[T]:
+    """Order items to get negative feedback as soon as possible.
+
+    Items which previously failed come first, then items modified since their
+    last run, then all others. Cheaper items come first within each class.
+
+    Args:
+        items (Iterable[T]): Items to order.
+        failed (Callable[[T], bool]): Function returning whether an item
+            previously failed.
+        modified (Callable[[T], bool]): Function returning whether an item was
+            modified since its last run.
+        cost (Callable[[T], float]): Function returning the cost of an item.
+
+    Returns:
+        list[T]: The ordered items. The order of items with the same priority
+        and cost is preserved.
+    """
+    return sorted(
+        items, key=lambda i: (not failed(i), not modified(i), cost(i))
+    )
+
+
+def run_concurrently(
+    items: Iterable[T],
+    function: Callable[[T], R],
+    jobs: int,
+    memory: Callable[[T], float],
+    memory_budget: float | None = None,
+) -> Generator[tuple[T, R], None, None]:
+    """Apply a function to items in parallel threads, within a memory budget.
+
+    An item is started when fewer than `jobs` items are running, and the
+    estimated memory of the running items and its own fits in the budget.
+    Items are started in order, except that smaller items among the next
+    `jobs` ones may overtake an item waiting for memory. An item is always
+    started when no other item is running, whatever its estimated memory.
+    Items are only consumed as they are about to be started.
+
+    Closing the returned iterator stops starting new items, and waits for the
+    running ones.
+
+    Args:
+        items (Iterable[T]): Items.
+        function (Callable[[T], R]): Function to apply.
+        jobs (int): Maximum number of items running at once.
+        memory (Callable[[T], float]): Function returning the estimated
+            memory of an item.
+        memory_budget (float | None, optional): Maximum estimated memory of
+            the running items. Unlimited if `None`.
+
+    Yields:
+        tuple[T, R]: Each item and its result, as items complete.
+    """
+    remaining = iter(items)
+    pending: list[tuple[T, float]] = []
+    running: dict[Future[R], tuple[T, float]] = {}
+    load = 0.0
+
+    def _fits(estimate: float) -> bool:
+        return (
+            not running
+            or memory_budget is None
+            or load + estimate <= memory_budget
+        )
+
+    with ThreadPoolExecutor(jobs) as executor:
+        while True:
+            while len(running) < jobs:
+                index = next(
+                    (i for i, (_, e) in enumerate(pending) if _fits(e)), None
+                )
+                if index is None and len(pending) < jobs:
+                    try:
+                        item = next(remaining)
+                    except StopIteration:
+                        pass
+                    else:
+                        pending.append((item, memory(item)))
+                        continue
+                if index is None:
+                    break
+                item, estimate = pending.pop(index)
+                running[executor.submit(function, item)] = (item, estimate)
+                load += estimate
+
+            if not running:
+                return
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in [f for f in running if f in done]:
+                item, estimate = running.pop(future)
+                load -= estimate
+                yield item, future.result()
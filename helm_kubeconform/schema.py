@@ -0,0 +1,159 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Validation of Helm values files against the schema of a chart.
+
+This check runs in-process, before any chart is rendered, and requires the
+optional `jsonschema` and `PyYAML` packages (`helm-kubeconform[schema]`).
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import typing
+from typing import Any
+
+from helm_kubeconform.cache import path_digest
+
+try:
+    from jsonschema.exceptions import SchemaError
+    from jsonschema.validators import validator_for
+    import yaml
+
+    HAS_DEPENDENCIES = True
+except ImportError:  # pragma: no cover
+    HAS_DEPENDENCIES = False
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from jsonschema.protocols import Validator
+
+logger = logging.getLogger(__name__)
+
+# Schema file shipped by a chart
+SCHEMA_FILE = "values.schema.json"
+
+
+class ValuesError(Exception):
+    """Raised when values cannot be loaded or do not match a schema."""
+
+
+# Merge user-supplied values into chart default values, the way Helm does:
+# maps are merged recursively, and null values delete default keys
+def _coalesce(defaults: Any, values: Any) -> Any:  # noqa: ANN401
+    if not isinstance(defaults, dict) or not isinstance(values, dict):
+        return values
+
+    result = dict(defaults)
+    for key, value in values.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = _coalesce(defaults.get(key), value)
+
+    return result
+
+
+def _load_yaml(path: Path) -> Any:  # noqa: ANN401
+    try:
+        with path.open(encoding="utf-8") as file:
+            return yaml.safe_load(file) or {}
+    except (OSError, yaml.YAMLError) as ex:
+        raise ValuesError(str(ex)) from ex
+
+
+# Return the compiled schema validator and default values of a chart. Results
+# are cached per schema and default values digests, since a chart is usually
+# checked against many values files
+@functools.cache
+def _get_chart_schema(
+    schema_file: Path,
+    values_file: Path,
+    _schema_digest: str,
+    _values_digest: str | None,
+) -> tuple[Validator, Any]:
+    try:
+        schema = json.loads(schema_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as ex:
+        msg = f"invalid schema {schema_file}: {ex}"
+        raise ValuesError(msg) from ex
+
+    validator_class = validator_for(schema)
+    try:
+        validator_class.check_schema(schema)
+    except SchemaError as ex:
+        msg = f"invalid schema {schema_file}: {ex.message}"
+        raise ValuesError(msg) from ex
+    defaults = _load_yaml(values_file) if _values_digest else {}
+
+    return validator_class(schema), defaults
+
+
+def merge_values(chart_dir: Path, *values_files: Path) -> Any:  # noqa: ANN401
+    """Merge values files into the default values of a chart.
+
+    Args:
+        chart_dir (Path): Chart directory.
+        *values_files (Path): Values files, merged in the specified order.
+
+    Returns:
+        Any: The merged values, as `helm template` would compute them.
+
+    Raises:
+        ValuesError: If a values file cannot be loaded.
+    """
+    chart_values_file = chart_dir / "values.yaml"
+    values = (
+        _load_yaml(chart_values_file) if chart_values_file.is_file() else {}
+    )
+    for values_file in values_files:
+        values = _coalesce(values, _load_yaml(values_file))
+
+    return values
+
+
+def check_values(chart_dir: Path, *values_files: Path) -> None:
+    """Check values files against the schema of a chart.
+
+    Values files are merged into the chart default values in the specified
+    order, and the result is checked against the `values.schema.json` file of
+    the chart, as `helm template` would do.
+
+    Args:
+        chart_dir (Path): Chart directory. Nothing is checked if the chart
+            ships no schema.
+        *values_files (Path): Values files.
+
+    Raises:
+        ValuesError: If a values file cannot be loaded, or if the values do
+            not match the schema.
+    """
+    schema_file = chart_dir / SCHEMA_FILE
+    if not schema_file.is_file():
+        return
+
+    chart_values_file = chart_dir / "values.yaml"
+    validator, values = _get_chart_schema(
+        schema_file,
+        chart_values_file,
+        path_digest(schema_file),
+        path_digest(chart_values_file)
+        if chart_values_file.is_file()
+        else None,
+    )
+
+    for values_file in values_files:
+        values = _coalesce(values, _load_yaml(values_file))
+
+    if errors := sorted(
+        validator.iter_errors(values),
+        key=lambda e: [str(p) for p in e.absolute_path],
+    ):
+        msg = "; ".join(
+            f"{'/'.join(map(str, e.absolute_path)) or '(root)'}: {e.message}"
+            for e in errors
+        )
+        raise ValuesError(msg)
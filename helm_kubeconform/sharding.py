@@ -0,0 +1,167 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Sharding of Kubeconform validations.
+
+Kubeconform decodes its input serially, so that a single process becomes the
+bottleneck when validating tens of thousands of documents, whatever its number
+of goroutines. Rendered manifests can instead be split on document boundaries
+into shards of balanced size, validated by parallel Kubeconform processes
+whose outputs are then merged. Only the text and JSON output formats can be
+merged.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import typing
+from typing import Any
+
+from helm_kubeconform.scheduling import partition
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Sequence
+
+# Kubeconform output formats whose shard outputs can be merged
+SHARDABLE_OUTPUT_FORMATS = {"json", "text"}
+
+# Minimum average number of documents per shard. Each Kubeconform process
+# loads its own schemas, which outweighs parallel decoding for small shards.
+# The speedup of shards by number of documents per shard on a given host is
+# measured by tests/benchmark/kubeconform_shards.py (`benchmark` tox
+# environment)
+MIN_SHARD_DOCUMENTS = 1000
+
+# Document start markers, at the beginning of a line since indented lines
+# belong to block scalars
+_DOCUMENT_START_REGEX = re.compile(rb"^---(?=[ \t\r\n]|\Z)", re.MULTILINE)
+# Kubeconform summaries, reading files or stdin
+_SUMMARY_REGEX = re.compile(
+    rb"^Summary: (\d+) resources? found (?:in (\d+) files?|parsing stdin) - "
+    rb"Valid: (\d+), Invalid: (\d+), Errors: (\d+), Skipped: (\d+)\r?\n?",
+    re.MULTILINE,
+)
+_JSON_SUMMARY_KEYS = ("valid", "invalid", "errors", "skipped")
+
+
+def split_documents(manifests: bytes) -> list[bytes]:
+    """Split a YAML stream into its documents.
+
+    Args:
+        manifests (bytes): YAML stream.
+
+    Returns:
+        list[bytes]: The non-empty documents, each starting with a document
+        start marker and ending with a newline, so that they can be
+        concatenated in any order.
+    """
+    starts = [m.start() for m in _DOCUMENT_START_REGEX.finditer(manifests)]
+    bounds = [0, *(s for s in starts if s), len(manifests)]
+
+    documents = []
+    for start, end in zip(bounds, bounds[1:]):
+        document = manifests[start:end]
+        if not document.strip():
+            continue
+        if not _DOCUMENT_START_REGEX.match(document):
+            document = b"---\n" + document
+        if not document.endswith(b"\n"):
+            document += b"\n"
+        documents.append(document)
+
+    return documents
+
+
+def shard_manifests(
+    manifests: bytes, count: int, min_documents: int = MIN_SHARD_DOCUMENTS
+) -> list[bytes]:
+    """Split rendered manifests into shards of balanced size.
+
+    Args:
+        manifests (bytes): Rendered manifests.
+        count (int): Maximum number of shards.
+        min_documents (int, optional): Minimum average number of documents
+            per shard.
+
+    Returns:
+        list[bytes]: The shards, or the manifests as they are if they are too
+        small to be split.
+    """
+    documents = split_documents(manifests)
+    count = min(count, len(documents) // max(min_documents, 1))
+    if count < 2:  # noqa: PLR2004
+        return [manifests]
+
+    return [b"".join(group) for group in partition(documents, len, count)]
+
+
+# Merge Kubeconform text outputs: all lines in order, then the sum of their
+# summaries if any. Shards being read from stdin, the number of files read is
+# only kept if reported
+def _merge_text_outputs(outputs: Sequence[bytes]) -> bytes:
+    totals: list[int] | None = None
+    files: int | None = None
+    lines = []
+    for output in outputs:
+        for match in _SUMMARY_REGEX.finditer(output):
+            resources, match_files, *counts = match.groups()
+            totals = [
+                t + int(c)
+                for t, c in zip(totals or [0] * 5, [resources, *counts])
+            ]
+            if match_files is not None:
+                files = max(files or 0, int(match_files))
+        lines.append(_SUMMARY_REGEX.sub(b"", output))
+
+    if totals is not None:
+        resources, valid, invalid, errors, skipped = totals
+        source = (
+            f"in {files} file{'s' if files > 1 else ''}"
+            if files is not None
+            else "parsing stdin"
+        )
+        lines.append(
+            f"Summary: {resources} resource{'s' if resources > 1 else ''} "
+            f"found {source} - Valid: {valid}, Invalid: {invalid}, Errors: "
+            f"{errors}, Skipped: {skipped}\n".encode()
+        )
+
+    return b"".join(lines)
+
+
+# Merge Kubeconform JSON outputs: all resources in order, and the sum of their
+# summaries if any
+def _merge_json_outputs(outputs: Sequence[bytes]) -> bytes:
+    try:
+        results = [json.loads(o) for o in outputs]
+    except ValueError:
+        return b"".join(outputs)
+
+    merged: dict[str, Any] = {
+        "resources": [r for o in results for r in o.get("resources") or []]
+    }
+    if summaries := [o["summary"] for o in results if "summary" in o]:
+        merged["summary"] = {
+            k: sum(s.get(k, 0) for s in summaries) for k in _JSON_SUMMARY_KEYS
+        }
+
+    return (json.dumps(merged, indent=2) + "\n").encode()
+
+
+def merge_outputs(outputs: Sequence[bytes], output_format: str) -> bytes:
+    """Merge the outputs of Kubeconform processes validating shards.
+
+    Args:
+        outputs (Sequence[bytes]): Outputs of each shard, in shard order.
+        output_format (str): Kubeconform output format, one of
+            `SHARDABLE_OUTPUT_FORMATS`.
+
+    Returns:
+        bytes: The merged output, as if all shards were validated by a single
+        process.
+    """
+    if output_format == "json":
+        return _merge_json_outputs(outputs)
+
+    return _merge_text_outputs(outputs)
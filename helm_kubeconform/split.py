@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Split rendering of large Helm charts.
+
+`helm template --show-only` renders all templates of a chart before filtering
+its output, so it cannot be used to spread the rendering cost. Instead, a
+chart is split into partial copies, each keeping all helpers but only a group
+of templates, which can be rendered in parallel. The concatenated outputs are
+equivalent to the output of the full chart, as long as templates do not
+reference each other, which is checked beforehand.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+import logging
+import os
+from pathlib import Path
+import re
+import shutil
+import typing
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+_TEMPLATES_DIRECTORY = "templates"
+_CRDS_DIRECTORY = "crds"
+_NOTES_FILE = "NOTES.txt"
+
+# Template constructs making a template depend on other template files
+_CROSS_REFERENCE_REGEX = re.compile(
+    r"""
+    \.Template\.BasePath
+    | \.Files\.\w+\s*\(?\s*"templates/
+    | \{\{-?\s*define\s
+    """,
+    re.VERBOSE,
+)
+_DEPENDENCIES_REGEX = re.compile(r"^dependencies:\s*\S", re.MULTILINE)
+_SOURCE_REGEX = re.compile(rb"^# Source: [^/\n]+/(.+?)\r?$", re.MULTILINE)
+
+
+# Return whether a template only defines helpers, which are rendered with
+# every template group
+def _is_helper(template: str) -> bool:
+    return Path(template).name.startswith("_")
+
+
+def has_subcharts(chart_dir: Path) -> bool:
+    """Return whether a chart has subcharts, vendored or declared.
+
+    Args:
+        chart_dir (Path): Chart directory.
+
+    Returns:
+        bool: Whether the chart has subcharts.
+    """
+    chart_file = chart_dir / "Chart.yaml"
+    subcharts_dir = chart_dir / "charts"
+    return (subcharts_dir.is_dir() and any(subcharts_dir.iterdir())) or (
+        chart_file.is_file()
+        and bool(
+            _DEPENDENCIES_REGEX.search(chart_file.read_text(encoding="utf-8"))
+        )
+    )
+
+
+def find_templates(chart_dir: Path) -> list[str] | None:
+    """Return the templates of a chart, if it can be rendered split.
+
+    Args:
+        chart_dir (Path): Chart directory.
+
+    Returns:
+        list[str] | None: The paths of the chart templates rendering
+        manifests, relative to the chart directory, or `None` if the chart
+        cannot be split (subcharts, templates referencing each other...).
+    """
+    templates_dir = chart_dir / _TEMPLATES_DIRECTORY
+    if not (chart_dir / "Chart.yaml").is_file() or not templates_dir.is_dir():
+        return None
+
+    if has_subcharts(chart_dir):
+        logger.debug("Chart %s has subcharts, rendering it whole", chart_dir)
+        return None
+
+    templates = []
+    for directory, _, files in os.walk(templates_dir):
+        for file in files:
+            path = Path(directory, file)
+            template = path.relative_to(chart_dir).as_posix()
+            if _is_helper(template) or template == (
+                f"{_TEMPLATES_DIRECTORY}/{_NOTES_FILE}"
+            ):
+                continue
+            content = path.read_text(encoding="utf-8", errors="replace")
+            if _CROSS_REFERENCE_REGEX.search(content):
+                logger.debug(
+                    "Template %s references other templates, rendering chart "
+                    "%s whole",
+                    template,
+                    chart_dir,
+                )
+                return None
+            templates.append(template)
+
+    return sorted(templates)
+
+
+def create_partial_chart(
+    chart_dir: Path, destination: Path, templates: Iterable[str], primary: bool
+) -> None:
+    """Copy a chart, only keeping some templates.
+
+    Args:
+        chart_dir (Path): Chart directory.
+        destination (Path): Directory of the partial chart, which must not
+            exist.
+        templates (Iterable[str]): Templates to keep, relative to the chart
+            directory. Helpers are always kept.
+        primary (bool): Whether to keep the files rendered once per chart:
+            the `NOTES.txt` template and the CRDs.
+    """
+    kept_templates = set(templates)
+    if primary:
+        kept_templates.add(f"{_TEMPLATES_DIRECTORY}/{_NOTES_FILE}")
+
+    def _ignore(directory: str, names: list[str]) -> set[str]:
+        relative_dir = Path(directory).relative_to(chart_dir).as_posix()
+        ignored = set()
+        for name in names:
+            path = name if relative_dir == "." else f"{relative_dir}/{name}"
+            is_dropped_template = (
+                path.startswith(f"{_TEMPLATES_DIRECTORY}/")
+                and Path(directory, name).is_file()
+                and not _is_helper(path)
+                and path not in kept_templates
+            )
+            if is_dropped_template or (
+                path == _CRDS_DIRECTORY and not primary
+            ):
+                ignored.add(name)
+
+        return ignored
+
+    shutil.copytree(chart_dir, destination, ignore=_ignore)
+
+
+def get_output_sizes(manifests: bytes) -> dict[str, int]:
+    """Compute the output size of each template in a rendered chart.
+
+    Args:
+        manifests (bytes): Output of `helm template`.
+
+    Returns:
+        dict[str, int]: The size in bytes of the output of each template,
+        indexed by template path relative to the chart directory.
+    """
+    sizes: dict[str, int] = defaultdict(int)
+    matches = list(_SOURCE_REGEX.finditer(manifests))
+    for match, next_match in zip(matches, [*matches[1:], None]):
+        end = next_match.start() if next_match else len(manifests)
+        sizes[match[1].decode(errors="replace")] += end - match.start()
+
+    return dict(sizes)
@@ -0,0 +1,6 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""This file intentionally left blank."""
+
+from __future__ import annotations
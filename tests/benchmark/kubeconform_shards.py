@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Benchmark of sharded Kubeconform validations.
+
+Generated manifests of increasing sizes are validated by a single Kubeconform
+process, then split into shards validated by parallel processes, and the
+median wall-clock duration of each run is printed as a Markdown table, to find
+the number of documents per shard from which sharding pays off on a given host
+(see `helm_kubeconform.sharding.MIN_SHARD_DOCUMENTS`).
+
+Kubeconform is run from the plugin directory ($HELM_PLUGIN_DIR), unless set
+using the --kubeconform option. Extra arguments are passed to Kubeconform;
+schemas are cached in a temporary directory by default, so that they are only
+downloaded once.
+"""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser
+import os
+import statistics
+import sys
+import tempfile
+import time
+import typing
+
+import helm_kubeconform.plugin
+from helm_kubeconform.resources import ResourceUsage
+from helm_kubeconform.sharding import shard_manifests
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Sequence
+
+_DEPLOYMENT = """---
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: app-{index}
+  labels:
+    app: app-{index}
+spec:
+  replicas: 1
+  selector:
+    matchLabels:
+      app: app-{index}
+  template:
+    metadata:
+      labels:
+        app: app-{index}
+    spec:
+      containers:
+        - name: app
+          image: nginx:1.27
+          ports:
+            - containerPort: 80
+          resources:
+            limits:
+              cpu: 100m
+              memory: 128Mi
+"""
+
+
+def _generate_manifests(documents: int) -> bytes:
+    return "".join(
+        _DEPLOYMENT.format(index=i) for i in range(documents)
+    ).encode()
+
+
+def _run(
+    manifests: bytes, shards: int, kubeconform_args: Sequence[str]
+) -> float:
+    start_time = time.perf_counter()
+    result, output = helm_kubeconform.plugin._validate_shards(  # noqa: SLF001
+        shard_manifests(manifests, shards, min_documents=1),
+        kubeconform_args,
+        ResourceUsage(),
+    )
+    duration = time.perf_counter() - start_time
+    if result:
+        sys.stderr.write(output.decode(errors="replace"))
+        msg = f"Kubeconform failed with status {result}"
+        raise RuntimeError(msg)
+
+    return duration
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--documents",
+        default=[500, 1000, 2000, 5000, 20000, 50000],
+        type=_int_list,
+        help="comma-separated numbers of documents to validate",
+    )
+    parser.add_argument(
+        "--shards",
+        default=[1, 2, 4, 8],
+        type=_int_list,
+        help="comma-separated numbers of shards",
+    )
+    parser.add_argument(
+        "--repeat", default=3, type=int, help="runs per measure"
+    )
+    parser.add_argument(
+        "--kubeconform",
+        default=helm_kubeconform.plugin.KUBECONFORM_BIN,
+        help="Kubeconform binary",
+    )
+    args, kubeconform_args = parser.parse_known_args(argv)
+    helm_kubeconform.plugin.KUBECONFORM_BIN = args.kubeconform
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        kubeconform_args = kubeconform_args or ["-cache", cache_dir]
+        # Warm up the schema cache
+        _run(_generate_manifests(1), 1, kubeconform_args)
+
+        sys.stdout.write(
+            f"{os.cpu_count()} CPUs, Kubeconform {' '.join(kubeconform_args)}"
+            "\n\n| Documents | Shards | Documents per shard | Duration (s) "
+            "| Speedup |\n|---:|---:|---:|---:|---:|\n"
+        )
+        for documents in args.documents:
+            manifests = _generate_manifests(documents)
+            baseline = None
+            for shards in args.shards:
+                duration = statistics.median(
+                    _run(manifests, shards, kubeconform_args)
+                    for _ in range(args.repeat)
+                )
+                baseline = baseline or duration
+                sys.stdout.write(
+                    f"| {documents} | {shards} | {documents // shards} | "
+                    f"{duration:.3f} | {baseline / duration:.2f} |\n"
+                )
+                sys.stdout.flush()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,215 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import asyncio
+from io import BytesIO
+from pathlib import Path
+from subprocess import CalledProcessError
+from subprocess import CompletedProcess
+import tempfile
+import threading
+import time
+import typing
+from unittest import TestCase
+import unittest.mock
+
+import helm_kubeconform.api
+import helm_kubeconform.cache
+import helm_kubeconform.capabilities
+import helm_kubeconform.plugin
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+# Return a completed `helm template` process
+def _rendered(manifests: bytes) -> CompletedProcess[bytes]:
+    return CompletedProcess([], 0, manifests, b"")
+
+
+# Return a Kubeconform process streaming its output
+def _kubeconform(
+    returncode: int = 0, stdout: bytes = b""
+) -> unittest.mock.MagicMock:
+    process = unittest.mock.MagicMock(returncode=returncode)
+    process.__enter__.return_value = process
+    process.stdout = BytesIO(stdout)
+    return process
+
+
+class TestAPI(TestCase):
+    def setUp(self: Self) -> None:
+        run_measured_patch = unittest.mock.patch(
+            "helm_kubeconform.plugin.run_measured"
+        )
+        self.run_measured_mock = run_measured_patch.start()
+        self.addCleanup(run_measured_patch.stop)
+
+        popen_patch = unittest.mock.patch(
+            "helm_kubeconform.plugin.MeasuredPopen"
+        )
+        self.popen_mock = popen_patch.start()
+        self.addCleanup(popen_patch.stop)
+
+    def test_validate_many(self: Self) -> None:
+        targets = [
+            helm_kubeconform.api.Target(
+                "chart1",
+                values=("values1.yaml", "values2.yaml"),
+                helm_template_args=("--namespace", "test"),
+                kubeconform_args=("-strict",),
+            ),
+            helm_kubeconform.api.Target("chart2"),
+            helm_kubeconform.api.Target("chart3"),
+        ]
+        self.run_measured_mock.side_effect = [
+            _rendered(b"manifests1"),
+            CalledProcessError(1, [], b"", b"Error: parse error\n"),
+            _rendered(b"manifests3"),
+        ]
+        self.popen_mock.side_effect = [
+            _kubeconform(stdout=b"stdin - Service is valid\n"),
+            _kubeconform(1, b"stdin - Service is invalid\n"),
+        ]
+
+        results = asyncio.run(
+            helm_kubeconform.api.validate_many(targets, concurrency=1)
+        )
+
+        self.assertEqual([r.target for r in results], targets)
+        self.assertEqual([r.returncode for r in results], [0, 1, 1])
+        self.assertEqual([r.success for r in results], [True, False, False])
+        self.assertEqual(
+            [r.output for r in results],
+            [
+                "stdin - Service is valid\n",
+                "Error: parse error\n",
+                "stdin - Service is invalid\n",
+            ],
+        )
+        self.assertTrue(all(r.render_time >= 0 for r in results))
+        self.assertEqual(results[1].validation_time, 0)
+        self.assertFalse(any(r.cached for r in results))
+        self.run_measured_mock.assert_any_call(
+            [
+                helm_kubeconform.plugin.HELM_BIN,
+                "template",
+                "--namespace",
+                "test",
+                "--values",
+                "values1.yaml",
+                "--values",
+                "values2.yaml",
+                "chart1",
+            ],
+            unittest.mock.ANY,
+            capture_output=True,
+            check=True,
+        )
+        self.popen_mock.assert_any_call(
+            [helm_kubeconform.plugin.KUBECONFORM_BIN, "-strict"],
+            unittest.mock.ANY,
+            stdin=unittest.mock.ANY,
+            stdout=unittest.mock.ANY,
+        )
+
+    def test_validate_cache(self: Self) -> None:
+        target = helm_kubeconform.api.Target("chart")
+        self.run_measured_mock.side_effect = [
+            _rendered(b"manifests"),
+            CompletedProcess([], 0, b"stdin - Service is valid\n"),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = helm_kubeconform.cache.DirectoryCache(Path(tmp_dir))
+
+            results = [
+                asyncio.run(helm_kubeconform.api.validate(target, cache=cache))
+                for _ in range(2)
+            ]
+
+        self.assertEqual(self.run_measured_mock.call_count, 2)
+        self.assertEqual([r.cached for r in results], [False, True])
+        self.assertEqual(
+            [r.output for r in results], ["stdin - Service is valid\n"] * 2
+        )
+
+    def test_validate_capabilities(self: Self) -> None:
+        self.run_measured_mock.return_value = _rendered(b"manifests")
+        self.popen_mock.return_value = _kubeconform()
+
+        asyncio.run(
+            helm_kubeconform.api.validate(
+                helm_kubeconform.api.Target("chart"),
+                capabilities=helm_kubeconform.capabilities.Capabilities(
+                    ["example.com/v1"], "v1.30.2-eks"
+                ),
+            )
+        )
+
+        self.run_measured_mock.assert_called_once_with(
+            [
+                helm_kubeconform.plugin.HELM_BIN,
+                "template",
+                "--api-versions",
+                "example.com/v1",
+                "--kube-version",
+                "1.30.2",
+                "chart",
+            ],
+            unittest.mock.ANY,
+            capture_output=True,
+            check=True,
+        )
+        self.popen_mock.assert_called_once_with(
+            [
+                helm_kubeconform.plugin.KUBECONFORM_BIN,
+                "-kubernetes-version",
+                "1.30.2",
+            ],
+            unittest.mock.ANY,
+            stdin=unittest.mock.ANY,
+            stdout=unittest.mock.ANY,
+        )
+
+    def test_validate_many_failure(self: Self) -> None:
+        released = threading.Event()
+
+        def _run_measured(
+            command: list[str], *_args: object, **_kwargs: object
+        ) -> CompletedProcess[bytes]:
+            if command[-1] == "chart1":
+                raise FileNotFoundError(2, "helm")
+            released.wait(5)
+            return _rendered(b"manifests")
+
+        self.run_measured_mock.side_effect = _run_measured
+        self.popen_mock.return_value = _kubeconform()
+
+        async def _validate_many() -> None:
+            start_time = time.perf_counter()
+            with self.assertRaises(FileNotFoundError):
+                await helm_kubeconform.api.validate_many(
+                    [
+                        helm_kubeconform.api.Target("chart1"),
+                        helm_kubeconform.api.Target("chart2"),
+                    ],
+                    concurrency=2,
+                )
+            # The running validation is not waited for
+            self.assertLess(time.perf_counter() - start_time, 2)
+            released.set()
+
+        asyncio.run(_validate_many())
+
+    def test_validate_missing_executable(self: Self) -> None:
+        self.run_measured_mock.side_effect = FileNotFoundError(2, "helm")
+
+        with self.assertRaises(FileNotFoundError):
+            asyncio.run(
+                helm_kubeconform.api.validate(
+                    helm_kubeconform.api.Target("chart")
+                )
+            )
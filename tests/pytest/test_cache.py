@@ -0,0 +1,221 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+import tempfile
+import threading
+import typing
+from unittest import TestCase
+
+import helm_kubeconform.cache
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+# Minimal HTTP store, standing in for a shared remote cache
+class _StoreHandler(BaseHTTPRequestHandler):
+    store: typing.ClassVar[dict[str, bytes]] = {}
+
+    def do_GET(self: Self) -> None:  # noqa: N802
+        if self.path.endswith("/error"):
+            self.send_error(500)
+            return
+
+        if (data := self.store.get(self.path)) is None:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self: Self) -> None:  # noqa: N802
+        length = int(self.headers["Content-Length"])
+        self.store[self.path] = self.rfile.read(length)
+        self.send_response(201)
+        self.end_headers()
+
+    def log_message(self: Self, *_args: object) -> None:
+        pass
+
+
+class TestDirectoryCache(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.directory = Path(tmp_dir.name, "cache")
+
+    def test_get_put(self: Self) -> None:
+        cache = helm_kubeconform.cache.DirectoryCache(self.directory)
+
+        self.assertIsNone(cache.get("abcdef"))
+        cache.put("abcdef", b"data")
+        self.assertEqual(cache.get("abcdef"), b"data")
+        self.assertTrue((self.directory / "ab" / "abcdef").is_file())
+
+    def test_shared_directory(self: Self) -> None:
+        helm_kubeconform.cache.DirectoryCache(self.directory).put(
+            "abcdef", b"data"
+        )
+
+        self.assertEqual(
+            helm_kubeconform.cache.DirectoryCache(self.directory).get(
+                "abcdef"
+            ),
+            b"data",
+        )
+
+    def test_write_failure(self: Self) -> None:
+        self.directory.write_text("not a directory")
+        cache = helm_kubeconform.cache.DirectoryCache(self.directory)
+
+        with self.assertLogs(level="WARNING") as context_manager:
+            cache.put("abcdef", b"data")
+            self.assertIsNone(cache.get("abcdef"))
+
+        self.assertIn(
+            "Unable to write cache entry abcdef", context_manager.output[0]
+        )
+        self.assertIn(
+            "Unable to read cache entry abcdef", context_manager.output[1]
+        )
+
+
+class TestHTTPCache(TestCase):
+    def setUp(self: Self) -> None:
+        _StoreHandler.store = {}
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StoreHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f"http://127.0.0.1:{server.server_address[1]}/prefix/"
+
+    def test_get_put(self: Self) -> None:
+        cache = helm_kubeconform.cache.HTTPCache(self.url)
+
+        self.assertIsNone(cache.get("abcdef"))
+        cache.put("abcdef", b"data")
+        self.assertEqual(cache.get("abcdef"), b"data")
+        self.assertEqual(_StoreHandler.store, {"/prefix/abcdef": b"data"})
+
+    def test_server_error(self: Self) -> None:
+        cache = helm_kubeconform.cache.HTTPCache(self.url)
+
+        with self.assertLogs(level="WARNING") as context_manager:
+            self.assertIsNone(cache.get("error"))
+
+        self.assertIn(
+            "Unable to read cache entry error", context_manager.output[0]
+        )
+
+    def test_unreachable_store(self: Self) -> None:
+        cache = helm_kubeconform.cache.HTTPCache(
+            "http://127.0.0.1:1", timeout=1
+        )
+
+        with self.assertLogs(level="WARNING") as context_manager:
+            self.assertIsNone(cache.get("abcdef"))
+            cache.put("abcdef", b"data")
+
+        self.assertEqual(len(context_manager.output), 2)
+
+
+class TestOpenCache(TestCase):
+    def test_locations(self: Self) -> None:
+        test_args = [
+            ("http://cache.example/store", helm_kubeconform.cache.HTTPCache),
+            ("https://cache.example", helm_kubeconform.cache.HTTPCache),
+            ("file:///var/cache", helm_kubeconform.cache.DirectoryCache),
+            ("/var/cache", helm_kubeconform.cache.DirectoryCache),
+            ("cache", helm_kubeconform.cache.DirectoryCache),
+        ]
+
+        for location, cache_class in test_args:
+            with self.subTest(location=location):
+                self.assertIsInstance(
+                    helm_kubeconform.cache.open_cache(location), cache_class
+                )
+
+
+class TestDigest(TestCase):
+    def test_digest(self: Self) -> None:
+        self.assertEqual(
+            helm_kubeconform.cache.digest("a", b"b"),
+            helm_kubeconform.cache.digest(b"a", "b"),
+        )
+        self.assertNotEqual(
+            helm_kubeconform.cache.digest("ab", "c"),
+            helm_kubeconform.cache.digest("a", "bc"),
+        )
+
+    def test_path_digest(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for content in ("v1", "v2"):
+                chart_dir = Path(tmp_dir, content)
+                (chart_dir / "templates").mkdir(parents=True)
+                (chart_dir / "Chart.yaml").write_text("name: chart")
+                (chart_dir / "templates" / "a.yaml").write_text(content)
+
+            self.assertNotEqual(
+                helm_kubeconform.cache.path_digest(Path(tmp_dir, "v1")),
+                helm_kubeconform.cache.path_digest(Path(tmp_dir, "v2")),
+            )
+            self.assertEqual(
+                helm_kubeconform.cache.path_digest(
+                    Path(tmp_dir, "v1", "Chart.yaml")
+                ),
+                helm_kubeconform.cache.path_digest(
+                    Path(tmp_dir, "v2", "Chart.yaml")
+                ),
+            )
+
+            # Digests are computed again once files are modified, unless
+            # memoized for the current run
+            chart_dir = Path(tmp_dir, "v1")
+            digest = helm_kubeconform.cache.path_digest(chart_dir)
+            memo: dict[Path, str] = {}
+            self.assertEqual(
+                helm_kubeconform.cache.path_digest(chart_dir, memo=memo),
+                digest,
+            )
+            (chart_dir / "templates" / "a.yaml").write_text("v3")
+            self.assertNotEqual(
+                helm_kubeconform.cache.path_digest(chart_dir), digest
+            )
+            self.assertEqual(
+                helm_kubeconform.cache.path_digest(chart_dir, memo=memo),
+                digest,
+            )
+
+
+class TestWriteAtomically(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.directory = Path(tmp_dir.name)
+
+    def test_write_atomically(self: Self) -> None:
+        path = self.directory / "subdir" / "file"
+
+        helm_kubeconform.cache.write_atomically(path, b"data1")
+        helm_kubeconform.cache.write_atomically(path, b"data2")
+
+        self.assertEqual(path.read_bytes(), b"data2")
+        self.assertEqual(list(path.parent.iterdir()), [path])
+
+    def test_write_failure(self: Self) -> None:
+        # A non-empty directory cannot be replaced by a file
+        path = self.directory / "file"
+        (path / "subdir").mkdir(parents=True)
+
+        with self.assertRaises(OSError):
+            helm_kubeconform.cache.write_atomically(path, b"data")
+
+        # The temporary file is removed
+        self.assertEqual(list(self.directory.iterdir()), [path])
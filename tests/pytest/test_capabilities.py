@@ -0,0 +1,133 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import tempfile
+import typing
+from unittest import TestCase
+import unittest.mock
+
+import helm_kubeconform.capabilities
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestCapabilities(TestCase):
+    def setUp(self: Self) -> None:
+        subprocess_patch = unittest.mock.patch(
+            "helm_kubeconform.capabilities.subprocess"
+        )
+        self.subprocess_mock = subprocess_patch.start()
+        self.addCleanup(subprocess_patch.stop)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.snapshot = Path(tmp_dir.name, "snapshots", "capabilities.json")
+
+    def test_capture(self: Self) -> None:
+        def _run(command: list[str], **_kwargs: object) -> unittest.mock.Mock:
+            template = Path(command[3], "templates", "capabilities.yaml")
+            self.assertIn(".Capabilities.APIVersions", template.read_text())
+            return unittest.mock.Mock(
+                returncode=0,
+                stdout="---\n"
+                "# Source: capabilities/templates/capabilities.yaml"
+                '\n# {"apiVersions":["v1","apps/v1/Deployment"],'
+                '"kubeVersion":"v1.29.4-eks-036c24b"}\n',
+            )
+
+        self.subprocess_mock.run.side_effect = _run
+
+        capabilities = helm_kubeconform.capabilities.capture(
+            "helm", ["--kube-context", "prod"]
+        )
+
+        self.assertEqual(
+            capabilities.api_versions, ["v1", "apps/v1/Deployment"]
+        )
+        self.assertEqual(capabilities.kube_version, "v1.29.4-eks-036c24b")
+        self.assertEqual(capabilities.release_version, "1.29.4")
+        command = self.subprocess_mock.run.call_args.args[0]
+        self.assertEqual(command[:3], ["helm", "template", "capabilities"])
+        self.assertEqual(command[4:], ["--validate", "--kube-context", "prod"])
+
+    def test_capture_failure(self: Self) -> None:
+        for stdout, returncode, message in (
+            ("", 1, "Kubernetes cluster unreachable"),
+            ("---\n", 0, "no capabilities found"),
+        ):
+            with self.subTest(message=message):
+                self.subprocess_mock.run.return_value = unittest.mock.Mock(
+                    returncode=returncode,
+                    stdout=stdout,
+                    stderr="Error: Kubernetes cluster unreachable\n",
+                )
+
+                with self.assertRaisesRegex(
+                    helm_kubeconform.capabilities.CapabilitiesError, message
+                ):
+                    helm_kubeconform.capabilities.capture("helm")
+
+    def test_capture_errors(self: Self) -> None:
+        for side_effect, message in (
+            (FileNotFoundError(2, "No such file or directory"), "No such"),
+            (
+                unittest.mock.Mock(
+                    returncode=0,
+                    stdout="---\n# Source: capabilities/templates/"
+                    'capabilities.yaml\n# {"apiVersions": [}\n',
+                ),
+                "invalid capabilities",
+            ),
+            (
+                unittest.mock.Mock(
+                    returncode=0,
+                    stdout="---\n# Source: capabilities/templates/"
+                    'capabilities.yaml\n# {"apiVersions": []}\n',
+                ),
+                "invalid capabilities",
+            ),
+        ):
+            with self.subTest(message=message):
+                self.subprocess_mock.run.side_effect = [side_effect]
+
+                with self.assertRaisesRegex(
+                    helm_kubeconform.capabilities.CapabilitiesError, message
+                ):
+                    helm_kubeconform.capabilities.capture("helm")
+
+    def test_save_load(self: Self) -> None:
+        capabilities = helm_kubeconform.capabilities.Capabilities(
+            ["v1", "apps/v1"], "v1.30.0"
+        )
+
+        capabilities.save(self.snapshot)
+
+        self.assertEqual(
+            json.loads(self.snapshot.read_text()),
+            {"apiVersions": ["apps/v1", "v1"], "kubeVersion": "v1.30.0"},
+        )
+        self.assertEqual(
+            helm_kubeconform.capabilities.Capabilities.load(self.snapshot),
+            helm_kubeconform.capabilities.Capabilities(
+                ["apps/v1", "v1"], "v1.30.0"
+            ),
+        )
+
+    def test_load_failure(self: Self) -> None:
+        for content in (None, "{", '{"apiVersions": []}'):
+            with self.subTest(content=content):
+                if content is not None:
+                    self.snapshot.parent.mkdir(exist_ok=True)
+                    self.snapshot.write_text(content)
+
+                with self.assertRaises(
+                    helm_kubeconform.capabilities.CapabilitiesError
+                ):
+                    helm_kubeconform.capabilities.Capabilities.load(
+                        self.snapshot
+                    )
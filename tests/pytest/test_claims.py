@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import tempfile
+import threading
+import typing
+from unittest import TestCase
+import unittest.mock
+
+import helm_kubeconform.claims
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestClaimRegistry(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.directory = Path(tmp_dir.name, "claims")
+        self.registry = helm_kubeconform.claims.ClaimRegistry(self.directory)
+
+    def test_claim(self: Self) -> None:
+        with self.registry.claim("key") as claim:
+            self.assertIsNone(claim.result)
+            claim.publish(1)
+
+        # Results are only reused by processes waiting for the claim
+        with self.registry.claim("key") as claim:
+            self.assertIsNone(claim.result)
+            self.assertFalse((self.directory / "key.json").exists())
+
+        with self.registry.claim("other") as claim:
+            self.assertIsNone(claim.result)
+
+    def test_concurrent_claims(self: Self) -> None:
+        results = []
+
+        def _claim() -> None:
+            with self.registry.claim("key") as claim:
+                results.append(claim.result)
+
+        with self.registry.claim("key") as claim:
+            thread = threading.Thread(target=_claim)
+            thread.start()
+            # The other claim waits for this one to be released
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive())
+            claim.publish(0)
+        thread.join()
+
+        self.assertEqual(results, [0])
+
+    def test_invalid_result(self: Self) -> None:
+        results = []
+
+        def _claim() -> None:
+            with self.registry.claim("key") as claim:
+                results.append(claim.result)
+
+        with self.assertLogs(level="WARNING") as context_manager:
+            with self.registry.claim("key"):
+                thread = threading.Thread(target=_claim)
+                thread.start()
+                thread.join(0.2)
+                (self.directory / "key.json").write_text("{invalid")
+            thread.join()
+
+        self.assertEqual(results, [None])
+        self.assertIn("Unable to read result", context_manager.output[0])
+
+    def test_prune(self: Self) -> None:
+        for key in ("old", "recent", "held"):
+            with self.registry.claim(key) as claim:
+                claim.publish(0)
+        for path in self.directory.glob("[oh]*"):
+            os.utime(path, (0, 0))
+
+        with self.registry.claim("held"):
+            self.registry.prune()
+
+        self.assertEqual(
+            sorted(p.name for p in self.directory.iterdir()),
+            ["held.lock", "recent.json", "recent.lock"],
+        )
+
+        # Unused entries are removed by the first claim of a registry
+        os.utime(self.directory / "held.lock", (0, 0))
+        registry = helm_kubeconform.claims.ClaimRegistry(self.directory)
+        with registry.claim("recent"):
+            pass
+
+        self.assertEqual(
+            sorted(p.name for p in self.directory.iterdir()), ["recent.lock"]
+        )
+
+    def test_pruned_lock_file(self: Self) -> None:
+        try_lock = helm_kubeconform.claims._try_lock  # noqa: SLF001
+        lock_file = self.directory / "key.lock"
+        removed: list[Path] = []
+
+        # Simulate the removal of the lock file by another process while
+        # being locked
+        def _try_lock(file: typing.IO[bytes]) -> bool:
+            if not removed:
+                lock_file.unlink()
+                removed.append(lock_file)
+            return try_lock(file)
+
+        with (
+            unittest.mock.patch(
+                "helm_kubeconform.claims._try_lock", side_effect=_try_lock
+            ) as try_lock_mock,
+            self.registry.claim("key") as claim,
+        ):
+            self.assertIsNone(claim.result)
+            self.assertTrue(lock_file.exists())
+
+        self.assertEqual(try_lock_mock.call_count, 2)
+
+    def test_unavailable_directory(self: Self) -> None:
+        self.directory.write_text("not a directory")
+
+        with (
+            self.assertLogs(level="WARNING") as context_manager,
+            self.registry.claim("key") as claim,
+        ):
+            self.assertIsNone(claim.result)
+            claim.publish(0)
+
+        self.assertEqual(claim.result, 0)
+        self.assertIn("Unable to create lock file", context_manager.output[0])
+
+    def test_publish_failure(self: Self) -> None:
+        with (
+            self.assertLogs(level="WARNING") as context_manager,
+            self.registry.claim("key") as claim,
+        ):
+            (self.directory / "key.json").mkdir()
+            claim.publish(0)
+
+        self.assertIn("Unable to publish result", context_manager.output[0])
@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import io
+from pathlib import Path
+import tempfile
+import typing
+from unittest import TestCase
+import unittest.mock
+
+import helm_kubeconform.discovery
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestFindCharts(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+
+    def _create(self: Self, *files: str) -> None:
+        for file in files:
+            path = self.root / file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+
+    def test_find_charts(self: Self) -> None:
+        self._create(
+            "Chart.yaml",
+            "charts/vendored/Chart.yaml",
+            "apps/app1/Chart.yaml",
+            "apps/app1/templates/deployment.yaml",
+            "apps/app1/charts/vendored/Chart.yaml",
+            "apps/app2/chart/Chart.yaml",
+            "apps/app2/Chart.yaml/not-a-file",
+            ".git/Chart.yaml",
+        )
+
+        self.assertEqual(
+            helm_kubeconform.discovery.find_charts(self.root),
+            [
+                self.root,
+                self.root / "apps/app1",
+                self.root / "apps/app2/chart",
+            ],
+        )
+
+    def test_ignore_files(self: Self) -> None:
+        self._create(
+            "build/Chart.yaml",
+            "apps/build/Chart.yaml",
+            "apps/tmp-chart/Chart.yaml",
+            "apps/tmp-kept/Chart.yaml",
+            "apps/app/Chart.yaml",
+            "apps/app/examples/example/Chart.yaml",
+            "apps/app/ci/nested/Chart.yaml",
+            "vendor/app/Chart.yaml",
+        )
+        (self.root / ".gitignore").write_text(
+            "# Comment\n\nbuild/\n/vendor\napps/tmp-*\n!apps/tmp-kept\n"
+        )
+        (self.root / "apps/app/.helmignore").write_text("examples\nci/**\n")
+
+        self.assertEqual(
+            helm_kubeconform.discovery.find_charts(self.root),
+            [self.root / "apps/app", self.root / "apps/tmp-kept"],
+        )
+
+    def test_unreadable_directory(self: Self) -> None:
+        with self.assertLogs(level="WARNING") as context_manager:
+            charts = helm_kubeconform.discovery.find_charts(
+                self.root / "missing"
+            )
+
+        self.assertEqual(charts, [])
+        self.assertIn("Unable to read directory", context_manager.output[0])
+
+
+class TestReadPaths(TestCase):
+    def test_read_paths(self: Self) -> None:
+        test_args = [
+            (b"a\0b c\0\0d\ne\0", ["a", "b c", "d\ne"]),
+            (b"a\r\nb c\n\nd", ["a", "b c", "d"]),
+            (b"", []),
+        ]
+
+        for content, paths in test_args:
+            with self.subTest(content=content):
+                self.assertEqual(
+                    list(
+                        helm_kubeconform.discovery.read_paths(
+                            io.BytesIO(content)
+                        )
+                    ),
+                    [Path(p) for p in paths],
+                )
+
+    def test_read_paths_chunks(self: Self) -> None:
+        # The first chunk ends in the middle of the first entry
+        file = unittest.mock.Mock()
+        file.read1.side_effect = [
+            b"charts/a",
+            b"/Chart.yaml\0charts/b/values.yaml\0",
+            b"charts/c\nd/Chart.yaml",
+            b"",
+        ]
+
+        self.assertEqual(
+            list(helm_kubeconform.discovery.read_paths(file)),
+            [
+                Path("charts/a/Chart.yaml"),
+                Path("charts/b/values.yaml"),
+                Path("charts/c\nd/Chart.yaml"),
+            ],
+        )
+
+
+class TestIgnoreRules(TestCase):
+    def test_patterns(self: Self) -> None:
+        root = Path("root")
+        test_args = [
+            ("*.tgz", "a/b/chart.tgz", False, True),
+            ("*.tgz", "a/b/chart.tar", False, False),
+            ("/a", "a", True, True),
+            ("/a", "b/a", True, False),
+            ("a/*/c", "a/b/c", True, True),
+            ("a/*/c", "a/b/d/c", True, False),
+            ("a/**/c", "a/b/d/c", True, True),
+            ("**/c", "a/b/c", True, True),
+            ("a/**", "a/b/c", False, True),
+            ("dir/", "dir", False, False),
+            ("dir/", "x/dir", True, True),
+            ("file?.yaml", "file1.yaml", False, True),
+            ("file[0-9].yaml", "filea.yaml", False, False),
+            ("file[!0-9].yaml", "filea.yaml", False, True),
+            ("\\#file", "#file", False, True),
+        ]
+
+        for pattern, path, is_directory, ignored in test_args:
+            with self.subTest(pattern=pattern, path=path):
+                rules = helm_kubeconform.discovery.IgnoreRules(root, [pattern])
+                self.assertEqual(
+                    rules.ignored(root / path, is_directory), ignored
+                )
+
+    def test_nested_rules(self: Self) -> None:
+        root = Path("root")
+        parent = helm_kubeconform.discovery.IgnoreRules(root, ["*.yaml"])
+        rules = helm_kubeconform.discovery.IgnoreRules(
+            root / "chart", ["!values.yaml"], parent
+        )
+
+        self.assertTrue(rules.ignored(root / "chart/other.yaml", False))
+        self.assertFalse(rules.ignored(root / "chart/values.yaml", False))
@@ -0,0 +1,150 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from pathlib import Path
+import tempfile
+import typing
+import unittest
+from unittest import TestCase
+
+import helm_kubeconform.equivalence
+import helm_kubeconform.schema
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+HELPERS = """
+{{/* Labels, ignoring {{ if .Values.comment }} */}}
+{{- define "chart.fullname" -}}
+{{- if .Values.fullnameOverride }}{{ .Values.fullnameOverride }}
+{{- else }}{{ .Release.Name }}{{ end }}
+{{- end }}
+"""
+DEPLOYMENT = """
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: {{ include "chart.fullname" . }}
+  annotations:
+    host: {{ .Values.ingress.host | quote }}
+spec:
+  replicas: {{ .Values.replicaCount }}
+  template:
+    spec:
+      containers:
+        - name: app
+          image: "{{ .Values.image.repository }}:{{ .Values.image.tag }}"
+          {{- with .Values.resources }}
+          resources: {{- toYaml . | nindent 12 }}
+          {{- end }}
+          {{- $root := . }}
+          env:
+            {{- range $name := $root.Values.env }}
+            - name: {{ $name }}
+            {{- end }}
+"""
+
+
+class TestEquivalence(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.chart_dir = self.root / "chart"
+        (self.chart_dir / "templates").mkdir(parents=True)
+        (self.chart_dir / "Chart.yaml").write_text("name: chart")
+        (self.chart_dir / "values.yaml").write_text(
+            "replicaCount: 1\nimage:\n  repository: nginx\n  tag: latest\n"
+        )
+        (self.chart_dir / "templates" / "_helpers.tpl").write_text(HELPERS)
+        (self.chart_dir / "templates" / "deployment.yaml").write_text(
+            DEPLOYMENT
+        )
+
+    def _values_file(self: Self, name: str, content: str) -> Path:
+        path = self.root / name
+        path.write_text(content)
+        return path
+
+    def test_find_structural_paths(self: Self) -> None:
+        self.assertEqual(
+            helm_kubeconform.equivalence.find_structural_paths(self.chart_dir),
+            {("fullnameOverride",), ("resources",), ("env",)},
+        )
+
+        (self.chart_dir / "charts" / "common").mkdir(parents=True)
+        self.assertIsNone(
+            helm_kubeconform.equivalence.find_structural_paths(self.chart_dir)
+        )
+
+    @unittest.skipUnless(
+        helm_kubeconform.schema.HAS_DEPENDENCIES,
+        "jsonschema and PyYAML required",
+    )
+    def test_group_values_files(self: Self) -> None:
+        values_files = [
+            self._values_file("dev.yaml", "ingress:\n  host: dev.example"),
+            self._values_file("prod.yaml", "ingress:\n  host: prod.example"),
+            self._values_file(
+                "scaled.yaml",
+                "ingress:\n  host: x.example\nreplicaCount: 3\n"
+                "image:\n  tag: v1",
+            ),
+            self._values_file(
+                "resources.yaml",
+                "ingress:\n  host: dev.example\nresources:\n  cpu: 1",
+            ),
+            self._values_file(
+                "typed.yaml", "ingress:\n  host: dev.example\nreplicaCount: x"
+            ),
+            self._values_file("invalid.yaml", "ingress: [invalid"),
+            self._values_file(
+                "override.yaml",
+                "fullnameOverride: app\ningress:\n  host: prod.example",
+            ),
+            self._values_file(
+                "override-host.yaml", "fullnameOverride: app\nimage: null"
+            ),
+        ]
+
+        self.assertEqual(
+            helm_kubeconform.equivalence.group_values_files(
+                self.chart_dir, values_files
+            ),
+            [
+                values_files[0:3],
+                [values_files[3]],
+                [values_files[4]],
+                [values_files[5]],
+                [values_files[6]],
+                [values_files[7]],
+            ],
+        )
+
+        # Extra values files are merged beforehand
+        self.assertEqual(
+            helm_kubeconform.equivalence.group_values_files(
+                self.chart_dir,
+                [values_files[0], values_files[6]],
+                [self._values_file("extra.yaml", "fullnameOverride: app")],
+            ),
+            [[values_files[0], values_files[6]]],
+        )
+
+    def test_group_values_files_unanalyzable(self: Self) -> None:
+        (self.chart_dir / "Chart.yaml").write_text(
+            "name: chart\ndependencies:\n  - name: common\n"
+        )
+        values_files = [
+            self._values_file("dev.yaml", "ingress:\n  host: dev.example"),
+            self._values_file("prod.yaml", "ingress:\n  host: prod.example"),
+        ]
+
+        self.assertEqual(
+            helm_kubeconform.equivalence.group_values_files(
+                self.chart_dir, values_files
+            ),
+            [[values_files[0]], [values_files[1]]],
+        )
@@ -0,0 +1,148 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sqlite3
+import tempfile
+import time
+import typing
+from unittest import TestCase
+import unittest.mock
+
+import helm_kubeconform.cache
+import helm_kubeconform.fingerprints
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestFingerprintIndex(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.index_path = self.tmp_dir / "index" / "fingerprints.db"
+
+        self.file = self.tmp_dir / "values.yaml"
+        self._write(self.file, "replicas: 1")
+
+        file_digest_patch = unittest.mock.patch(
+            "helm_kubeconform.fingerprints.file_digest",
+            wraps=helm_kubeconform.cache.file_digest,
+        )
+        self.file_digest_mock = file_digest_patch.start()
+        self.addCleanup(file_digest_patch.stop)
+
+    # Write a file, modified long enough ago for its digest to be recorded
+    def _write(self: Self, path: Path, content: str, age: int = 60) -> None:
+        path.write_text(content)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+
+    def _open(self: Self) -> helm_kubeconform.fingerprints.FingerprintIndex:
+        index = helm_kubeconform.fingerprints.FingerprintIndex(self.index_path)
+        self.addCleanup(index.close)
+        return index
+
+    def test_file_digest(self: Self) -> None:
+        digest = helm_kubeconform.cache.file_digest(self.file)
+
+        index = self._open()
+        self.assertEqual(index.file_digest(self.file), digest)
+        self.assertEqual(index.file_digest(self.file), digest)
+        self.assertEqual(self.file_digest_mock.call_count, 1)
+        index.close()
+
+        # Unchanged files are not hashed again by later runs
+        index = self._open()
+        self.assertEqual(index.file_digest(self.file), digest)
+        self.assertEqual(self.file_digest_mock.call_count, 1)
+
+        # Files are hashed again once their size or modification time change
+        self._write(self.file, "replicas: 10", age=120)
+        self.assertEqual(
+            index.file_digest(self.file),
+            helm_kubeconform.cache.file_digest(self.file),
+        )
+        self.assertEqual(self.file_digest_mock.call_count, 2)
+
+    def test_recently_modified_file(self: Self) -> None:
+        self._write(self.file, "replicas: 1", age=0)
+
+        index = self._open()
+        index.file_digest(self.file)
+        index.close()
+
+        index = self._open()
+        index.file_digest(self.file)
+        self.assertEqual(self.file_digest_mock.call_count, 2)
+
+    def test_snapshots(self: Self) -> None:
+        digest1 = helm_kubeconform.cache.digest("v1")
+        digest2 = helm_kubeconform.cache.digest("v2")
+
+        index = self._open()
+        self.assertTrue(index.changed("chart", digest1))
+        index.record("chart", digest1)
+        self.assertFalse(index.changed("chart", digest1))
+        index.close()
+
+        index = self._open()
+        self.assertFalse(index.changed("chart", digest1))
+        self.assertTrue(index.changed("chart", digest2))
+        self.assertTrue(index.changed("other", digest1))
+
+    def test_incompatible_version(self: Self) -> None:
+        self.index_path.parent.mkdir()
+        connection = sqlite3.connect(self.index_path)
+        connection.executescript(
+            "CREATE TABLE files (path TEXT); PRAGMA user_version = 999;"
+        )
+        connection.close()
+
+        index = self._open()
+        index.record("chart", helm_kubeconform.cache.digest("v1"))
+        index.file_digest(self.file)
+        index.close()
+
+        index = self._open()
+        self.assertFalse(
+            index.changed("chart", helm_kubeconform.cache.digest("v1"))
+        )
+
+    def test_unusable_index(self: Self) -> None:
+        self.index_path.parent.mkdir()
+        self.index_path.write_text("not a database")
+
+        with self.assertLogs(level="WARNING") as context_manager:
+            index = self._open()
+
+        self.assertIn(
+            f"Unable to open fingerprint index {self.index_path}",
+            context_manager.output[0],
+        )
+        # Files are still hashed, and snapshots kept for the process
+        self.assertEqual(
+            index.file_digest(self.file),
+            helm_kubeconform.cache.file_digest(self.file),
+        )
+        index.record("chart", helm_kubeconform.cache.digest("v1"))
+        self.assertFalse(
+            index.changed("chart", helm_kubeconform.cache.digest("v1"))
+        )
+
+    def test_path_digest(self: Self) -> None:
+        chart_dir = self.tmp_dir / "chart"
+        (chart_dir / "templates").mkdir(parents=True)
+        self._write(chart_dir / "Chart.yaml", "name: chart")
+        self._write(chart_dir / "templates" / "a.yaml", "kind: Pod")
+
+        index = self._open()
+        self.assertEqual(
+            helm_kubeconform.cache.path_digest(chart_dir, index),
+            helm_kubeconform.cache.path_digest(chart_dir),
+        )
+        self.assertEqual(self.file_digest_mock.call_count, 2)
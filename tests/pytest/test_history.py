@@ -0,0 +1,177 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import tempfile
+import typing
+from unittest import TestCase
+import unittest.mock
+
+import helm_kubeconform.history
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestHistory(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = Path(tmp_dir.name, "history", "history.json")
+
+    def test_record(self: Self) -> None:
+        history = helm_kubeconform.history.History(self.path)
+
+        history.record("chart", 4.0, failed=True)
+        target = history.record("chart", 2.0, failed=False)
+
+        self.assertEqual(target.duration, 3.0)
+        self.assertFalse(target.failed)
+        self.assertGreater(target.last_run, 0)
+        self.assertEqual(history.get("chart"), target)
+        self.assertIsNone(history.get("other"))
+
+    def test_record_sizes(self: Self) -> None:
+        history = helm_kubeconform.history.History(self.path)
+
+        history.record("chart", 1.0, False, output_size=100, max_rss=2048)
+        target = history.record("chart", 1.0, False, output_size=200)
+
+        self.assertEqual(target.output_size, 200)
+        self.assertEqual(target.max_rss, 2048)
+
+    def test_record_template(self: Self) -> None:
+        history = helm_kubeconform.history.History(self.path)
+
+        history.record_template("chart\ntemplates/a.yaml", 2.0, 10)
+        template = history.record_template("chart\ntemplates/a.yaml", 1.0, 20)
+        history.save()
+
+        self.assertEqual(template.duration, 1.5)
+        self.assertEqual(template.output_size, 20)
+        self.assertEqual(history.targets, {})
+        loaded_history = helm_kubeconform.history.History.load(self.path)
+        self.assertEqual(
+            loaded_history.get_template("chart\ntemplates/a.yaml"), template
+        )
+        self.assertIsNone(loaded_history.get_template("chart"))
+
+    def test_save_load(self: Self) -> None:
+        history = helm_kubeconform.history.History(self.path)
+        history.record("chart1", 1.0, failed=False)
+        history.save()
+
+        # Entries saved by another process are merged
+        other_history = helm_kubeconform.history.History.load(self.path)
+        other_history.record("chart2", 2.0, failed=True)
+        history.record("chart3", 3.0, failed=False)
+        other_history.save()
+        history.save()
+
+        loaded_history = helm_kubeconform.history.History.load(self.path)
+        self.assertEqual(
+            sorted(loaded_history.targets), ["chart1", "chart2", "chart3"]
+        )
+        self.assertTrue(loaded_history.targets["chart2"].failed)
+
+    def test_save_expired_entries(self: Self) -> None:
+        history = helm_kubeconform.history.History(self.path)
+        with unittest.mock.patch(
+            "helm_kubeconform.history.time.time", return_value=0
+        ):
+            history.record("old", 1.0, failed=False)
+        history.record("new", 1.0, failed=False)
+        history.save()
+
+        self.assertEqual(
+            list(helm_kubeconform.history.History.load(self.path).targets),
+            ["new"],
+        )
+
+    def test_save_nothing(self: Self) -> None:
+        helm_kubeconform.history.History(self.path).save()
+        helm_kubeconform.history.History().save()
+
+        self.assertFalse(self.path.exists())
+
+    def test_save_failure(self: Self) -> None:
+        self.path.parent.write_text("not a directory")
+        history = helm_kubeconform.history.History(self.path)
+        history.record("chart", 1.0, failed=False)
+
+        with self.assertLogs(level="WARNING") as context_manager:
+            history.save()
+
+        self.assertIn(
+            "Unable to write history file", context_manager.output[-1]
+        )
+
+    def test_load_invalid(self: Self) -> None:
+        self.path.parent.mkdir()
+        test_args = [
+            ("{invalid", 1),
+            (json.dumps({"version": 0, "targets": {"chart": {}}}), 0),
+            (json.dumps([]), 0),
+        ]
+
+        for content, warnings in test_args:
+            with self.subTest(content=content):
+                self.path.write_text(content)
+
+                with self.assertLogs(level="WARNING") as context_manager:
+                    history = helm_kubeconform.history.History.load(self.path)
+                    helm_kubeconform.history.logger.warning("end")
+
+                self.assertEqual(history.targets, {})
+                self.assertEqual(len(context_manager.output), warnings + 1)
+
+    def test_load_unknown_fields(self: Self) -> None:
+        self.path.parent.mkdir()
+        self.path.write_text(
+            json.dumps(
+                {
+                    "version": 1,
+                    "targets": {"chart": {"duration": 1.0, "unknown": 1}},
+                }
+            )
+        )
+
+        history = helm_kubeconform.history.History.load(self.path)
+
+        self.assertEqual(history.targets["chart"].duration, 1.0)
+
+    def test_costs(self: Self) -> None:
+        history = helm_kubeconform.history.History()
+        self.assertEqual(history.costs(["a"]), {"a": 1.0})
+
+        for key, duration in (("a", 1.0), ("b", 2.0), ("c", 9.0)):
+            history.record(key, duration, failed=False)
+
+        self.assertEqual(
+            history.costs(["a", "c", "unknown"]),
+            {"a": 1.0, "c": 9.0, "unknown": 2.0},
+        )
+
+    def test_estimate_memory(self: Self) -> None:
+        history = helm_kubeconform.history.History()
+        self.assertEqual(history.estimate_memory("a"), 0.0)
+
+        for key, output_size, max_rss in (
+            ("a", 1000, 100_000),
+            ("b", 10_000, 150_000),
+            ("c", 100_000, 500_000),
+            ("small", 500, None),
+            ("huge", 1_000_000, None),
+        ):
+            history.record(key, 1.0, False, output_size, max_rss)
+
+        self.assertEqual(history.estimate_memory("b"), 150_000)
+        # Closest known output size
+        self.assertEqual(history.estimate_memory("small"), 100_000)
+        # Scaled to larger output sizes
+        self.assertEqual(history.estimate_memory("huge"), 5_000_000)
+        # Median of all known targets
+        self.assertEqual(history.estimate_memory("unknown"), 150_000)
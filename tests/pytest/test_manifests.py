@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import io
+from pathlib import Path
+import tarfile
+import tempfile
+import typing
+from unittest import TestCase
+import unittest.mock
+
+import helm_kubeconform.manifests
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestReadManifests(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.output_dir = self.root / "output"
+        for file, content in (
+            ("chart/templates/service.yaml", "kind: Service\n"),
+            ("chart/templates/deployment.yaml", "kind: Deployment"),
+            ("chart/crds/crd.json", '{"kind": "CustomResourceDefinition"}'),
+            ("chart/templates/NOTES.txt", "notes"),
+        ):
+            path = self.output_dir / file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+
+    def test_read_directory(self: Self) -> None:
+        self.assertEqual(
+            b"".join(
+                helm_kubeconform.manifests.read_manifests(str(self.output_dir))
+            ),
+            b'---\n{"kind": "CustomResourceDefinition"}\n'
+            b"---\nkind: Deployment\n"
+            b"---\nkind: Service\n",
+        )
+
+    def test_read_tarball(self: Self) -> None:
+        tarball = self.root / "manifests.tgz"
+        with tarfile.open(tarball, "w:gz") as tar:
+            tar.add(self.output_dir / "chart/templates", "chart/templates")
+
+        self.assertEqual(
+            sorted(helm_kubeconform.manifests.read_manifests(str(tarball))),
+            [b"---\nkind: Deployment\n", b"---\nkind: Service\n"],
+        )
+
+    def test_read_stdin(self: Self) -> None:
+        stdin = unittest.mock.MagicMock(buffer=io.BytesIO(b"kind: Service"))
+
+        with unittest.mock.patch("sys.stdin", stdin):
+            self.assertEqual(
+                list(helm_kubeconform.manifests.read_manifests("-")),
+                [b"kind: Service"],
+            )
+
+    def test_read_failure(self: Self) -> None:
+        for source in (
+            str(self.root / "missing"),
+            str(self.output_dir / "chart/templates/service.yaml"),
+        ):
+            with (
+                self.subTest(source=source),
+                self.assertRaises(helm_kubeconform.manifests.ManifestsError),
+            ):
+                list(helm_kubeconform.manifests.read_manifests(source))
@@ -0,0 +1,159 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from pathlib import Path
+import tempfile
+import typing
+from unittest import TestCase
+
+import helm_kubeconform.matrix
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestBuildMatrix(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+
+        self._create(
+            "apps/app1/Chart.yaml",
+            "apps/app1/values.yaml",
+            "apps/app1/values.schema.json",
+            "apps/app1/values-prod.yaml",
+            "apps/app1/ci/test-values.yaml",
+            "apps/app1/templates/deployment.yaml",
+            "apps/app1/templates/values.yaml",
+            "apps/app1/charts/sub/Chart.yaml",
+            "apps/app1/charts/sub/values-sub.yaml",
+            "apps/app2/Chart.yaml",
+            "apps/app2/templates/deployment.yaml",
+            "environments/prod/app1.yaml",
+            "environments/prod/values-app2.yaml",
+            "environments/prod/app2/values.yaml",
+            "environments/prod/app2/config.yaml",
+            "environments/prod/other.yaml",
+            "README.md",
+        )
+        (self.root / "apps/app2/Chart.yaml").write_text(
+            "apiVersion: v2\nname: 'second-app'\nversion: 0.1.0\n",
+            encoding="utf-8",
+        )
+        self._create("environments/second-app.values.yaml")
+
+    def _create(self: Self, *files: str) -> None:
+        for file in files:
+            path = self.root / file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+
+    # Return the directory of the chart a file belongs to, if any
+    def _chart_directory(self: Self, path: Path) -> Path | None:
+        for directory in path.parents:
+            if (directory / "Chart.yaml").is_file():
+                return directory
+            if directory == self.root:
+                break
+
+        return None
+
+    def _build_matrix(self: Self, *files: str) -> list[tuple[str, str | None]]:
+        return [
+            (
+                chart_dir.relative_to(self.root).as_posix(),
+                values_file.relative_to(self.root).as_posix()
+                if values_file
+                else None,
+            )
+            for chart_dir, values_file in (
+                helm_kubeconform.matrix.build_matrix(
+                    (self.root / f for f in files),
+                    self._chart_directory,
+                    self.root,
+                )
+            )
+        ]
+
+    def test_find_chart_values_files(self: Self) -> None:
+        self.assertEqual(
+            helm_kubeconform.matrix.find_chart_values_files(
+                self.root / "apps/app1"
+            ),
+            [
+                self.root / "apps/app1/ci/test-values.yaml",
+                self.root / "apps/app1/values-prod.yaml",
+            ],
+        )
+
+    def test_chart_files(self: Self) -> None:
+        self.assertEqual(
+            self._build_matrix(
+                "apps/app1/templates/deployment.yaml",
+                "apps/app1/values.yaml",
+                "apps/app2/templates/deployment.yaml",
+            ),
+            [
+                ("apps/app1", None),
+                ("apps/app1", "apps/app1/ci/test-values.yaml"),
+                ("apps/app1", "apps/app1/values-prod.yaml"),
+                ("apps/app2", None),
+            ],
+        )
+
+    def test_chart_values_files(self: Self) -> None:
+        self.assertEqual(
+            self._build_matrix(
+                "apps/app1/values-prod.yaml",
+                "apps/app1/ci/test-values.yaml",
+                "apps/app1/values-prod.yaml",
+            ),
+            [
+                ("apps/app1", "apps/app1/values-prod.yaml"),
+                ("apps/app1", "apps/app1/ci/test-values.yaml"),
+            ],
+        )
+
+    def test_external_values_files(self: Self) -> None:
+        self.assertEqual(
+            self._build_matrix(
+                "environments/prod/app1.yaml",
+                "environments/prod/values-app2.yaml",
+                "environments/prod/app2/values.yaml",
+                "environments/second-app.values.yaml",
+            ),
+            [
+                ("apps/app1", "environments/prod/app1.yaml"),
+                ("apps/app2", "environments/prod/values-app2.yaml"),
+                ("apps/app2", "environments/prod/app2/values.yaml"),
+                ("apps/app2", "environments/second-app.values.yaml"),
+            ],
+        )
+
+    def test_unrelated_files(self: Self) -> None:
+        self.assertEqual(
+            self._build_matrix(
+                "environments/prod/other.yaml",
+                "environments/prod/app2/config.yaml",
+                "README.md",
+            ),
+            [],
+        )
+
+    def test_mixed_files(self: Self) -> None:
+        self.assertEqual(
+            self._build_matrix(
+                "environments/prod/app1.yaml",
+                "apps/app1/Chart.yaml",
+                "apps/app1/values-prod.yaml",
+            ),
+            [
+                ("apps/app1", "environments/prod/app1.yaml"),
+                ("apps/app1", None),
+                ("apps/app1", "apps/app1/ci/test-values.yaml"),
+                ("apps/app1", "apps/app1/values-prod.yaml"),
+            ],
+        )
@@ -0,0 +1,70 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from io import StringIO
+import typing
+from unittest import TestCase
+
+import helm_kubeconform.output
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestOutputMultiplexer(TestCase):
+    def setUp(self: Self) -> None:
+        self.stream = StringIO()
+        self.multiplexer = helm_kubeconform.output.OutputMultiplexer(
+            self.stream, threshold=4
+        )
+
+    def test_job_order(self: Self) -> None:
+        job1, job2, job3 = (self.multiplexer.job() for _ in range(3))
+
+        # The first unfinished job is written as it comes
+        job1.write(b"job1 ")
+        job3.write(b"job3 output ")
+        job2.write(b"job2 ")
+        self.assertEqual(self.stream.getvalue(), "job1 ")
+
+        # Completed jobs are written once previous jobs complete
+        job3.write(b"spooled\n")
+        job3.close()
+        self.assertEqual(self.stream.getvalue(), "job1 ")
+
+        # The next unfinished job is then written as it comes
+        job1.write(b"done\n")
+        job1.close()
+        self.assertEqual(self.stream.getvalue(), "job1 done\njob2 ")
+        job2.write(b"done\n")
+        self.assertEqual(self.stream.getvalue(), "job1 done\njob2 done\n")
+
+        job2.close()
+        self.assertEqual(
+            self.stream.getvalue(),
+            "job1 done\njob2 done\njob3 output spooled\n",
+        )
+
+    def test_split_characters(self: Self) -> None:
+        job1, job2 = self.multiplexer.job(), self.multiplexer.job()
+        data = "é€\n".encode()
+
+        for job in (job2, job1):
+            for index in range(len(data)):
+                job.write(data[index : index + 1])
+            job.close()
+
+        self.assertEqual(self.stream.getvalue(), "é€\né€\n")
+
+    def test_close(self: Self) -> None:
+        with self.multiplexer:
+            job1, job2 = self.multiplexer.job(), self.multiplexer.job()
+            job2.write(b"job2\n")
+            job2.close()
+            job1.write(b"job1\n")
+            self.assertEqual(self.stream.getvalue(), "job1\n")
+
+        # Outputs of all jobs are written, completed or not
+        self.assertEqual(self.stream.getvalue(), "job1\njob2\n")
@@ -4,17 +4,30 @@
 from __future__ import annotations
 
 import contextlib
+import functools
+import io
 from io import StringIO
+import json
+import logging
 import os
 from pathlib import Path
 import re
 from subprocess import CalledProcessError
 import sys
+import tempfile
+import threading
+import time
 import typing
+from typing import Any
 from unittest import TestCase
 import unittest.mock
 
+import helm_kubeconform.cache
+import helm_kubeconform.capabilities
+import helm_kubeconform.history
 import helm_kubeconform.plugin
+import helm_kubeconform.scheduling
+import helm_kubeconform.schema
 
 if typing.TYPE_CHECKING:
     from typing_extensions import Self
@@ -27,6 +40,7 @@ Flags:
     -h, --help             help for template
     --kube-version string  Kubernetes version
     --output-dir string    writes the executed templates in output-dir
+    --set-file stringArray set values from respective files
     --verify               verify the package before using it
     -f, --values strings   specify values in a YAML file or a URL
 
@@ -46,26 +60,80 @@ Usage: kubeconform [OPTION]... [FILE OR FOLDER]...
         version of Kubernetes to validate against
     -n int
         number of goroutines to run concurrently
+    -output string
+        output format - json, junit, pretty, tap, text
     -reject string
         comma-separated list of kinds or GVKs to reject
     -strict
         disallow additional properties not in schema or duplicated keys
+    -summary
+        print a summary at the end
 """
 
 
 class TestRun(TestCase):
     def setUp(self: Self) -> None:
+        # main() leaves the package loggers at DEBUG level in debug mode
+        for name in ("helm_kubeconform", "helm_kubeconform.plugin"):
+            logger = logging.getLogger(name)
+            self.addCleanup(logger.setLevel, logger.level)
+            logger.setLevel(logging.NOTSET)
+
         subprocess_patch = unittest.mock.patch(
             "helm_kubeconform.plugin.subprocess"
         )
         self.subprocess_mock = subprocess_patch.start()
         self.addCleanup(subprocess_patch.stop)
+        # Measured subprocesses are run through the subprocess mock
+        for name, mock in (
+            ("run_measured", self.subprocess_mock.run),
+            ("MeasuredPopen", self.subprocess_mock.Popen),
+        ):
+            measured_patch = unittest.mock.patch(
+                f"helm_kubeconform.plugin.{name}",
+                side_effect=functools.partial(self._run_unmeasured, mock),
+            )
+            measured_patch.start()
+            self.addCleanup(measured_patch.stop)
+        # Rendered manifests, and no error output
+        self.subprocess_mock.run.return_value.stdout = b""
+        self.subprocess_mock.run.return_value.stderr = b""
+        # Kubeconform processes run by concurrent validations
+        process_mock = self.subprocess_mock.Popen.return_value.__enter__
+        process_mock.return_value.returncode = 0
+        process_mock.return_value.stdout.read1.return_value = b""
 
         self.subprocess_mock.check_output.side_effect = [
             MOCK_HELM_TEMPLATE_HELP,
             MOCK_KUBECONFORM_HELP,
         ]
 
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.history_file = Path(tmp_dir.name, "history.json")
+        history_file_patch = unittest.mock.patch(
+            "helm_kubeconform.plugin.HELM_KUBECONFORM_HISTORY_FILE",
+            str(self.history_file),
+        )
+        history_file_patch.start()
+        self.addCleanup(history_file_patch.stop)
+        self.fingerprint_index = Path(tmp_dir.name, "fingerprints.db")
+        fingerprint_index_patch = unittest.mock.patch(
+            "helm_kubeconform.plugin.HELM_KUBECONFORM_FINGERPRINT_INDEX",
+            str(self.fingerprint_index),
+        )
+        fingerprint_index_patch.start()
+        self.addCleanup(fingerprint_index_patch.stop)
+
+    @staticmethod
+    def _run_unmeasured(
+        mock: unittest.mock.Mock,
+        command: list[str],
+        _usage: object,
+        **kwargs: object,
+    ) -> Any:  # noqa: ANN401
+        return mock(command, **kwargs)
+
     def test_help(self: Self) -> None:
         stdout = StringIO()
         with (
@@ -238,6 +306,18 @@ class TestRun(TestCase):
             context_manager.output,
         )
 
+    def test_debug_logging(self: Self) -> None:
+        with self.assertLogs("helm_kubeconform.plugin", level="DEBUG"):
+            helm_kubeconform.plugin.main(argv=["chart", "--debug"])
+
+        # Debug messages of the other modules are logged too
+        for name in ("claims", "equivalence", "split"):
+            self.assertTrue(
+                logging.getLogger(f"helm_kubeconform.{name}").isEnabledFor(
+                    logging.DEBUG
+                )
+            )
+
     def test_help_processing_failure(self: Self) -> None:
         errors = [
             {
@@ -395,3 +475,1226 @@ class TestRun(TestCase):
             "validation failed",
             context_manager.output,
         )
+
+    def test_result_cache(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            argv = ["chart", "--result-cache", tmp_dir]
+            self.subprocess_mock.run.side_effect = [
+                unittest.mock.Mock(stdout=b"manifests"),
+                unittest.mock.Mock(stdout=b"stdin - Service is valid\n"),
+            ]
+
+            stderr = StringIO()
+            with contextlib.redirect_stderr(stderr):
+                return_code = helm_kubeconform.plugin.main(argv=argv)
+
+            self.assertEqual(return_code, 0)
+            self.assertEqual(self.subprocess_mock.run.call_count, 2)
+            self.subprocess_mock.run.assert_called_with(
+                [helm_kubeconform.plugin.KUBECONFORM_BIN],
+                input=b"manifests",
+                stdout=self.subprocess_mock.PIPE,
+                check=True,
+            )
+            self.assertEqual(stderr.getvalue(), "stdin - Service is valid\n")
+
+            # Results are replayed from the cache
+            self.setUp()
+
+            stderr = StringIO()
+            with (
+                contextlib.redirect_stderr(stderr),
+                self.assertLogs(
+                    "helm_kubeconform.plugin", level="DEBUG"
+                ) as context_manager,
+            ):
+                return_code = helm_kubeconform.plugin.main(argv=argv)
+
+            self.assertEqual(return_code, 0)
+            self.subprocess_mock.run.assert_not_called()
+            self.assertEqual(stderr.getvalue(), "stdin - Service is valid\n")
+            self.assertIn(
+                "DEBUG:helm_kubeconform.plugin:Using cached output of "
+                f"{helm_kubeconform.plugin.KUBECONFORM_BIN}",
+                context_manager.output,
+            )
+
+    def test_result_cache_failure(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            argv = ["chart", "--result-cache", tmp_dir]
+            test_args: list[dict[str, Any]] = [
+                {
+                    "side_effect": CalledProcessError(1, "helm template"),
+                    "return_code": 1,
+                    "call_count": 1,
+                },
+                {
+                    "side_effect": [
+                        unittest.mock.Mock(stdout=b"manifests"),
+                        CalledProcessError(
+                            2, "kubeconform", output=b"stdin - invalid\n"
+                        ),
+                    ],
+                    "return_code": 2,
+                    "call_count": 2,
+                },
+                # Failed validations are never cached, unlike renders
+                {
+                    "side_effect": [
+                        CalledProcessError(
+                            2, "kubeconform", output=b"stdin - invalid\n"
+                        )
+                    ],
+                    "return_code": 2,
+                    "call_count": 1,
+                },
+            ]
+
+            for arg in test_args:
+                self.setUp()
+                self.subprocess_mock.run.side_effect = arg["side_effect"]
+
+                with contextlib.redirect_stderr(StringIO()):
+                    return_code = helm_kubeconform.plugin.main(argv=argv)
+
+                self.assertEqual(return_code, arg["return_code"])
+                self.assertEqual(
+                    self.subprocess_mock.run.call_count, arg["call_count"]
+                )
+
+    def test_result_cache_content_addressing(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            values_file = Path(tmp_dir, "values.yaml")
+            argv = [
+                "tests/fixtures/chart-k8s",
+                "--set-file",
+                f"a={values_file}",
+                "--result-cache",
+                str(Path(tmp_dir, "cache")),
+            ]
+            test_args = [
+                ("replicaCount: 1", 2),
+                ("replicaCount: 1", 0),
+                ("replicaCount: 2", 2),
+            ]
+
+            for content, call_count in test_args:
+                self.setUp()
+                self.subprocess_mock.run.side_effect = [
+                    unittest.mock.Mock(stdout=content.encode()),
+                    unittest.mock.Mock(stdout=b""),
+                ]
+                values_file.write_text(content)
+
+                return_code = helm_kubeconform.plugin.main(argv=argv)
+
+                self.assertEqual(return_code, 0)
+                self.assertEqual(
+                    self.subprocess_mock.run.call_count, call_count
+                )
+
+    def test_all_charts(self: Self) -> None:
+        return_code = helm_kubeconform.plugin.main(
+            argv=["--all", "tests/fixtures"]
+        )
+
+        self.assertEqual(return_code, 0)
+        self.subprocess_mock.run.assert_has_calls(
+            [
+                unittest.mock.call(
+                    [helm_kubeconform.plugin.HELM_BIN, "template", chart],
+                    stdout=unittest.mock.ANY,
+                    check=True,
+                )
+                for chart in (
+                    str(Path("tests/fixtures/chart-k8s")),
+                    str(Path("tests/fixtures/chart-ocp")),
+                )
+            ],
+            any_order=True,
+        )
+        self.assertEqual(self.subprocess_mock.run.call_count, 4)
+
+    def test_all_charts_not_found(self: Self) -> None:
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            self.assertLogs(level="WARNING") as context_manager,
+        ):
+            return_code = helm_kubeconform.plugin.main(argv=["--all", tmp_dir])
+
+        self.assertEqual(return_code, 0)
+        self.subprocess_mock.run.assert_not_called()
+        self.assertIn("No Helm chart found", context_manager.output[0])
+
+    def test_all_charts_invalid_args(self: Self) -> None:
+        for argv in ([], ["chart", "--all", "tests/fixtures"]):
+            with self.subTest(argv=argv):
+                self.setUp()
+
+                stderr = StringIO()
+                with (
+                    contextlib.redirect_stderr(stderr),
+                    self.assertRaises(SystemExit) as exit_cm,
+                ):
+                    helm_kubeconform.plugin.main(argv=argv)
+
+                self.assertEqual(exit_cm.exception.code, 2)
+                self.assertIn(
+                    "either a chart, the --all option or the --manifests "
+                    "option is required",
+                    stderr.getvalue(),
+                )
+
+    def test_history(self: Self) -> None:
+        self.subprocess_mock.run.side_effect = [
+            unittest.mock.DEFAULT,
+            unittest.mock.DEFAULT,
+            CalledProcessError(1, "helm template"),
+        ]
+
+        return_code = helm_kubeconform.plugin.main(
+            argv=["chart", "values1.yml", "values2.yml"],
+            validate_values_files=True,
+        )
+
+        self.assertEqual(return_code, 1)
+        history = helm_kubeconform.history.History.load(self.history_file)
+        self.assertEqual(
+            sorted(history.targets),
+            ["chart\nvalues1.yml", "chart\nvalues2.yml"],
+        )
+        self.assertFalse(history.targets["chart\nvalues1.yml"].failed)
+        self.assertTrue(history.targets["chart\nvalues2.yml"].failed)
+
+    def test_shard(self: Self) -> None:
+        values = [f"values{i}.yml" for i in range(1, 5)]
+        history_file = self.history_file
+        history = helm_kubeconform.history.History(history_file)
+        for value, duration in zip(values, (10.0, 1.0, 1.0, 8.0)):
+            history.record(f"chart\n{value}", duration, failed=False)
+        history.save()
+
+        validated_values = []
+        for shard in ("1/2", "2/2"):
+            self.setUp()
+            # Shards share the same history
+            self.history_file.write_text(history_file.read_text())
+
+            return_code = helm_kubeconform.plugin.main(
+                argv=["chart", *values, "--shard", shard],
+                validate_values_files=True,
+            )
+
+            self.assertEqual(return_code, 0)
+            validated_values.append(
+                [
+                    c.args[0][-1]
+                    for c in self.subprocess_mock.run.call_args_list[::2]
+                ]
+            )
+
+        # Costs are balanced: 10 on the first shard, 1 + 1 + 8 on the second
+        self.assertEqual(
+            validated_values,
+            [["values1.yml"], ["values2.yml", "values3.yml", "values4.yml"]],
+        )
+
+    def test_invalid_shard(self: Self) -> None:
+        for shard in ("0/2", "3/2", "1", "a/b"):
+            with self.subTest(shard=shard):
+                self.setUp()
+
+                stderr = StringIO()
+                with (
+                    contextlib.redirect_stderr(stderr),
+                    self.assertRaises(SystemExit) as exit_cm,
+                ):
+                    helm_kubeconform.plugin.main(
+                        argv=["chart", "--shard", shard]
+                    )
+
+                self.assertEqual(exit_cm.exception.code, 2)
+                self.assertIn(f"invalid shard '{shard}'", stderr.getvalue())
+
+    def test_failure_first_ordering(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            values = [str(Path(tmp_dir, f"values{i}.yml")) for i in range(4)]
+            for value in values:
+                Path(value).touch()
+
+            history = helm_kubeconform.history.History(self.history_file)
+            for value, failed in zip(values, (False, True, False, False)):
+                history.record(f"chart\n{value}", 1.0, failed=failed)
+            history.save()
+            # Modified after its last validation
+            os.utime(values[2], (time.time() + 60, time.time() + 60))
+            # Never validated
+            values.append(str(Path(tmp_dir, "values4.yml")))
+
+            return_code = helm_kubeconform.plugin.main(
+                argv=["chart", *values], validate_values_files=True
+            )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(
+            [
+                c.args[0][-1]
+                for c in self.subprocess_mock.run.call_args_list[::2]
+            ],
+            [values[1], values[2], values[4], values[0], values[3]],
+        )
+
+    def test_fingerprint_index(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chart_dir = Path(tmp_dir, "chart")
+            chart_dir.mkdir()
+            (chart_dir / "Chart.yaml").write_text("name: chart")
+            values = [str(Path(tmp_dir, f"values{i}.yml")) for i in range(4)]
+            for value in values:
+                Path(value).write_text("replicas: 1")
+
+            argv = [str(chart_dir), *values]
+            helm_kubeconform.plugin.main(argv=argv, validate_values_files=True)
+            self.assertTrue(self.fingerprint_index.is_file())
+
+            # Content modified without any modification time change
+            stat = Path(values[2]).stat()
+            Path(values[2]).write_text("replicas: 10")
+            os.utime(values[2], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+            self.subprocess_mock.reset_mock()
+            self.subprocess_mock.check_output.side_effect = [
+                MOCK_HELM_TEMPLATE_HELP,
+                MOCK_KUBECONFORM_HELP,
+            ]
+            return_code = helm_kubeconform.plugin.main(
+                argv=argv, validate_values_files=True
+            )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(
+            self.subprocess_mock.run.call_args_list[0].args[0][-1], values[2]
+        )
+
+    def test_single_target(self: Self) -> None:
+        with unittest.mock.patch(
+            "helm_kubeconform.plugin.path_digest"
+        ) as path_digest_mock:
+            return_code = helm_kubeconform.plugin.main(argv=["chart"])
+
+            self.assertEqual(return_code, 0)
+            # Nothing is hashed without any cache or claim
+            path_digest_mock.assert_not_called()
+            self.assertFalse(self.fingerprint_index.exists())
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                self.setUp()
+                return_code = helm_kubeconform.plugin.main(
+                    argv=["chart", "--claim-dir", tmp_dir]
+                )
+
+            self.assertEqual(return_code, 0)
+            self.assertTrue(self.fingerprint_index.is_file())
+
+    @unittest.skipUnless(
+        helm_kubeconform.schema.HAS_DEPENDENCIES,
+        "jsonschema and PyYAML required",
+    )
+    def test_values_schema_precheck(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chart_dir = Path(tmp_dir, "chart")
+            chart_dir.mkdir()
+            (chart_dir / "values.schema.json").write_text(
+                '{"properties": {"replicaCount": {"type": "integer"}}}'
+            )
+            good_values = Path(tmp_dir, "good.yaml")
+            good_values.write_text("replicaCount: 1")
+            bad_values = Path(tmp_dir, "bad.yaml")
+            bad_values.write_text("replicaCount: one")
+
+            with self.assertLogs(level="ERROR") as context_manager:
+                return_code = helm_kubeconform.plugin.main(
+                    argv=[
+                        str(chart_dir),
+                        str(good_values),
+                        str(bad_values),
+                        "--values-schema-precheck",
+                    ],
+                    validate_values_files=True,
+                )
+
+            self.assertEqual(return_code, 1)
+            # Invalid values are rejected before anything is rendered
+            self.subprocess_mock.run.assert_not_called()
+            self.assertIn(
+                f"ERROR:helm_kubeconform.plugin:Helm {bad_values} values do "
+                "not match the chart schema: replicaCount: 'one' is not of "
+                "type 'integer'",
+                context_manager.output,
+            )
+            self.assertTrue(
+                helm_kubeconform.history.History.load(self.history_file)
+                .targets[f"{chart_dir}\n{bad_values}"]
+                .failed
+            )
+
+            # Extra values files are merged
+            self.setUp()
+            return_code = helm_kubeconform.plugin.main(
+                argv=[
+                    str(chart_dir),
+                    str(bad_values),
+                    "--values",
+                    str(good_values),
+                    "--values-schema-precheck",
+                ],
+                validate_values_files=True,
+            )
+            self.assertEqual(return_code, 1)
+            self.subprocess_mock.run.assert_not_called()
+
+    @unittest.skipUnless(
+        helm_kubeconform.schema.HAS_DEPENDENCIES,
+        "jsonschema and PyYAML required",
+    )
+    def test_values_schema_precheck_skipped(self: Self) -> None:
+        test_args: list[dict[str, Any]] = [
+            {"argv": ["--set-file", "a=b"], "message": "command line"},
+            {
+                "argv": ["--values", "https://x/values.yaml"],
+                "message": "Remote",
+            },
+        ]
+
+        for arg in test_args:
+            with self.subTest(arg=arg):
+                self.setUp()
+
+                with self.assertLogs(
+                    "helm_kubeconform.plugin", level="DEBUG"
+                ) as context_manager:
+                    return_code = helm_kubeconform.plugin.main(
+                        argv=[
+                            "tests/fixtures/chart-k8s",
+                            "--values-schema-precheck",
+                            *arg["argv"],
+                        ]
+                    )
+
+                self.assertEqual(return_code, 0)
+                self.assertEqual(self.subprocess_mock.run.call_count, 2)
+                self.assertIn(arg["message"], context_manager.output[0])
+
+    @unittest.mock.patch(
+        "helm_kubeconform.plugin.HAS_SCHEMA_DEPENDENCIES", new=False
+    )
+    def test_values_schema_precheck_unavailable(self: Self) -> None:
+        with self.assertLogs(level="WARNING") as context_manager:
+            return_code = helm_kubeconform.plugin.main(
+                argv=["chart", "--values-schema-precheck"]
+            )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(self.subprocess_mock.run.call_count, 2)
+        self.assertIn("requires the jsonschema", context_manager.output[0])
+
+    # Mock `helm template` of a chart by listing its templates, failing for
+    # partial charts if requested
+    def _mock_split_render(
+        self: Self, fail_partial: bool = False
+    ) -> typing.Callable[..., unittest.mock.MagicMock]:
+        def _run(
+            command: list[str], **_kwargs: object
+        ) -> unittest.mock.MagicMock:
+            process = unittest.mock.MagicMock(returncode=0, stdout=b"")
+            if command[1:2] != ["template"]:
+                return process
+
+            chart_dir = Path(command[2])
+            if fail_partial and chart_dir.parent.name.isdigit():
+                process.returncode = 1
+            process.stdout = b"".join(
+                f"---\n# Source: chart/{p.relative_to(chart_dir).as_posix()}"
+                "\nkind: Test\n".encode()
+                for p in sorted((chart_dir / "templates").glob("*.yaml"))
+            )
+            return process
+
+        return _run
+
+    def test_split_render(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chart_dir = Path(tmp_dir, "chart")
+            (chart_dir / "templates").mkdir(parents=True)
+            (chart_dir / "Chart.yaml").write_text("name: chart")
+            for name in ("a", "b", "c"):
+                (chart_dir / "templates" / f"{name}.yaml").write_text(name)
+            self.subprocess_mock.run.side_effect = self._mock_split_render()
+
+            return_code = helm_kubeconform.plugin.main(
+                argv=[str(chart_dir), "--split-render", "2"]
+            )
+
+            self.assertEqual(return_code, 0)
+            # 2 partial renders, then Kubeconform
+            self.assertEqual(self.subprocess_mock.run.call_count, 3)
+            manifests = self.subprocess_mock.run.call_args.kwargs["input"]
+            self.assertEqual(
+                re.findall(rb"templates/\w+\.yaml", manifests),
+                [
+                    b"templates/a.yaml",
+                    b"templates/c.yaml",
+                    b"templates/b.yaml",
+                ],
+            )
+            history = helm_kubeconform.history.History.load(self.history_file)
+            self.assertEqual(
+                sorted(history.templates),
+                [f"{chart_dir}\ntemplates/{n}.yaml" for n in ("a", "b", "c")],
+            )
+
+            # Fallback to a full render if a partial render fails
+            self.setUp()
+            self.subprocess_mock.run.side_effect = self._mock_split_render(
+                fail_partial=True
+            )
+            with self.assertLogs(
+                "helm_kubeconform.plugin", level="DEBUG"
+            ) as context_manager:
+                return_code = helm_kubeconform.plugin.main(
+                    argv=[str(chart_dir), "--split-render", "2"]
+                )
+
+            self.assertEqual(return_code, 0)
+            self.assertEqual(self.subprocess_mock.run.call_count, 4)
+            self.assertIn("rendering it whole", context_manager.output[1])
+            manifests = self.subprocess_mock.run.call_args.kwargs["input"]
+            self.assertEqual(manifests.count(b"# Source:"), 3)
+
+            # Templates referencing each other are rendered whole
+            self.setUp()
+            (chart_dir / "templates" / "d.yaml").write_text(
+                '{{- define "d" }}{{ end }}'
+            )
+            return_code = helm_kubeconform.plugin.main(
+                argv=[str(chart_dir), "--split-render", "2"]
+            )
+
+            self.assertEqual(return_code, 0)
+            self.assertEqual(self.subprocess_mock.run.call_count, 2)
+
+    def test_invalid_split_render(self: Self) -> None:
+        for value in ("0", "two"):
+            with self.subTest(value=value):
+                self.setUp()
+
+                with (
+                    contextlib.redirect_stderr(StringIO()) as stderr,
+                    self.assertRaises(SystemExit),
+                ):
+                    helm_kubeconform.plugin.main(
+                        argv=["chart", "--split-render", value]
+                    )
+
+                self.assertIn("invalid number of workers", stderr.getvalue())
+
+    def test_kubeconform_shards(self: Self) -> None:
+        manifests = b"---\nkind: A\n" * 2000
+        summary = (
+            b"Summary: 1000 resources found parsing stdin - Valid: 1000, "
+            b"Invalid: 0, Errors: 0, Skipped: 0\n"
+        )
+
+        def _run(command: list[str], **kwargs: object) -> unittest.mock.Mock:
+            if command[1:2] == ["template"]:
+                return unittest.mock.Mock(stdout=manifests)
+            self.assertEqual(kwargs["input"], manifests[: len(manifests) // 2])
+            return unittest.mock.Mock(returncode=0, stdout=summary)
+
+        self.subprocess_mock.run.side_effect = _run
+
+        stderr = StringIO()
+        with contextlib.redirect_stderr(stderr):
+            return_code = helm_kubeconform.plugin.main(
+                argv=["chart", "--kubeconform-shards", "4", "--summary"]
+            )
+
+        self.assertEqual(return_code, 0)
+        # 1 render, then 2 shards of 1000 documents
+        self.assertEqual(self.subprocess_mock.run.call_count, 3)
+        self.assertEqual(
+            stderr.getvalue(),
+            "Summary: 2000 resources found parsing stdin - Valid: 2000, "
+            "Invalid: 0, Errors: 0, Skipped: 0\n",
+        )
+
+        # Failed shards
+        self.setUp()
+        self.subprocess_mock.run.side_effect = [
+            unittest.mock.Mock(stdout=manifests),
+            unittest.mock.Mock(returncode=0, stdout=b""),
+            unittest.mock.Mock(returncode=1, stdout=b"stdin - A is invalid\n"),
+        ]
+
+        stderr = StringIO()
+        with contextlib.redirect_stderr(stderr):
+            return_code = helm_kubeconform.plugin.main(
+                argv=["chart", "--kubeconform-shards", "2"]
+            )
+
+        self.assertEqual(return_code, 1)
+        self.assertEqual(stderr.getvalue(), "stdin - A is invalid\n")
+
+        # Output formats which cannot be merged
+        self.setUp()
+        self.subprocess_mock.run.side_effect = [
+            unittest.mock.Mock(stdout=manifests),
+            unittest.mock.Mock(),
+        ]
+
+        return_code = helm_kubeconform.plugin.main(
+            argv=["chart", "--kubeconform-shards", "2", "--output", "junit"]
+        )
+
+        self.assertEqual(return_code, 0)
+        self.subprocess_mock.run.assert_called_with(
+            [helm_kubeconform.plugin.KUBECONFORM_BIN, "-output", "junit"],
+            input=manifests,
+            stdout=sys.stderr,
+            check=True,
+        )
+
+    def test_capabilities(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot = Path(tmp_dir, "capabilities.json")
+            snapshot.write_text(
+                '{"apiVersions": ["v1", "apps/v1"], "kubeVersion": '
+                '"v1.29.4+k3s1"}'
+            )
+            test_args = (
+                {
+                    "plugin_args": ["chart", "--capabilities", str(snapshot)],
+                    "helm_template_args": [
+                        "--api-versions",
+                        "v1,apps/v1",
+                        "--kube-version",
+                        "1.29.4",
+                        "chart",
+                    ],
+                    "kubeconform_args": ["-kubernetes-version", "1.29.4"],
+                },
+                # An explicit Kubernetes version takes precedence
+                {
+                    "plugin_args": [
+                        "chart",
+                        "--capabilities",
+                        str(snapshot),
+                        "--kube-version",
+                        "1.30.0",
+                    ],
+                    "helm_template_args": [
+                        "--kube-version",
+                        "1.30.0",
+                        "--api-versions",
+                        "v1,apps/v1",
+                        "chart",
+                    ],
+                    "kubeconform_args": ["-kubernetes-version", "1.30.0"],
+                },
+            )
+
+            for args in test_args:
+                with self.subTest(plugin_args=args["plugin_args"]):
+                    self.setUp()
+                    self.subprocess_mock.run.side_effect = [
+                        unittest.mock.Mock(stdout=b"manifests"),
+                        unittest.mock.Mock(),
+                    ]
+
+                    return_code = helm_kubeconform.plugin.main(
+                        argv=args["plugin_args"]
+                    )
+
+                    self.assertEqual(return_code, 0)
+                    self.subprocess_mock.run.assert_any_call(
+                        [
+                            helm_kubeconform.plugin.HELM_BIN,
+                            "template",
+                            *args["helm_template_args"],
+                        ],
+                        stdout=self.subprocess_mock.PIPE,
+                        check=True,
+                    )
+                    self.subprocess_mock.run.assert_called_with(
+                        [
+                            helm_kubeconform.plugin.KUBECONFORM_BIN,
+                            *args["kubeconform_args"],
+                        ],
+                        input=b"manifests",
+                        stdout=sys.stderr,
+                        check=True,
+                    )
+
+            self.setUp()
+            with self.assertLogs("helm_kubeconform.plugin", level="ERROR"):
+                return_code = helm_kubeconform.plugin.main(
+                    argv=["chart", "--capabilities", str(snapshot) + ".bad"]
+                )
+
+            self.assertEqual(return_code, 1)
+            self.subprocess_mock.run.assert_not_called()
+
+    def test_capabilities_capture(self: Self) -> None:
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            unittest.mock.patch(
+                "helm_kubeconform.plugin.capture"
+            ) as capture_mock,
+        ):
+            snapshot = Path(tmp_dir, "capabilities.json")
+            capture_mock.return_value = (
+                helm_kubeconform.capabilities.Capabilities(["v1"], "v1.30.0")
+            )
+
+            return_code = helm_kubeconform.plugin.main(
+                argv=[
+                    "capabilities",
+                    "capture",
+                    str(snapshot),
+                    "--kube-context",
+                    "kind-kind",
+                ]
+            )
+
+            self.assertEqual(return_code, 0)
+            capture_mock.assert_called_once_with(
+                helm_kubeconform.plugin.HELM_BIN,
+                ["--kube-context", "kind-kind"],
+            )
+            self.assertEqual(
+                json.loads(snapshot.read_text()),
+                {"apiVersions": ["v1"], "kubeVersion": "v1.30.0"},
+            )
+            # Help texts are not processed
+            self.subprocess_mock.check_output.assert_not_called()
+
+            capture_mock.side_effect = (
+                helm_kubeconform.capabilities.CapabilitiesError(
+                    "Kubernetes cluster unreachable"
+                )
+            )
+            with self.assertLogs(
+                "helm_kubeconform.plugin", level="ERROR"
+            ) as context_manager:
+                return_code = helm_kubeconform.plugin.main(
+                    argv=["capabilities", "capture", str(snapshot)]
+                )
+
+            self.assertEqual(return_code, 1)
+            self.assertIn(
+                "Kubernetes cluster unreachable", context_manager.output[0]
+            )
+
+    def test_capabilities_chart(self: Self) -> None:
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            unittest.mock.patch(
+                "helm_kubeconform.plugin.capture"
+            ) as capture_mock,
+        ):
+            Path(tmp_dir, "capabilities").mkdir()
+            cwd = Path.cwd()
+            os.chdir(tmp_dir)
+            self.addCleanup(os.chdir, cwd)
+
+            # A local chart named `capabilities` is validated
+            return_code = helm_kubeconform.plugin.main(argv=["capabilities"])
+
+            os.chdir(cwd)
+
+        self.assertEqual(return_code, 0)
+        capture_mock.assert_not_called()
+        self.assertEqual(
+            self.subprocess_mock.run.call_args_list[0].args[0],
+            [helm_kubeconform.plugin.HELM_BIN, "template", "capabilities"],
+        )
+
+    def test_jobs(self: Self) -> None:
+        values = [f"values{i}.yml" for i in range(6)]
+
+        # Kubeconform processes printing the values file rendered by the same
+        # worker thread, the first ones being the slowest to complete
+        rendered = threading.local()
+
+        def _run(command: list[str], **_kwargs: object) -> unittest.mock.Mock:
+            rendered.values_file = command[-1]
+            return unittest.mock.Mock(stdout=b"", stderr=b"")
+
+        def _popen(*_args: object, **_kwargs: object) -> unittest.mock.Mock:
+            values_file = rendered.values_file
+            delay = (len(values) - values.index(values_file)) / 100
+
+            def _read1() -> bytes:
+                time.sleep(delay)
+                return next(chunks)
+
+            chunks = iter([f"{values_file}: ".encode(), b"ok\n", b""])
+            process = unittest.mock.MagicMock(returncode=0)
+            process.__enter__.return_value = process
+            process.stdout.read1.side_effect = _read1
+            return process
+
+        self.subprocess_mock.run.side_effect = _run
+        self.subprocess_mock.Popen.side_effect = _popen
+        with (
+            unittest.mock.patch(
+                "helm_kubeconform.plugin.run_concurrently",
+                wraps=helm_kubeconform.scheduling.run_concurrently,
+            ) as run_concurrently_mock,
+            contextlib.redirect_stderr(StringIO()) as stderr,
+        ):
+            return_code = helm_kubeconform.plugin.main(
+                argv=[
+                    "chart",
+                    *values,
+                    "--jobs",
+                    "3",
+                    "--memory-budget",
+                    "2G",
+                ],
+                validate_values_files=True,
+            )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(self.subprocess_mock.run.call_count, len(values))
+        self.assertEqual(self.subprocess_mock.Popen.call_count, len(values))
+        # Kubeconform outputs are written in target order, whatever the
+        # completion order
+        self.assertEqual(
+            stderr.getvalue(), "".join(f"{v}: ok\n" for v in values)
+        )
+        self.assertEqual(run_concurrently_mock.call_args.args[2], 3)
+        self.assertEqual(run_concurrently_mock.call_args.args[4], 2 * 1024**3)
+        history = helm_kubeconform.history.History.load(self.history_file)
+        self.assertEqual(
+            sorted(history.targets), [f"chart\n{v}" for v in values]
+        )
+
+        # No more targets are started once a target fails
+        self.setUp()
+
+        def _run_failing(
+            command: list[str], **_kwargs: object
+        ) -> unittest.mock.Mock:
+            if command[-1] == "values0.yml":
+                raise CalledProcessError(1, "helm template")
+            return unittest.mock.Mock(stdout=b"", stderr=b"")
+
+        self.subprocess_mock.run.side_effect = _run_failing
+        with (
+            self.assertLogs(level="ERROR") as context_manager,
+            unittest.mock.patch(
+                "helm_kubeconform.plugin.get_memory_limit",
+                return_value=1024**3,
+            ),
+        ):
+            return_code = helm_kubeconform.plugin.main(
+                argv=["chart", *values, "--jobs", "2"],
+                validate_values_files=True,
+            )
+
+        self.assertEqual(return_code, 1)
+        self.assertLess(self.subprocess_mock.run.call_count, len(values))
+        self.assertIn(
+            "ERROR:helm_kubeconform.plugin:Helm values file values0.yml "
+            "validation failed",
+            context_manager.output,
+        )
+
+    def test_invalid_memory_budget(self: Self) -> None:
+        with (
+            contextlib.redirect_stderr(StringIO()) as stderr,
+            self.assertRaises(SystemExit),
+        ):
+            helm_kubeconform.plugin.main(
+                argv=["chart", "--memory-budget", "lots"]
+            )
+
+        self.assertIn("invalid memory size", stderr.getvalue())
+
+    def test_manifests(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            Path(tmp_dir, "service.yaml").write_text("kind: Service")
+            process_mock = (
+                self.subprocess_mock.Popen.return_value.__enter__.return_value
+            )
+            process_mock.returncode = 0
+
+            return_code = helm_kubeconform.plugin.main(
+                argv=["--manifests", tmp_dir, "--strict"]
+            )
+
+            self.assertEqual(return_code, 0)
+            # Manifests are streamed to Kubeconform, without rendering
+            self.subprocess_mock.run.assert_not_called()
+            self.subprocess_mock.Popen.assert_called_once_with(
+                [helm_kubeconform.plugin.KUBECONFORM_BIN, "-strict"],
+                stdin=self.subprocess_mock.PIPE,
+                stdout=sys.stderr,
+            )
+            process_mock.stdin.write.assert_called_once_with(
+                b"---\nkind: Service\n"
+            )
+
+            # Failure
+            self.setUp()
+            process_mock = (
+                self.subprocess_mock.Popen.return_value.__enter__.return_value
+            )
+            process_mock.returncode = 1
+            process_mock.stdin.write.side_effect = BrokenPipeError
+            with self.assertLogs(
+                "helm_kubeconform.plugin", level="ERROR"
+            ) as context_manager:
+                return_code = helm_kubeconform.plugin.main(
+                    argv=["--manifests", tmp_dir]
+                )
+
+            self.assertEqual(return_code, 1)
+            self.assertIn(
+                f"Manifests {tmp_dir} validation failed",
+                context_manager.output[0],
+            )
+
+            # Manifests are read entirely when using the result cache
+            self.setUp()
+            self.subprocess_mock.run.return_value.stdout = b""
+            return_code = helm_kubeconform.plugin.main(
+                argv=[
+                    "--manifests",
+                    tmp_dir,
+                    "--result-cache",
+                    str(Path(tmp_dir, "cache")),
+                ]
+            )
+
+            self.assertEqual(return_code, 0)
+            self.subprocess_mock.Popen.assert_not_called()
+            self.subprocess_mock.run.assert_called_once_with(
+                [helm_kubeconform.plugin.KUBECONFORM_BIN],
+                input=b"---\nkind: Service\n",
+                stdout=self.subprocess_mock.PIPE,
+                check=True,
+            )
+
+    def test_manifests_read_failure(self: Self) -> None:
+        with self.assertLogs(
+            "helm_kubeconform.plugin", level="ERROR"
+        ) as context_manager:
+            return_code = helm_kubeconform.plugin.main(
+                argv=["--manifests", "missing.tgz"]
+            )
+
+        self.assertEqual(return_code, 1)
+        self.subprocess_mock.Popen.return_value.__enter__.return_value.kill.assert_called_once()
+        self.assertIn(
+            "Unable to read manifests from missing.tgz",
+            context_manager.output[0],
+        )
+
+    def test_claims(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for _ in range(2):
+                self.setUp()
+                self.subprocess_mock.run.side_effect = [
+                    unittest.mock.DEFAULT,
+                    CalledProcessError(1, "kubeconform"),
+                ]
+
+                with self.assertLogs(level="ERROR"):
+                    return_code = helm_kubeconform.plugin.main(
+                        argv=[
+                            "tests/fixtures/chart-k8s",
+                            "--claim-dir",
+                            tmp_dir,
+                        ]
+                    )
+
+                self.assertEqual(return_code, 1)
+                # Results of previous runs are not reused
+                self.assertEqual(self.subprocess_mock.run.call_count, 2)
+
+    def test_resource_report(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report_file = Path(tmp_dir, "resources.json")
+
+            with self.assertLogs(
+                "helm_kubeconform.plugin", level="DEBUG"
+            ) as context_manager:
+                return_code = helm_kubeconform.plugin.main(
+                    argv=[
+                        "chart",
+                        "values1.yaml",
+                        "values2.yaml",
+                        "--resource-report",
+                        str(report_file),
+                    ],
+                    validate_values_files=True,
+                )
+
+            self.assertEqual(return_code, 0)
+            report = json.loads(report_file.read_text())
+            self.assertEqual(
+                [t["target"] for t in report["targets"]],
+                ["chart\nvalues1.yaml", "chart\nvalues2.yaml"],
+            )
+            self.assertEqual(
+                sorted(report["total"]),
+                ["max_rss", "system_time", "user_time"],
+            )
+            self.assertTrue(
+                any(
+                    "Resource usage of values1.yaml: helm template user" in o
+                    for o in context_manager.output
+                )
+            )
+            self.assertIn("Total resource usage", context_manager.output[-1])
+
+    def test_all_files(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for file in (
+                "apps/app/Chart.yaml",
+                "apps/app/templates/deployment.yaml",
+                "apps/app/ci/test-values.yaml",
+                "environments/prod/app.yaml",
+                "README.md",
+            ):
+                Path(tmp_dir, file).parent.mkdir(parents=True, exist_ok=True)
+                Path(tmp_dir, file).touch()
+
+            cwd = Path.cwd()
+            os.chdir(tmp_dir)
+            self.addCleanup(os.chdir, cwd)
+
+            return_code = helm_kubeconform.plugin.main(
+                argv=[
+                    str(Path("environments/prod/app.yaml")),
+                    str(Path("apps/app/templates/deployment.yaml")),
+                    "README.md",
+                ],
+                validate_all_files=True,
+            )
+
+            os.chdir(cwd)
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(
+            sorted(
+                c.args[0][2:]
+                for c in self.subprocess_mock.run.call_args_list[::2]
+            ),
+            [
+                [str(Path("apps/app"))],
+                [
+                    str(Path("apps/app")),
+                    "--values",
+                    str(Path("apps/app/ci/test-values.yaml")),
+                ],
+                [
+                    str(Path("apps/app")),
+                    "--values",
+                    str(Path("environments/prod/app.yaml")),
+                ],
+            ],
+        )
+
+        self.setUp()
+        with (
+            contextlib.redirect_stderr(StringIO()) as stderr,
+            self.assertRaises(SystemExit),
+        ):
+            helm_kubeconform.plugin.main(argv=[], validate_all_files=True)
+
+        self.assertIn(
+            "either files or the --files-from option", stderr.getvalue()
+        )
+
+    def test_files_from_stdin(self: Self) -> None:
+        run_mock = self.subprocess_mock.run
+
+        # Stdin returning a chunk per read, and recording the number of
+        # processes already run before each read
+        class _Stdin(io.BufferedIOBase):
+            def __init__(self: Self, *chunks: bytes) -> None:
+                self.chunks = list(chunks)
+                self.run_counts: list[int] = []
+
+            def read1(self: Self, _size: int = -1) -> bytes:
+                self.run_counts.append(run_mock.call_count)
+                return self.chunks.pop(0) if self.chunks else b""
+
+        stdin = _Stdin(
+            b"tests/fixtures/chart-k8s/Chart.yaml\0README.md\0",
+            b"tests/fixtures/chart-k8s/values.yaml\0tests/fixtures/",
+            b"chart-ocp/values.yaml\0",
+        )
+
+        with unittest.mock.patch(
+            "sys.stdin", unittest.mock.Mock(buffer=stdin)
+        ):
+            return_code = helm_kubeconform.plugin.main(
+                argv=["--files-from", "-"], validate_chart_files=True
+            )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(
+            [c.args[0][2:] for c in run_mock.call_args_list[::2]],
+            [
+                [str(Path("tests/fixtures/chart-k8s"))],
+                [str(Path("tests/fixtures/chart-ocp"))],
+            ],
+        )
+        # Charts are validated as soon as their files are read
+        self.assertEqual(stdin.run_counts, [0, 2, 2, 4])
+
+    def test_files_from_file(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files_from = Path(tmp_dir, "values.txt")
+            files_from.write_text("values2.yml\r\n\nvalues3.yml\n")
+
+            # Record the files opened by the plugin
+            opened_files: list[Any] = []
+            path_open = Path.open
+
+            def _open(path: Path, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+                opened_files.append(path_open(path, *args, **kwargs))
+                return opened_files[-1]
+
+            with unittest.mock.patch.object(
+                Path, "open", autospec=True, side_effect=_open
+            ):
+                return_code = helm_kubeconform.plugin.main(
+                    argv=[
+                        "chart",
+                        "values1.yml",
+                        "--files-from",
+                        str(files_from),
+                    ],
+                    validate_values_files=True,
+                )
+
+        self.assertEqual(return_code, 0)
+        # The list of files is closed once read
+        self.assertIn(str(files_from), [f.name for f in opened_files])
+        self.assertTrue(all(f.closed for f in opened_files))
+        self.assertEqual(
+            [
+                c.args[0][4]
+                for c in self.subprocess_mock.run.call_args_list[::2]
+            ],
+            ["values1.yml", "values2.yml", "values3.yml"],
+        )
+
+    def test_files_from_invalid_args(self: Self) -> None:
+        test_args: list[tuple[list[str], bool, str]] = [
+            ([], True, "either chart files or the --files-from option"),
+            (["chart"], False, "either values files or the --files-from"),
+            (
+                ["chart", "--files-from", "missing.txt"],
+                False,
+                "argument --files-from: can't open 'missing.txt'",
+            ),
+        ]
+
+        for argv, validate_chart_files, error in test_args:
+            with self.subTest(argv=argv):
+                self.setUp()
+
+                with (
+                    contextlib.redirect_stderr(StringIO()) as stderr,
+                    self.assertRaises(SystemExit),
+                ):
+                    helm_kubeconform.plugin.main(
+                        argv=argv,
+                        validate_chart_files=validate_chart_files,
+                        validate_values_files=not validate_chart_files,
+                    )
+
+                self.assertIn(error, stderr.getvalue())
+
+    @unittest.skipUnless(
+        helm_kubeconform.schema.HAS_DEPENDENCIES,
+        "jsonschema and PyYAML required",
+    )
+    def test_values_equivalence(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chart_dir = Path(tmp_dir, "chart")
+            (chart_dir / "templates").mkdir(parents=True)
+            (chart_dir / "Chart.yaml").write_text("name: chart")
+            (chart_dir / "templates" / "deployment.yaml").write_text(
+                "replicas: {{ .Values.replicaCount }}\n"
+                "{{- if .Values.debug }}debug: true{{ end }}"
+            )
+            (chart_dir / "values.schema.json").write_text(
+                '{"properties": {"replicaCount": {"minimum": 1}}}'
+            )
+            values_files = []
+            for name, content in (
+                ("dev", "replicaCount: 1"),
+                ("prod", "replicaCount: 3"),
+                ("debug", "replicaCount: 1\ndebug: true"),
+            ):
+                values_files.append(Path(tmp_dir, f"{name}.yaml"))
+                values_files[-1].write_text(content)
+
+            return_code = helm_kubeconform.plugin.main(
+                argv=[
+                    str(chart_dir),
+                    *map(str, values_files),
+                    "--values-equivalence",
+                ],
+                validate_values_files=True,
+            )
+
+            self.assertEqual(return_code, 0)
+            self.assertEqual(
+                [
+                    c.args[0][4]
+                    for c in self.subprocess_mock.run.call_args_list[::2]
+                ],
+                [str(values_files[0]), str(values_files[2])],
+            )
+
+            # Equivalent values files are checked against the chart schema
+            self.setUp()
+            values_files[1].write_text("replicaCount: 0")
+            with self.assertLogs(level="ERROR") as context_manager:
+                return_code = helm_kubeconform.plugin.main(
+                    argv=[
+                        str(chart_dir),
+                        *map(str, values_files),
+                        "--values-equivalence",
+                    ],
+                    validate_values_files=True,
+                )
+
+            self.assertEqual(return_code, 1)
+            self.subprocess_mock.run.assert_not_called()
+            self.assertIn(
+                f"Helm {values_files[1]} values do not match the chart schema",
+                context_manager.output[0],
+            )
+
+    @unittest.mock.patch(
+        "helm_kubeconform.plugin.HAS_SCHEMA_DEPENDENCIES", new=False
+    )
+    def test_values_equivalence_unavailable(self: Self) -> None:
+        with self.assertLogs(level="WARNING") as context_manager:
+            return_code = helm_kubeconform.plugin.main(
+                argv=["chart", "values1.yaml", "--values-equivalence"],
+                validate_values_files=True,
+            )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(self.subprocess_mock.run.call_count, 2)
+        self.assertIn("requires the jsonschema", context_manager.output[0])
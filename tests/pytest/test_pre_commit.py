@@ -19,6 +19,11 @@ import helm_kubeconform.pre_commit
 if typing.TYPE_CHECKING:
     from typing_extensions import Self
 
+CLAIM_ARGS = [
+    "--claim-dir",
+    str(helm_kubeconform.plugin.PLUGIN_CACHE_DIR / "claims"),
+]
+
 
 class TestPreCommit(TestCase):
     def setUp(self: Self) -> None:
@@ -129,9 +134,10 @@ class TestPreCommit(TestCase):
         )
 
         self.plugin_main_mock.assert_called_once_with(
-            argv=["file1", "file2"],
+            argv=[*CLAIM_ARGS, "file1", "file2"],
             validate_chart_files=True,
             validate_values_files=False,
+            validate_all_files=False,
         )
         self.assertEqual(return_code, 0)
 
@@ -143,9 +149,10 @@ class TestPreCommit(TestCase):
         )
 
         self.plugin_main_mock.assert_called_once_with(
-            argv=["file1", "file2"],
+            argv=[*CLAIM_ARGS, "file1", "file2"],
             validate_chart_files=True,
             validate_values_files=False,
+            validate_all_files=False,
         )
         self.assertEqual(return_code, 1)
 
@@ -155,9 +162,10 @@ class TestPreCommit(TestCase):
         )
 
         self.plugin_main_mock.assert_called_once_with(
-            argv=["file1", "file2"],
+            argv=[*CLAIM_ARGS, "file1", "file2"],
             validate_chart_files=False,
             validate_values_files=True,
+            validate_all_files=False,
         )
         self.assertEqual(return_code, 0)
 
@@ -169,8 +177,35 @@ class TestPreCommit(TestCase):
         )
 
         self.plugin_main_mock.assert_called_once_with(
-            argv=["file1", "file2"],
+            argv=[*CLAIM_ARGS, "file1", "file2"],
             validate_chart_files=False,
             validate_values_files=True,
+            validate_all_files=False,
         )
         self.assertEqual(return_code, 1)
+
+    def test_all_files_validation(self: Self) -> None:
+        return_code = helm_kubeconform.pre_commit.main(
+            argv=["validate-all", "file1", "file2"]
+        )
+
+        self.plugin_main_mock.assert_called_once_with(
+            argv=[*CLAIM_ARGS, "file1", "file2"],
+            validate_chart_files=False,
+            validate_values_files=False,
+            validate_all_files=True,
+        )
+        self.assertEqual(return_code, 0)
+
+    @unittest.mock.patch(
+        "helm_kubeconform.plugin.HELM_KUBECONFORM_CLAIM_DIR", new="claims"
+    )
+    def test_claim_dir_from_env(self: Self) -> None:
+        helm_kubeconform.pre_commit.main(argv=["validate-charts", "file1"])
+
+        self.plugin_main_mock.assert_called_once_with(
+            argv=["file1"],
+            validate_chart_files=True,
+            validate_values_files=False,
+            validate_all_files=False,
+        )
@@ -0,0 +1,251 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import subprocess
+from subprocess import CalledProcessError
+import sys
+import tempfile
+import threading
+import typing
+import unittest
+from unittest import TestCase
+import unittest.mock
+
+import helm_kubeconform.resources
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+# Python code allocating 256 MiB and using some CPU time
+_ALLOCATE = "data = b'x' * 256 * 1024 ** 2; sum(range(10 ** 6))"
+
+
+class TestResources(TestCase):
+    @unittest.skipUnless(
+        helm_kubeconform.resources.HAS_WAIT4, "wait4() required"
+    )
+    def test_run_measured(self: Self) -> None:
+        usage = helm_kubeconform.resources.ResourceUsage()
+
+        process = helm_kubeconform.resources.run_measured(
+            [sys.executable, "-c", f"{_ALLOCATE}; print('done')"],
+            usage,
+            capture_output=True,
+            check=True,
+        )
+
+        self.assertEqual(process.stdout.strip(), b"done")
+        self.assertGreater(usage.user_time + usage.system_time, 0)
+        self.assertGreater(usage.max_rss or 0, 256 * 1024**2)
+
+        # Each process is measured, whatever the previous peak
+        helm_kubeconform.resources.run_measured(
+            [sys.executable, "-c", ""],
+            usage := helm_kubeconform.resources.ResourceUsage(),
+            check=True,
+        )
+
+        self.assertLess(usage.max_rss or 0, 256 * 1024**2)
+        self.assertGreater(usage.max_rss or 0, 0)
+
+        with self.assertRaises(CalledProcessError) as exception_cm:
+            helm_kubeconform.resources.run_measured(
+                [sys.executable, "-c", "print('error'); exit(3)"],
+                usage,
+                input=b"",
+                stdout=subprocess.PIPE,
+                check=True,
+            )
+
+        self.assertEqual(exception_cm.exception.returncode, 3)
+        self.assertEqual(exception_cm.exception.stdout.strip(), b"error")
+
+    @unittest.skipUnless(
+        helm_kubeconform.resources.HAS_WAIT4, "wait4() required"
+    )
+    def test_concurrent_processes(self: Self) -> None:
+        sleep_usage = helm_kubeconform.resources.ResourceUsage()
+        allocate_usage = helm_kubeconform.resources.ResourceUsage()
+
+        with helm_kubeconform.resources.MeasuredPopen(
+            [sys.executable, "-c", "import time; time.sleep(1)"], sleep_usage
+        ) as sleep_process:
+            thread = threading.Thread(
+                target=helm_kubeconform.resources.run_measured,
+                args=([sys.executable, "-c", _ALLOCATE], allocate_usage),
+            )
+            thread.start()
+            thread.join()
+
+        self.assertEqual(sleep_process.returncode, 0)
+        # Processes terminated meanwhile are not counted
+        self.assertGreater(allocate_usage.max_rss or 0, 256 * 1024**2)
+        self.assertLess(sleep_usage.max_rss or 0, 256 * 1024**2)
+        self.assertLess(
+            sleep_usage.user_time + sleep_usage.system_time,
+            allocate_usage.user_time + allocate_usage.system_time,
+        )
+
+    @unittest.skipUnless(
+        helm_kubeconform.resources.HAS_RESOURCE, "resource module required"
+    )
+    def test_run_measured_without_wait4(self: Self) -> None:
+        usage = helm_kubeconform.resources.ResourceUsage()
+
+        with unittest.mock.patch(
+            "helm_kubeconform.resources.HAS_WAIT4", new=False
+        ):
+            helm_kubeconform.resources.run_measured(
+                [sys.executable, "-c", _ALLOCATE], usage, check=True
+            )
+
+        self.assertGreater(usage.user_time + usage.system_time, 0)
+
+    def test_usage(self: Self) -> None:
+        usage = helm_kubeconform.resources.ResourceUsage(1.0, 0.5, None)
+        usage.add(
+            helm_kubeconform.resources.ResourceUsage(
+                2.0, 0.25, 3 * 1024 * 1024
+            )
+        )
+        usage.add(helm_kubeconform.resources.ResourceUsage(0.0, 0.0, None))
+
+        self.assertEqual(
+            usage,
+            helm_kubeconform.resources.ResourceUsage(
+                3.0, 0.75, 3 * 1024 * 1024
+            ),
+        )
+        self.assertEqual(
+            str(usage), "user 3.000s, system 0.750s, max RSS 3.0 MiB"
+        )
+        self.assertEqual(
+            str(helm_kubeconform.resources.ResourceUsage()),
+            "user 0.000s, system 0.000s, max RSS unknown",
+        )
+
+    def test_report(self: Self) -> None:
+        report = helm_kubeconform.resources.ResourceReport()
+        usage = report.add("chart1")
+        usage.render.add(
+            helm_kubeconform.resources.ResourceUsage(1.0, 1.0, 100)
+        )
+        usage.output_size = 2048
+        report.add("chart2").validation.add(
+            helm_kubeconform.resources.ResourceUsage(2.0, 0.0, None)
+        )
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir, "report", "resources.json")
+            report.write(path)
+
+            self.assertEqual(
+                json.loads(path.read_text()),
+                {
+                    "targets": [
+                        {
+                            "target": "chart1",
+                            "render": {
+                                "user_time": 1.0,
+                                "system_time": 1.0,
+                                "max_rss": 100,
+                            },
+                            "validation": {
+                                "user_time": 0.0,
+                                "system_time": 0.0,
+                                "max_rss": None,
+                            },
+                            "output_size": 2048,
+                            "render_time": 0.0,
+                            "validation_time": 0.0,
+                            "reused": False,
+                        },
+                        {
+                            "target": "chart2",
+                            "render": {
+                                "user_time": 0.0,
+                                "system_time": 0.0,
+                                "max_rss": None,
+                            },
+                            "validation": {
+                                "user_time": 2.0,
+                                "system_time": 0.0,
+                                "max_rss": None,
+                            },
+                            "output_size": None,
+                            "render_time": 0.0,
+                            "validation_time": 0.0,
+                            "reused": False,
+                        },
+                    ],
+                    "total": {
+                        "user_time": 3.0,
+                        "system_time": 1.0,
+                        "max_rss": 100,
+                    },
+                },
+            )
+
+            with self.assertLogs(level="WARNING") as context_manager:
+                report.write(Path(tmp_dir))
+
+            self.assertIn(
+                "Unable to write resource report", context_manager.output[0]
+            )
+
+    def test_get_memory_limit(self: Self) -> None:
+        test_args: tuple[
+            tuple[str | None, dict[str, str], int | None], ...
+        ] = (
+            # cgroup v2, limited by a parent cgroup
+            (
+                "0::/user.slice/app.scope\n",
+                {
+                    "memory.max": "max",
+                    "user.slice/memory.max": "1073741824",
+                    "user.slice/app.scope/memory.max": "2147483648",
+                },
+                1024**3,
+            ),
+            # cgroup v1
+            (
+                "4:memory:/docker/abc\n0::/\n",
+                {
+                    "memory/memory.limit_in_bytes": "9223372036854771712",
+                    "memory/docker/abc/memory.limit_in_bytes": "536870912",
+                },
+                512 * 1024**2,
+            ),
+            ("0::/\n", {"memory.max": "max"}, None),
+            (None, {}, None),
+        )
+
+        for proc_cgroup, limit_files, limit in test_args:
+            with (
+                self.subTest(proc_cgroup=proc_cgroup),
+                tempfile.TemporaryDirectory() as tmp_dir,
+            ):
+                root = Path(tmp_dir, "cgroup")
+                for path, value in limit_files.items():
+                    (root / path).parent.mkdir(parents=True, exist_ok=True)
+                    (root / path).write_text(f"{value}\n")
+                proc_cgroup_file = Path(tmp_dir, "cgroup.txt")
+                if proc_cgroup is not None:
+                    proc_cgroup_file.write_text(proc_cgroup)
+
+                with (
+                    unittest.mock.patch(
+                        "helm_kubeconform.resources._CGROUP_ROOT", root
+                    ),
+                    unittest.mock.patch(
+                        "helm_kubeconform.resources._PROC_CGROUP_FILE",
+                        proc_cgroup_file,
+                    ),
+                ):
+                    self.assertEqual(
+                        helm_kubeconform.resources.get_memory_limit(), limit
+                    )
@@ -0,0 +1,122 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import threading
+import time
+import typing
+from unittest import TestCase
+
+import helm_kubeconform.scheduling
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestPartition(TestCase):
+    def test_partition(self: Self) -> None:
+        costs = {"a": 5.0, "b": 4.0, "c": 3.0, "d": 3.0, "e": 3.0}
+
+        groups = helm_kubeconform.scheduling.partition(
+            list(costs), costs.__getitem__, 2
+        )
+
+        self.assertEqual(groups, [["a", "d"], ["b", "c", "e"]])
+
+    def test_partition_ties(self: Self) -> None:
+        items = ["a", "b", "c", "d", "e"]
+
+        groups = helm_kubeconform.scheduling.partition(items, lambda _: 1, 3)
+
+        self.assertEqual(groups, [["a", "d"], ["b", "e"], ["c"]])
+
+    def test_partition_more_groups_than_items(self: Self) -> None:
+        groups = helm_kubeconform.scheduling.partition(["a"], lambda _: 1, 3)
+
+        self.assertEqual(groups, [["a"], [], []])
+
+
+class TestPrioritize(TestCase):
+    def test_prioritize(self: Self) -> None:
+        failed = {"f1", "f2"}
+        modified = {"m", "f2"}
+        costs = {"f1": 2.0, "f2": 1.0, "m": 5.0, "a": 3.0, "b": 1.0, "c": 1.0}
+
+        self.assertEqual(
+            helm_kubeconform.scheduling.prioritize(
+                list(costs),
+                failed.__contains__,
+                modified.__contains__,
+                costs.__getitem__,
+            ),
+            ["f2", "f1", "m", "b", "c", "a"],
+        )
+
+
+class TestRunConcurrently(TestCase):
+    def setUp(self: Self) -> None:
+        self.lock = threading.Lock()
+        self.running: list[int] = []
+        self.started: list[int] = []
+        self.peak_running = 0
+        self.peak_memory = 0
+
+    def _run(self: Self, item: int) -> int:
+        with self.lock:
+            self.started.append(item)
+            self.running.append(item)
+            self.peak_running = max(self.peak_running, len(self.running))
+            self.peak_memory = max(self.peak_memory, sum(self.running))
+        time.sleep(0.01)
+        with self.lock:
+            self.running.remove(item)
+        return item * 10
+
+    def test_jobs(self: Self) -> None:
+        results = list(
+            helm_kubeconform.scheduling.run_concurrently(
+                range(1, 9), self._run, 3, lambda _: 0
+            )
+        )
+
+        self.assertEqual(sorted(results), [(i, i * 10) for i in range(1, 9)])
+        self.assertEqual(self.peak_running, 3)
+        self.assertEqual(sorted(self.started[:3]), [1, 2, 3])
+
+    def test_memory_budget(self: Self) -> None:
+        # Items are their own estimated memory
+        items = [6, 6, 3, 3, 1]
+
+        results = list(
+            helm_kubeconform.scheduling.run_concurrently(
+                items, self._run, 4, float, memory_budget=10
+            )
+        )
+
+        self.assertEqual(sorted(i for i, _ in results), sorted(items))
+        self.assertEqual(self.peak_memory, 10)
+        # Smaller items overtake an item waiting for memory
+        self.assertEqual(sorted(self.started[:3]), [1, 3, 6])
+
+        # Items exceeding the budget run alone
+        self.setUp()
+        results = list(
+            helm_kubeconform.scheduling.run_concurrently(
+                [1, 20, 2], self._run, 4, float, memory_budget=10
+            )
+        )
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(self.peak_memory, 20)
+
+    def test_close(self: Self) -> None:
+        results = helm_kubeconform.scheduling.run_concurrently(
+            range(1, 9), self._run, 2, lambda _: 0
+        )
+
+        next(results)
+        results.close()
+
+        self.assertEqual(self.running, [])
+        self.assertLessEqual(len(self.started), 4)
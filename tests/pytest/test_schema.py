@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import tempfile
+import typing
+import unittest
+from unittest import TestCase
+
+import helm_kubeconform.cache
+import helm_kubeconform.schema
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "required": ["image"],
+    "properties": {
+        "replicaCount": {"type": "integer"},
+        "image": {
+            "type": "object",
+            "required": ["repository"],
+            "properties": {"repository": {"type": "string"}},
+        },
+    },
+}
+
+
+@unittest.skipUnless(
+    helm_kubeconform.schema.HAS_DEPENDENCIES, "jsonschema and PyYAML required"
+)
+class TestCheckValues(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.chart_dir = Path(tmp_dir.name)
+        (self.chart_dir / "Chart.yaml").write_text("name: chart")
+        (self.chart_dir / "values.yaml").write_text(
+            "replicaCount: 1\nimage:\n  repository: nginx\n"
+        )
+        (self.chart_dir / "values.schema.json").write_text(json.dumps(SCHEMA))
+
+    def _values_file(self: Self, content: str) -> Path:
+        values_file = Path(
+            tempfile.NamedTemporaryFile(  # noqa: SIM115
+                "w", suffix=".yaml", dir=self.chart_dir, delete=False
+            ).name
+        )
+        values_file.write_text(content)
+        return values_file
+
+    def test_valid_values(self: Self) -> None:
+        test_args = ["", "replicaCount: 2", "image:\n  tag: latest"]
+
+        for content in test_args:
+            with self.subTest(content=content):
+                helm_kubeconform.schema.check_values(
+                    self.chart_dir, self._values_file(content)
+                )
+
+    def test_invalid_values(self: Self) -> None:
+        test_args = [
+            (
+                ["replicaCount: two"],
+                "replicaCount: 'two' is not of type 'integer'",
+            ),
+            (["image: null"], "(root): 'image' is a required property"),
+            (
+                ["replicaCount: 2", "image:\n  repository: 1"],
+                "image/repository: 1 is not of type 'string'",
+            ),
+            (["replicaCount: [invalid"], "while parsing a flow sequence"),
+        ]
+
+        for contents, error in test_args:
+            with self.subTest(contents=contents):
+                values_files = [self._values_file(c) for c in contents]
+
+                with self.assertRaises(
+                    helm_kubeconform.schema.ValuesError
+                ) as exception_cm:
+                    helm_kubeconform.schema.check_values(
+                        self.chart_dir, *values_files
+                    )
+
+                self.assertIn(error, str(exception_cm.exception))
+
+    def test_no_schema(self: Self) -> None:
+        (self.chart_dir / "values.schema.json").unlink()
+
+        helm_kubeconform.schema.check_values(
+            self.chart_dir, self._values_file("replicaCount: two")
+        )
+
+    def test_no_default_values(self: Self) -> None:
+        (self.chart_dir / "values.yaml").unlink()
+
+        with self.assertRaises(helm_kubeconform.schema.ValuesError):
+            helm_kubeconform.schema.check_values(self.chart_dir)
+
+    def test_invalid_schema(self: Self) -> None:
+        test_args = [
+            ("{invalid", "invalid schema"),
+            (json.dumps({"type": 1}), "invalid schema"),
+        ]
+
+        for content, error in test_args:
+            with self.subTest(content=content):
+                (self.chart_dir / "values.schema.json").write_text(content)
+
+                with self.assertRaises(
+                    helm_kubeconform.schema.ValuesError
+                ) as exception_cm:
+                    helm_kubeconform.schema.check_values(self.chart_dir)
+
+                self.assertIn(error, str(exception_cm.exception))
+
+
+@unittest.skipUnless(
+    helm_kubeconform.schema.HAS_DEPENDENCIES, "jsonschema and PyYAML required"
+)
+class TestMergeValues(TestCase):
+    def test_merge_values(self: Self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chart_dir = Path(tmp_dir)
+            values_file = chart_dir / "override.yaml"
+            values_file.write_text("image:\n  tag: v1\nreplicaCount: null")
+
+            self.assertEqual(
+                helm_kubeconform.schema.merge_values(chart_dir, values_file),
+                {"image": {"tag": "v1"}},
+            )
+
+            (chart_dir / "values.yaml").write_text(
+                "replicaCount: 1\nimage:\n  repository: nginx\n"
+            )
+            self.assertEqual(
+                helm_kubeconform.schema.merge_values(chart_dir, values_file),
+                {"image": {"repository": "nginx", "tag": "v1"}},
+            )
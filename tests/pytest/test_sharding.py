@@ -0,0 +1,167 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import json
+import typing
+from unittest import TestCase
+
+import helm_kubeconform.sharding
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestSharding(TestCase):
+    def test_split_documents(self: Self) -> None:
+        manifests = (
+            b"kind: A\n"
+            b"---\n"
+            b"# Source: chart/templates/b.yaml\n"
+            b"kind: B\n"
+            b"data:\n"
+            b"  key: |\n"
+            b"    ---\n"
+            b"--- \n"
+            b"---\n"
+            b"\n"
+            b"---\n"
+            b"kind: C"
+        )
+
+        self.assertEqual(
+            helm_kubeconform.sharding.split_documents(manifests),
+            [
+                b"---\nkind: A\n",
+                b"---\n# Source: chart/templates/b.yaml\nkind: B\n"
+                b"data:\n  key: |\n    ---\n",
+                b"--- \n",
+                b"---\n\n",
+                b"---\nkind: C\n",
+            ],
+        )
+        self.assertEqual(helm_kubeconform.sharding.split_documents(b""), [])
+
+    def test_shard_manifests(self: Self) -> None:
+        documents = [
+            f"---\nkind: K{i}\n".encode() + b"x: y\n" * i for i in range(6)
+        ]
+        manifests = b"".join(documents)
+
+        shards = helm_kubeconform.sharding.shard_manifests(
+            manifests, 2, min_documents=3
+        )
+
+        self.assertEqual(len(shards), 2)
+        self.assertEqual(
+            sorted(
+                d
+                for s in shards
+                for d in helm_kubeconform.sharding.split_documents(s)
+            ),
+            sorted(documents),
+        )
+        self.assertLessEqual(abs(len(shards[0]) - len(shards[1])), 5)
+
+        # Too few documents
+        self.assertEqual(
+            helm_kubeconform.sharding.shard_manifests(
+                manifests, 4, min_documents=4
+            ),
+            [manifests],
+        )
+        self.assertEqual(
+            helm_kubeconform.sharding.shard_manifests(manifests, 4),
+            [manifests],
+        )
+
+    def test_merge_text_outputs(self: Self) -> None:
+        outputs = [
+            b"stdin - A a is invalid: problem\n"
+            b"Summary: 2 resources found parsing stdin - Valid: 1, "
+            b"Invalid: 1, Errors: 0, Skipped: 0\n",
+            b"Summary: 1 resource found parsing stdin - Valid: 0, Invalid: 0, "
+            b"Errors: 0, Skipped: 1\n",
+            b"stdin - B b failed validation: error\n",
+        ]
+
+        self.assertEqual(
+            helm_kubeconform.sharding.merge_outputs(outputs, "text"),
+            b"stdin - A a is invalid: problem\n"
+            b"stdin - B b failed validation: error\n"
+            b"Summary: 3 resources found parsing stdin - Valid: 1, "
+            b"Invalid: 1, Errors: 0, Skipped: 1\n",
+        )
+
+        # Summaries of files
+        self.assertEqual(
+            helm_kubeconform.sharding.merge_outputs(
+                [
+                    b"Summary: 1 resource found in 1 file - Valid: 1, "
+                    b"Invalid: 0, Errors: 0, Skipped: 0\n",
+                    b"Summary: 4 resources found in 2 files - Valid: 4, "
+                    b"Invalid: 0, Errors: 0, Skipped: 0\n",
+                ],
+                "text",
+            ),
+            b"Summary: 5 resources found in 2 files - Valid: 5, Invalid: 0, "
+            b"Errors: 0, Skipped: 0\n",
+        )
+
+        # No summary
+        self.assertEqual(
+            helm_kubeconform.sharding.merge_outputs(
+                [b"a\n", b"", b"b\n"], "text"
+            ),
+            b"a\nb\n",
+        )
+
+    def test_merge_json_outputs(self: Self) -> None:
+        outputs = [
+            json.dumps(
+                {
+                    "resources": [{"kind": "A"}],
+                    "summary": {
+                        "valid": 0,
+                        "invalid": 1,
+                        "errors": 0,
+                        "skipped": 0,
+                    },
+                }
+            ).encode(),
+            json.dumps(
+                {
+                    "resources": [{"kind": "B"}],
+                    "summary": {
+                        "valid": 0,
+                        "invalid": 0,
+                        "errors": 1,
+                        "skipped": 2,
+                    },
+                }
+            ).encode(),
+        ]
+
+        self.assertEqual(
+            json.loads(
+                helm_kubeconform.sharding.merge_outputs(outputs, "json")
+            ),
+            {
+                "resources": [{"kind": "A"}, {"kind": "B"}],
+                "summary": {
+                    "valid": 0,
+                    "invalid": 1,
+                    "errors": 1,
+                    "skipped": 2,
+                },
+            },
+        )
+
+        # Outputs which are not JSON are concatenated
+        self.assertEqual(
+            helm_kubeconform.sharding.merge_outputs(
+                [b'{"resources": []}', b"panic\n"], "json"
+            ),
+            b'{"resources": []}panic\n',
+        )
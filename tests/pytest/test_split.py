@@ -0,0 +1,113 @@
+# SPDX-FileCopyrightText: © 2023 Mohamed El Morabity
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from pathlib import Path
+import tempfile
+import typing
+from unittest import TestCase
+
+import helm_kubeconform.split
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class TestSplit(TestCase):
+    def setUp(self: Self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.chart_dir = self.root / "chart"
+        self._create(
+            "Chart.yaml",
+            "values.yaml",
+            "crds/crd.yaml",
+            "templates/_helpers.tpl",
+            "templates/NOTES.txt",
+            "templates/deployment.yaml",
+            "templates/service.yaml",
+            "templates/tests/test-connection.yaml",
+        )
+
+    def _create(self: Self, *files: str, content: str = "") -> None:
+        for file in files:
+            path = self.chart_dir / file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+
+    def test_find_templates(self: Self) -> None:
+        self.assertEqual(
+            helm_kubeconform.split.find_templates(self.chart_dir),
+            [
+                "templates/deployment.yaml",
+                "templates/service.yaml",
+                "templates/tests/test-connection.yaml",
+            ],
+        )
+
+    def test_find_templates_unsplittable(self: Self) -> None:
+        test_args = [
+            ("Chart.yaml", "dependencies:\n  - name: common\n"),
+            ("charts/common/Chart.yaml", ""),
+            (
+                "templates/service.yaml",
+                '{{ include (print $.Template.BasePath "/a.yaml") . }}',
+            ),
+            ("templates/service.yaml", '{{ .Files.Get "templates/a.yaml" }}'),
+            ("templates/service.yaml", '{{- define "chart.name" }}{{ end }}'),
+        ]
+
+        for file, content in test_args:
+            with self.subTest(file=file, content=content):
+                self.setUp()
+                self._create(file, content=content)
+
+                self.assertIsNone(
+                    helm_kubeconform.split.find_templates(self.chart_dir)
+                )
+
+        self.assertIsNone(
+            helm_kubeconform.split.find_templates(self.root / "missing")
+        )
+
+    def test_create_partial_chart(self: Self) -> None:
+        for primary in (True, False):
+            with self.subTest(primary=primary):
+                destination = self.root / str(primary) / "chart"
+                helm_kubeconform.split.create_partial_chart(
+                    self.chart_dir,
+                    destination,
+                    ["templates/tests/test-connection.yaml"],
+                    primary,
+                )
+
+                self.assertEqual(
+                    sorted(
+                        p.relative_to(destination).as_posix()
+                        for p in destination.rglob("*")
+                        if p.is_file()
+                    ),
+                    [
+                        "Chart.yaml",
+                        *(["crds/crd.yaml"] if primary else []),
+                        *(["templates/NOTES.txt"] if primary else []),
+                        "templates/_helpers.tpl",
+                        "templates/tests/test-connection.yaml",
+                        "values.yaml",
+                    ],
+                )
+
+    def test_get_output_sizes(self: Self) -> None:
+        manifests = (
+            b"---\n# Source: chart/templates/a.yaml\nkind: A\n"
+            b"---\n# Source: chart/templates/b.yaml\nkind: B\n"
+            b"---\n# Source: chart/templates/a.yaml\nkind: C\n"
+        )
+
+        self.assertEqual(
+            helm_kubeconform.split.get_output_sizes(manifests),
+            {"templates/a.yaml": 86, "templates/b.yaml": 45},
+        )
+        self.assertEqual(helm_kubeconform.split.get_output_sizes(b""), {})